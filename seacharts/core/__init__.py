@@ -11,4 +11,5 @@ from .scope import Scope, MapFormat
 from .ais import AISParser, AISShipData
 from .aisLive import AISLiveParser
 from .aisDatabase import AISDatabaseParser
+from .aisReplay import AISReplayParser
 
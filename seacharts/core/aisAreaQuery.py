@@ -0,0 +1,149 @@
+"""
+Contains the AISAreaIndex class finding the vessels of the AIS history that were inside an area.
+"""
+import sqlite3
+from typing import Callable
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+from seacharts.core.aisTrajectory import AISTracks
+
+
+def area_visits(tracks: AISTracks, area: BaseGeometry) -> list[tuple[int, float, float]]:
+    """
+    Finds the visits of an area along trajectories. A visit starts at the first report inside the area
+    and ends at the last report inside it before the vessel leaves it (or its trajectory ends).
+
+    :param tracks: trajectories of the vessels
+    :param area: area in UTM coordinates
+    :return: list of visits with format (mmsi, entry time, exit time), sorted by MMSI and entry time
+    """
+    if not len(tracks.times):
+        return []
+    shapely.prepare(area)
+    inside = shapely.contains_xy(area, tracks.points[:, 0], tracks.points[:, 1])
+    first = np.zeros(len(inside), dtype=bool)
+    first[tracks.offsets[:-1]] = True
+    last = np.zeros(len(inside), dtype=bool)
+    last[tracks.offsets[1:] - 1] = True
+    entries = np.flatnonzero(inside & (first | ~np.roll(inside, 1)))
+    exits = np.flatnonzero(inside & (last | ~np.roll(inside, -1)))
+    mmsi = np.repeat(tracks.mmsi, np.diff(tracks.offsets))
+    return list(zip(mmsi[entries].tolist(), tracks.times[entries].tolist(), tracks.times[exits].tolist()))
+
+
+class AISAreaIndex:
+    """
+    Time-bucketed grid index of the AIS history, telling which vessels reported from which grid cell
+    during which time bucket. An area query only reads the index entries of the cells intersecting the
+    area during the queried buckets, so that the reports of the few candidate vessels are tested
+    against the area instead of the whole history.
+
+    The index is kept in the AisGrid table of the history database, with one row per (time bucket,
+    cell, vessel). It is updated incrementally from the rows appended to AisHistory since the last
+    update, and rebuilt when the cell size or bucket duration change.
+
+    :param connection: connection to the history database
+    :param db_column_names: names of the AisHistory columns keyed by field
+    :param to_utm: callable converting arrays of positions as stored in the database to UTM eastings and northings
+    :param to_epoch: callable converting a stored timestamp to epoch seconds
+    :param cell_size: size of the grid cells in metres
+    :param bucket: duration of the time buckets in seconds
+    """
+    def __init__(self, connection: sqlite3.Connection, db_column_names: dict[str, str],
+                 to_utm: Callable[[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]],
+                 to_epoch: Callable[[object], float], cell_size: float = 1000.0, bucket: int = 3600):
+        self._db = connection
+        self._columns = db_column_names
+        self._to_utm = to_utm
+        self._to_epoch = to_epoch
+        self.cell_size = cell_size
+        self.bucket = bucket
+        self._prepare_tables()
+
+    def _prepare_tables(self) -> None:
+        try:
+            with self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS AisGridState "
+                                 "(cell_size REAL, bucket INTEGER, last_rowid INTEGER)")
+                state = self._db.execute("SELECT cell_size, bucket FROM AisGridState").fetchone()
+                if state is not None and tuple(state) != (self.cell_size, self.bucket):
+                    print("INFO: AIS area index settings changed, rebuilding the index")
+                    self._db.execute("DROP TABLE IF EXISTS AisGrid")
+                    self._db.execute("DELETE FROM AisGridState")
+                    state = None
+                if state is None:
+                    self._db.execute("INSERT INTO AisGridState VALUES (?, ?, 0)", (self.cell_size, self.bucket))
+                self._db.execute("CREATE TABLE IF NOT EXISTS AisGrid (bucket INTEGER, ix INTEGER, iy INTEGER, "
+                                 "mmsi INTEGER, PRIMARY KEY (bucket, ix, iy, mmsi)) WITHOUT ROWID")
+        except sqlite3.Error as error:
+            raise ValueError(f"Unable to create the AIS area index \n{error}") from None
+
+    def update(self, batch_size: int = 200000) -> int:
+        """
+        Indexes the rows appended to AisHistory since the last update.
+
+        :param batch_size: number of history rows read at once
+        :return: number of indexed history rows
+        """
+        columns = self._columns
+        last_rowid = self._db.execute("SELECT last_rowid FROM AisGridState").fetchone()[0]
+        indexed = 0
+        while True:
+            try:
+                rows = self._db.execute(
+                    f"SELECT rowid, {columns['mmsi']}, {columns['lon']}, {columns['lat']}, {columns['last_updated']} "
+                    f"FROM AisHistory WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, batch_size)).fetchall()
+            except sqlite3.Error as error:
+                raise ValueError(f"Unable to index the AIS history \n{error}") from None
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            indexed += len(rows)
+            rows = [row for row in rows if row[1] is not None and row[2] is not None and row[3] is not None]
+            count = len(rows)
+            mmsi = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+            lon = np.fromiter((row[2] for row in rows), dtype=np.float64, count=count)
+            lat = np.fromiter((row[3] for row in rows), dtype=np.float64, count=count)
+            times = np.fromiter((self._to_epoch(row[4]) for row in rows), dtype=np.float64, count=count)
+            east, north = self._to_utm(lon, lat)
+            valid = np.isfinite(east) & np.isfinite(north) & np.isfinite(times)
+            entries = np.unique(np.column_stack((np.floor(times[valid] / self.bucket),
+                                                 np.floor(east[valid] / self.cell_size),
+                                                 np.floor(north[valid] / self.cell_size),
+                                                 mmsi[valid])).astype(np.int64), axis=0)
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO AisGrid VALUES (?, ?, ?, ?)", entries.tolist())
+                self._db.execute("UPDATE AisGridState SET last_rowid = ?", (last_rowid,))
+        if indexed:
+            print(f"INFO: Indexed {indexed} AIS history rows for area queries")
+        return indexed
+
+    def candidates(self, area: BaseGeometry, time_start: float, time_end: float) -> np.ndarray:
+        """
+        :param area: area in UTM coordinates
+        :param time_start: epoch time of the start of the period
+        :param time_end: epoch time of the end of the period
+        :return: MMSI of the vessels having reported from a cell intersecting the area during the period
+        """
+        self.update()
+        x_min, y_min, x_max, y_max = area.bounds
+        ix = np.arange(np.floor(x_min / self.cell_size), np.floor(x_max / self.cell_size) + 1, dtype=np.int64)
+        iy = np.arange(np.floor(y_min / self.cell_size), np.floor(y_max / self.cell_size) + 1, dtype=np.int64)
+        grid_x, grid_y = np.meshgrid(ix, iy, indexing="ij")
+        cells = shapely.box(grid_x * self.cell_size, grid_y * self.cell_size,
+                            (grid_x + 1) * self.cell_size, (grid_y + 1) * self.cell_size)
+        shapely.prepare(area)
+        crossed = shapely.intersects(area, cells)
+        rows = self._db.execute(
+            "SELECT DISTINCT ix, iy, mmsi FROM AisGrid WHERE bucket >= ? AND bucket <= ? "
+            "AND ix >= ? AND ix <= ? AND iy >= ? AND iy <= ?",
+            (int(time_start // self.bucket), int(time_end // self.bucket),
+             int(ix[0]), int(ix[-1]), int(iy[0]), int(iy[-1]))).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int64)
+        inside = crossed[rows[:, 0] - ix[0], rows[:, 1] - iy[0]]
+        return np.unique(rows[inside, 2])
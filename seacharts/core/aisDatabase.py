@@ -1,5 +1,10 @@
 from seacharts.core import AISParser, Scope
 from seacharts.core.aisShipData import AISShipData
+from seacharts.core.aisFleet import AISFleet
+from seacharts.core.aisDeadReckoning import AISDeadReckoning
+from seacharts.core.aisInterpolation import interpolate_fleets
+from seacharts.core.aisTrajectory import AISTracks
+from seacharts.core.aisAreaQuery import AISAreaIndex, area_visits
 #from seacharts.display.colors import _ship_colors
 from random import random
 from datetime import datetime
@@ -8,6 +13,10 @@ import pandas as pd
 import csv
 from datetime import datetime, timedelta
 import threading
+import numpy as np
+from shapely.geometry.base import BaseGeometry
+from bisect import bisect_left
+from collections import OrderedDict
 class AISDatabaseParser(AISParser):
     def __init__(self, scope: Scope):
         self.scope = scope
@@ -20,9 +29,24 @@ class AISDatabaseParser(AISParser):
             "lat": "latitude",               
             "last_updated": "last_updated",             
         }
+        self._epoch_timestamps = self.scope.settings["enc"]["ais"].get("timestamp_format") == "epoch"
         self.append_custom_column_names()
         self.ships_list_lock = threading.Lock()
         self.ships_info:list[AISShipData] = []
+        self.fleet = AISFleet.empty()
+        self.dead_reckoning = None
+        self._query_step = 0
+        self._query_time = None
+        self._queried_ships = []
+        # snapshots of the playback, keyed by epoch time of the slider timestamp
+        self._snapshots: OrderedDict[float, tuple[list, AISFleet, list]] = OrderedDict()
+        self._snapshot_cache_size = 4
+        self._track_index_ready = False
+        self._area_index = None
+        dead_reckoning_settings = self.scope.settings["enc"]["ais"].get("dead_reckoning")
+        if dead_reckoning_settings:
+            self.dead_reckoning = AISDeadReckoning(dead_reckoning_settings.get("horizon", 60))
+            self._query_step = dead_reckoning_settings.get("query_step", 0)
         if self.scope.settings["enc"]["ais"].get("dynamic_scale") == True:
             self._dynamic_scale = True
         else:
@@ -53,14 +77,35 @@ class AISDatabaseParser(AISParser):
         self.get_db_data(datetime.strptime(self.scope.settings["enc"]["time"]["time_start"],"%d-%m-%Y %H:%M"))
     
     def get_db_data(self, timestamp:datetime) -> list[tuple]:
-        self.ships_info.clear()
         """
-        Retrieves vessels' data based on passed timestamp
+        Retrieves vessels' data based on passed timestamp.
+        With dead reckoning, vessels are moved from their last report to the timestamp, and timestamps
+        up to 'query_step' seconds after the last queried one are served from it without a query.
         
         :param datetime timestamp: The timestamp based on which vessels will be retrieved,  period (timestamp - [1*period type from config(min,hours)]) to timestamp
         :return: list of ships from the period
         :rtype: list[tuple]
         """
+        if self.dead_reckoning is not None and self._query_time is not None \
+                and 0 <= timestamp.timestamp() - self._query_time <= self._query_step:
+            return self.dead_reckoning.apply(self._queried_ships, self.fleet, timestamp.timestamp())
+        ships = self._query_ships(timestamp)
+        if self.dead_reckoning is None:
+            return ships
+        self._query_time = timestamp.timestamp()
+        self._queried_ships = ships
+        self.fleet = self._build_fleet(ships)
+        return self.dead_reckoning.apply(ships, self.fleet, self._query_time)
+
+    def _query_ships(self, timestamp: datetime) -> list[tuple]:
+        """
+        Queries the last report of every vessel within the period ending at the timestamp into 'ships_info'
+
+        :param datetime timestamp: end of the queried period
+        :return: list of ships from the period
+        :rtype: list[tuple]
+        """
+        self.ships_info.clear()
 
         time_start,time_end = self._resolve_timestamp(timestamp)
         #time_end = datetime.strptime(slider_time_end_val, "%d-%m-%Y %H:%M")
@@ -97,31 +142,228 @@ class AISDatabaseParser(AISParser):
         #         writer.writerow({'mmsi': col["mmsi"], 'long': col["longtitude"], 'lat': col["latitude"], 'heading': col["heading"], 'color': col["color"]})
         # return self.get_ships()
         
-    def _resolve_timestamp(self,timestamp:datetime) -> tuple[datetime,datetime]:
+    def interpolate(self, timestamp: datetime) -> list[tuple]:
+        """
+        Retrieves vessels' data at any time between two slider timestamps, by linear interpolation of
+        the positions and headings of the two bracketing snapshots. Snapshots are queried once and
+        cached, so a playback only performs one query per slider timestamp it crosses.
+
+        :param datetime timestamp: time of the frame to be rendered
+        :return: list of ships with format (mmsi, east, north, heading, color, scale)
+        :rtype: list[tuple]
+        """
+        epoch_times = self.scope.time.epoch_times
+        now = timestamp.timestamp()
+        following = min(bisect_left(epoch_times, now), len(epoch_times) - 1)
+        if following == 0 or epoch_times[following] <= now:
+            ships, _, ships_info = self._load_snapshot(following)
+            self.ships_info = list(ships_info)
+            return ships
+        previous_ships, previous_fleet, previous_info = self._load_snapshot(following - 1)
+        following_ships, following_fleet, following_info = self._load_snapshot(following)
+        indices, east, north, heading = interpolate_fleets(previous_fleet, following_fleet, now,
+                                                           epoch_times[following - 1], epoch_times[following])
+        templates = previous_ships + following_ships
+        # the later reports come first, so that vessel info shows the most recent data
+        self.ships_info = following_info + previous_info
+        return [(templates[index][0], int(x), int(y), h, *templates[index][4:])
+                for index, x, y, h in zip(indices.tolist(), east.tolist(), north.tolist(), heading.tolist())]
+
+    def _load_snapshot(self, index: int) -> tuple[list, AISFleet, list]:
+        """
+        :param index: index of the slider timestamp
+        :return: tuple of ships, fleet and ship data of the snapshot, queried if not cached
+        """
+        key = self.scope.time.epoch_times[index]
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            self._snapshots.move_to_end(key)
+            return snapshot
+        ships = self._query_ships(self.scope.time.datetimes[index])
+        snapshot = (ships, self._build_fleet(ships), list(self.ships_info))
+        self._snapshots[key] = snapshot
+        if len(self._snapshots) > self._snapshot_cache_size:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def get_track(self, mmsi: int, time_start: datetime, time_end: datetime,
+                  tolerance: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Retrieves the trajectory of a vessel from the history.
+
+        :param int mmsi: MMSI of the vessel
+        :param datetime time_start: start of the trajectory
+        :param datetime time_end: end of the trajectory
+        :param float tolerance: Douglas-Peucker simplification tolerance in metres, 0 keeps all reports
+        :return: tuple of epoch times and UTM positions of shape (number of points, 2), sorted by time
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        tracks = self.get_tracks([mmsi], time_start, time_end, tolerance)
+        if not len(tracks):
+            return np.empty(0), np.empty((0, 2))
+        return tracks[0]
+
+    def get_tracks(self, mmsis: list[int], time_start: datetime, time_end: datetime,
+                   tolerance: float = 0.0) -> AISTracks:
+        """
+        Retrieves the trajectories of several vessels from the history in a single indexed scan.
+        The points of all vessels are returned in flat arrays, see AISTracks.segments() for rendering
+        them with a LineCollection.
+
+        :param list[int] mmsis: MMSI of the vessels
+        :param datetime time_start: start of the trajectories
+        :param datetime time_end: end of the trajectories
+        :param float tolerance: Douglas-Peucker simplification tolerance in metres, 0 keeps all reports
+        :return: trajectories of the vessels having reports in the period
+        :rtype: AISTracks
+        """
+        self._ensure_track_index()
+        mmsi_column = self.db_column_names["mmsi"]
+        time_column = self.db_column_names["last_updated"]
+        rows = []
+        # sorted, so that the rows of consecutive chunks stay sorted by MMSI
+        mmsis = sorted({int(mmsi) for mmsi in mmsis})
+        # string timestamps are day first, the period is only filtered by the database for epoch timestamps
+        period, period_parameters = "", ()
+        if self._epoch_timestamps:
+            period = f"AND {time_column} >= ? AND {time_column} <= ?"
+            period_parameters = (self._db_timestamp(time_start), self._db_timestamp(time_end))
+        # stays below the limit of SQLite host parameters
+        for chunk in range(0, len(mmsis), 500):
+            batch = mmsis[chunk:chunk + 500]
+            query = f"""
+                SELECT {mmsi_column}, {self.db_column_names["lon"]}, {self.db_column_names["lat"]}, {time_column}
+                FROM AisHistory
+                WHERE {mmsi_column} IN ({', '.join('?' for _ in batch)}) {period}
+                ORDER BY {mmsi_column}, {time_column}
+                """
+            try:
+                rows += self._db.execute(query, (*batch, *period_parameters)).fetchall()
+            except sqlite3.Error as error:
+                raise ValueError(f"Unable to perform a query \n{error}") from None
+        rows = [row for row in rows if row[1] is not None and row[2] is not None]
+        mmsi = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        lon = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        lat = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+        if self._epoch_timestamps:
+            times = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+        else:
+            # string timestamps are neither compared nor ordered chronologically by the database
+            times = np.fromiter((self._to_epoch(row[3]) for row in rows), dtype=np.float64, count=len(rows))
+            order = np.lexsort((times, mmsi))
+            order = order[(times[order] >= time_start.timestamp()) & (times[order] <= time_end.timestamp())]
+            mmsi, lon, lat, times = mmsi[order], lon[order], lat[order], times[order]
+        east, north = self._to_utm(lon, lat)
+        return AISTracks.from_sorted(mmsi, times, np.column_stack((east, north)), tolerance)
+
+    def get_vessels_in_area(self, area: BaseGeometry, time_start: datetime,
+                            time_end: datetime) -> list[tuple[int, float, float]]:
+        """
+        Finds the vessels that were inside an area during a period, with their entry and exit times.
+        Candidate vessels are found from a time-bucketed grid index of the history, see AISAreaIndex,
+        and only their reports are tested against the area.
+
+        :param BaseGeometry area: area in UTM coordinates, e.g. the geometry of a layer or a drawn polygon
+        :param datetime time_start: start of the period
+        :param datetime time_end: end of the period
+        :return: list of visits with format (mmsi, entry time, exit time), times as epoch seconds of the
+            first and last reports inside the area
+        :rtype: list[tuple[int, float, float]]
+        """
+        if self._area_index is None:
+            settings = self.scope.settings["enc"]["ais"].get("area_index", {})
+            self._area_index = AISAreaIndex(self._db, self.db_column_names, self._to_utm, self._to_epoch,
+                                            settings.get("cell_size", 1000.0), settings.get("bucket", 3600))
+        candidates = self._area_index.candidates(area, time_start.timestamp(), time_end.timestamp())
+        if not len(candidates):
+            return []
+        return area_visits(self.get_tracks(candidates.tolist(), time_start, time_end), area)
+
+    def _to_utm(self, lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param lon: longitudes (or eastings, depending on 'coords_type') as stored in the database
+        :param lat: latitudes (or northings, depending on 'coords_type') as stored in the database
+        :return: tuple of UTM eastings and northings
+        """
+        if self.scope.settings["enc"]["ais"]["coords_type"] == "lonlat":
+            return self.scope.extent.convert_lat_lon_array_to_utm(lat, lon)
+        return lon, lat
+
+    def _ensure_track_index(self) -> None:
+        """
+        Creates the (mmsi, last_updated) index serving trajectory queries, once per connection.
+        Positions are included in the index, so that trajectories are read from it alone instead of
+        from table rows scattered across the whole history.
+        """
+        if self._track_index_ready:
+            return
+        self._track_index_ready = True
+        mmsi_column = self.db_column_names["mmsi"]
+        time_column = self.db_column_names["last_updated"]
+        try:
+            with self._db:
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS AisHistory_{mmsi_column}_{time_column} "
+                                 f"ON AisHistory ({mmsi_column}, {time_column}, "
+                                 f"{self.db_column_names['lon']}, {self.db_column_names['lat']})")
+        except sqlite3.Error as error:
+            print(f"WARNING: Unable to create the trajectory index, tracks are queried without it \n{error}")
+
+    def _build_fleet(self, ships: list[tuple]) -> AISFleet:
+        """
+        Gathers the state of the rendered ships into columnar arrays for dead reckoning
+
+        :param ships: rendered ships with format (mmsi, east, north, heading, color, scale)
+        :return: AISFleet object
+        """
+        by_mmsi = {ship.mmsi: ship for ship in self.ships_info}
+        rows = [by_mmsi[ship[0]] for ship in ships]
+        return AISFleet.from_tracks(rows, [ship[1] for ship in ships], [ship[2] for ship in ships],
+                                    [self._to_epoch(row.last_updated) for row in rows])
+
+    @staticmethod
+    def _to_epoch(last_updated) -> float:
+        if isinstance(last_updated, str):
+            try:
+                return datetime.strptime(last_updated, "%d-%m-%Y %H:%M:%S").timestamp()
+            except ValueError:
+                return float("nan")
+        try:
+            return float(last_updated)
+        except (TypeError, ValueError):
+            return float("nan")
+
+    def _resolve_timestamp(self,timestamp:datetime) -> tuple[str,str] | tuple[int,int]:
         """
         Find date a period (from config) before the given timestamp, the month is treated as 30 days, the year is treated as 365 days
 
         :param datetime timestamp: timestamp base from which the other date will be found, use hour period if not given in config
-        :return: tuple of resolved dates
-        :rtype: tuple[datetime,datetime]
+        :return: tuple of resolved dates, as epoch seconds if 'timestamp_format' is 'epoch'
+        :rtype: tuple[str,str] | tuple[int,int]
         """
-        time_end = timestamp.strftime("%d-%m-%Y %H:%M:%S")
-        
         match self.scope.settings["enc"]["time"]["period"]:
             case "hour":
-                time_start = (timestamp - timedelta(hours=1)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(hours=1)
             case "day":
-                time_start = (timestamp - timedelta(days=1)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(days=1)
             case "week":
-                time_start = (timestamp - timedelta(weeks=1)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(weeks=1)
             case "month":
-                time_start = (timestamp - timedelta(days=30)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(days=30)
             case "year":
-                time_start = (timestamp - timedelta(days=365)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(days=365)
             case _:
-                time_start = (timestamp - timedelta(hours=1)).strftime("%d-%m-%Y %H:%M:%S")
+                time_start = timestamp - timedelta(hours=1)
 
-        return time_start,time_end
+        return self._db_timestamp(time_start), self._db_timestamp(timestamp)
+
+    def _db_timestamp(self, timestamp: datetime) -> str | int:
+        """
+        :param datetime timestamp: timestamp to be compared with the database column
+        :return: timestamp as epoch seconds if 'timestamp_format' is 'epoch', as a string otherwise
+        """
+        if self._epoch_timestamps:
+            return int(timestamp.timestamp())
+        return timestamp.strftime("%d-%m-%Y %H:%M:%S")
     
     def append_custom_column_names(self):
         columns = self.scope.settings["enc"]["ais"].get("db_fields")
@@ -0,0 +1,110 @@
+"""
+Contains the AISDeadReckoning class extrapolating vessel positions between AIS reports.
+"""
+import numpy as np
+
+from seacharts.core.aisFleet import AISFleet
+
+_KNOTS = 1852 / 3600  # metres per second
+# rate of turn decoded by pyais when no turn information is available
+_TURN_NOT_AVAILABLE = -128.0
+# rate of turn decoded by pyais for vessels turning faster than 10 degrees per minute without a turn indicator
+_TURN_NO_INDICATOR = 127.0
+# rate of turn assumed for those vessels, the lowest rate they can be turning at
+_NOMINAL_TURN = 10.0
+# rates of turn above this magnitude are implausible for extrapolation, e.g. 709 decoded from the raw value 126
+_MAX_TURN = 60.0
+
+
+def rate_of_turn(turn: np.ndarray) -> np.ndarray:
+    """
+    Cleans rates of turn as decoded by pyais, which are already in degrees per minute.
+
+    :param turn: decoded rate of turn, NaN and -128 (not available) are treated as no turn,
+        +-127 (turning without turn indicator) as turning at 10 degrees per minute
+    :return: rate of turn in degrees per minute, clockwise, clamped to 60 degrees per minute
+    """
+    turn = np.nan_to_num(np.asarray(turn, dtype=np.float64))
+    turn[turn == _TURN_NOT_AVAILABLE] = 0.0
+    no_indicator = np.abs(turn) == _TURN_NO_INDICATOR
+    turn[no_indicator] = np.sign(turn[no_indicator]) * _NOMINAL_TURN
+    return np.clip(turn, -_MAX_TURN, _MAX_TURN)
+
+
+def project_positions(east: np.ndarray, north: np.ndarray, speed: np.ndarray, course: np.ndarray,
+                      turn: np.ndarray, elapsed: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Moves vessels from their reported position along a straight line, or along a circular arc when
+    they report a rate of turn.
+
+    :param east: UTM eastings at report time
+    :param north: UTM northings at report time
+    :param speed: speed over ground in knots, NaN or 102.3 (not available) keeps the vessel still
+    :param course: course over ground in degrees, NaN or 360 (not available) keeps the vessel still
+    :param turn: rate of turn in degrees per minute
+    :param elapsed: time since the report in seconds
+    :return: tuple of projected eastings, northings and courses
+    """
+    valid = (speed < 102.2) & (course < 360)
+    velocity = np.where(valid, speed * _KNOTS, 0.0)
+    course = np.where(valid, course, 0.0)
+    start = np.radians(course)
+    omega = np.radians(turn / 60)
+    swept = omega * elapsed
+    turning = np.abs(swept) > 1e-6
+    safe_omega = np.where(turning, omega, 1.0)
+    end = start + swept
+    distance = velocity * elapsed
+    d_east = np.where(turning, velocity / safe_omega * (np.cos(start) - np.cos(end)), distance * np.sin(start))
+    d_north = np.where(turning, velocity / safe_omega * (np.sin(end) - np.sin(start)), distance * np.cos(start))
+    return east + d_east, north + d_north, np.degrees(end) % 360
+
+
+class AISDeadReckoning:
+    """
+    Vectorized dead reckoning of a fleet: every vessel is moved from its last report using its speed,
+    course and rate of turn, so intermediate frames can be rendered between snapshots (live) or between
+    queried timestamps (database) without new data. Extrapolation is clamped to 'horizon' seconds,
+    vessels with older reports stay where they were at the horizon.
+
+    :param horizon: maximum extrapolation time in seconds
+    """
+    def __init__(self, horizon: float = 60.0):
+        self.horizon = horizon
+
+    def project(self, fleet: AISFleet, now: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param fleet: vessels with their last reported state
+        :param now: epoch time of the frame to be rendered
+        :return: tuple of projected eastings, northings and headings (511 if not available)
+        """
+        elapsed = np.clip(now - np.nan_to_num(fleet["last_updated"], nan=now), 0.0, self.horizon)
+        speed = np.nan_to_num(fleet["speed"].astype(np.float64), nan=102.3)
+        course = np.nan_to_num(fleet["course"].astype(np.float64), nan=360.0)
+        turn = rate_of_turn(fleet["turn"])
+        east, north, _ = project_positions(fleet["east"], fleet["north"], speed, course, turn, elapsed)
+        heading = np.nan_to_num(fleet["heading"].astype(np.float64), nan=511.0)
+        known = heading < 360
+        heading[known] = (heading[known] + turn[known] * elapsed[known] / 60) % 360
+        heading[~known] = 511
+        return east, north, heading
+
+    def apply(self, ships: list[tuple], fleet: AISFleet, now: float) -> list[tuple]:
+        """
+        Replaces the positions and headings of ships by their dead-reckoned ones.
+
+        :param ships: ships with format (mmsi, east, north, heading, color, scale)
+        :param fleet: last reported state of the ships
+        :param now: epoch time of the frame to be rendered
+        :return: ships with format (mmsi, east, north, heading, color, scale)
+        """
+        if not len(fleet):
+            return ships
+        east, north, heading = self.project(fleet, now)
+        positions = dict(zip(fleet["mmsi"].tolist(), zip(east.astype(int).tolist(), north.astype(int).tolist(),
+                                                         heading.tolist())))
+        projected = []
+        for ship in ships:
+            position = positions.get(ship[0])
+            projected.append(ship if position is None else (ship[0], *position, *ship[4:]))
+        return projected
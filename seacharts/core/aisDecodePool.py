@@ -0,0 +1,244 @@
+"""
+Contains the AISDecodePool class for decoding high-rate live AIS streams on several processes.
+"""
+import dataclasses
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+from pyais import AISTrack, decode
+from pyais.exceptions import AISBaseException
+
+from seacharts.core.aisStream import AISRawMessage
+
+
+# AISTrack fields in declaration order, track updates are sent back as plain tuples as
+# they are much cheaper to pickle than dataclass instances
+TRACK_FIELDS = tuple(field.name for field in dataclasses.fields(AISTrack))
+
+
+def decode_batch(batch: list[tuple[tuple[bytes, ...], float]]) -> tuple[list[tuple], int, float]:
+    """
+    Decodes a batch of raw AIS messages into tracker updates. Executed by the worker processes.
+
+    :param batch: list of (raw sentences, receive epoch time) pairs, one per AIS message
+    :return: tuple of decoded track updates (AISTrack field values), number of messages that failed to decode
+        and decoding time in seconds
+    """
+    start = time.perf_counter()
+    rows = []
+    errors = 0
+    for lines, received_at in batch:
+        try:
+            msg = decode(*lines)
+        except (AISBaseException, ValueError):
+            errors += 1
+            continue
+        rows.append(tuple(received_at if name == "last_updated" else getattr(msg, name, None)
+                          for name in TRACK_FIELDS))
+    return rows, errors, time.perf_counter() - start
+
+
+class AISDecodePool:
+    """
+    Pool of decoder processes for live AIS messages.
+
+    Reader threads split the streams into raw messages and submit them to the pool, which
+    groups them into batches sent to the worker processes through pipes. Decoded track
+    updates are handed, in submission order, to a merge callback running in the parent process.
+    Splitting sentences is cheap compared to decoding, so it stays on the reader threads of
+    AISLiveParser rather than in a separate reader process.
+
+    If the worker processes die (e.g. killed by the OS), the failed batch and all later ones are
+    decoded inline by the pool threads, failures being counted as 'decode_pool_failures'.
+
+    :param workers: number of decoder processes
+    :param batch_size: maximum number of messages sent to a worker at once
+    :param flush_interval: maximum time in seconds a message waits for its batch to fill up
+    :param metrics: optional AISMetrics receiving decode counts and times
+    """
+    def __init__(self, workers: int, batch_size: int = 500, flush_interval: float = 0.2, metrics=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.decoded = 0
+        self.errors = 0
+        self.failures = 0
+        self._broken = False
+        self._closed = False
+        self._messages: queue.Queue = queue.Queue(maxsize=batch_size * workers * 8)
+        self._pending: queue.Queue = queue.Queue(maxsize=workers * 2)
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self._merge = None
+        self._metrics = metrics
+
+    def start(self, merge: Callable[[list[AISTrack]], None]) -> None:
+        """
+        Start dispatching batches to the decoder processes.
+
+        :param merge: callback receiving every list of decoded track updates
+        :return: None
+        """
+        self._merge = merge
+        threading.Thread(target=self._dispatch, daemon=True).start()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def submit(self, message: AISRawMessage) -> None:
+        """
+        Queue a single raw AIS message for decoding, blocking when the pool falls behind.
+
+        :param message: assembled AIS message
+        :return: None
+        """
+        self._messages.put((message.lines, message.received_at))
+
+    def warm_up(self) -> None:
+        """
+        Start all decoder processes ahead of the first batch.
+
+        :return: None
+        """
+        for future in [self._executor.submit(decode_batch, []) for _ in range(self.workers)]:
+            future.result()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        :return: number of messages waiting to be dispatched, plus those of the batches being decoded
+        """
+        return self._messages.qsize() + self._pending.qsize() * self.batch_size
+
+    def shutdown(self) -> None:
+        self._closed = self._broken = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = [self._messages.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._messages.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            future = None
+            if not self._broken:
+                try:
+                    future = self._executor.submit(decode_batch, batch)
+                except RuntimeError as e:
+                    # BrokenProcessPool, or the pool was shut down
+                    self._fail(e)
+            self._pending.put((batch, future))
+
+    def _collect(self) -> None:
+        while True:
+            batch, future = self._pending.get()
+            try:
+                rows, errors, elapsed = future.result() if future is not None else decode_batch(batch)
+            except Exception as e:
+                self._fail(e)
+                rows, errors, elapsed = decode_batch(batch)
+            self.decoded += len(rows)
+            self.errors += errors
+            if self._metrics is not None and rows:
+                self._metrics.increment("decoded", len(rows))
+                self._metrics.decode_time.record_many(np.full(len(rows) + errors, elapsed / (len(rows) + errors)))
+            self._merge([AISTrack(*values) for values in rows])
+
+    def _fail(self, error: Exception) -> None:
+        """
+        Count a failed batch and switch to inline decoding.
+
+        :param error: exception raised by the pool
+        :return: None
+        """
+        if self._closed:
+            return
+        self.failures += 1
+        if self._metrics is not None:
+            self._metrics.increment("decode_pool_failures")
+        if not self._broken:
+            self._broken = True
+            print(f"WARNING: AIS decode pool failed ({type(error).__name__}: {error}), decoding inline")
+
+
+def benchmark(lines: list[bytes], workers: list[int], batch_size: int = 500, port: int = 15631) -> dict[int, float]:
+    """
+    Measures live decoding throughput against a local replay server for several pool sizes.
+
+    The given sentences are served over a local TCP connection, read and assembled the same way
+    as by AISLiveParser, then decoded inline (0 workers) or by pools of the given sizes.
+
+    :param lines: raw NMEA sentences to be replayed
+    :param workers: list of decoder process counts to be measured, 0 meaning inline decoding
+    :param batch_size: number of messages per batch sent to a worker
+    :param port: local port of the replay server
+    :return: decoded messages per second, keyed by number of workers
+    """
+    import socket
+    from pyais.stream import TCPConnection
+    from seacharts.core.aisStream import AISSentenceAssembler
+
+    payload = b"\r\n".join(lines) + b"\r\n"
+    results = {}
+    for count in workers:
+        server = socket.create_server(("127.0.0.1", port), reuse_port=False)
+
+        def serve():
+            connection, _ = server.accept()
+            with connection:
+                connection.sendall(payload)
+            server.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+        assembler = AISSentenceAssembler()
+        messages = [m for m in (assembler.push(line, time.time())
+                                for line in TCPConnection("127.0.0.1", port=port).read()) if m is not None]
+
+        merged = 0
+
+        def merge(tracks):
+            nonlocal merged
+            merged += len(tracks)
+
+        if count == 0:
+            start = time.perf_counter()
+            rows, _, _ = decode_batch([(m.lines, m.received_at) for m in messages])
+            merge([AISTrack(*values) for values in rows])
+        else:
+            pool = AISDecodePool(count, batch_size)
+            pool.warm_up()
+            start = time.perf_counter()
+            pool.start(merge)
+            for message in messages:
+                pool.submit(message)
+            while pool.decoded + pool.errors < len(messages):
+                time.sleep(0.01)
+            pool.shutdown()
+        elapsed = time.perf_counter() - start
+        results[count] = merged / elapsed
+        print(f"{count} workers: {len(messages)} messages, {results[count]:.0f} msg/s")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    from pyais import encode_dict
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as nmea_file:
+            sample = [line.strip() for line in nmea_file if line.strip()]
+    else:
+        sample = []
+        for i in range(200_000):
+            sample += [s.encode() for s in encode_dict({"msg_type": 1, "mmsi": 200000000 + i % 5000,
+                                                        "lon": 10 + i % 100 * 0.01, "lat": 60.0,
+                                                        "speed": 10.0, "course": 90.0})]
+    benchmark(sample, [0, 1, 2, 4, 8])
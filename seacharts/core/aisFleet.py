@@ -0,0 +1,79 @@
+"""
+Contains the AISFleet class holding the tracked vessels of a snapshot as columnar NumPy arrays.
+"""
+from numbers import Number
+
+import numpy as np
+from pyais import AISTrack
+
+from seacharts.core.aisShipData import AISShipData
+
+# Columns of a fleet with their data types, missing values are NaN for floats and -1 for integers
+FLEET_FIELDS = (
+    ("mmsi", np.int64),
+    ("lon", np.float64),
+    ("lat", np.float64),
+    ("east", np.float64),
+    ("north", np.float64),
+    ("speed", np.float32),
+    ("course", np.float32),
+    ("heading", np.float32),
+    ("turn", np.float32),
+    ("last_updated", np.float64),
+    ("ship_type", np.int16),
+    ("to_bow", np.int16),
+    ("to_stern", np.int16),
+    ("to_port", np.int16),
+    ("to_starboard", np.int16),
+)
+
+
+class AISFleet:
+    """
+    Columnar view of a set of vessels: one NumPy array per field of FLEET_FIELDS, all of the same length.
+
+    :param columns: dict of arrays keyed by field name
+    """
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["mmsi"])
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    @classmethod
+    def empty(cls, size: int = 0) -> "AISFleet":
+        return cls({field: np.empty(size, dtype=dtype) for field, dtype in FLEET_FIELDS})
+
+    @classmethod
+    def from_tracks(cls, tracks: list[AISTrack | AISShipData], eastings: np.ndarray, northings: np.ndarray,
+                    last_updated: list[float] | None = None) -> "AISFleet":
+        """
+        Builds a fleet from tracked vessels (or vessels read from the database) and their projected positions.
+
+        :param tracks: tracks of the vessels
+        :param eastings: UTM eastings of the vessels
+        :param northings: UTM northings of the vessels
+        :param last_updated: epoch times of the last reports, taken from the tracks if not given
+        :return: AISFleet object
+        """
+        columns = {"east": np.asarray(eastings, dtype=np.float64), "north": np.asarray(northings, dtype=np.float64)}
+        if last_updated is not None:
+            columns["last_updated"] = np.asarray(last_updated, dtype=np.float64)
+        for field, dtype in FLEET_FIELDS:
+            if field in columns:
+                continue
+            missing = np.nan if np.issubdtype(dtype, np.floating) else -1
+            values = [getattr(track, field, None) for track in tracks]
+            columns[field] = np.fromiter((value if isinstance(value, Number) and value == value else missing
+                                          for value in values), dtype=dtype, count=len(values))
+        return cls(columns)
+
+    def select(self, mask: np.ndarray) -> "AISFleet":
+        """
+        :param mask: boolean mask or indices of the vessels to keep
+        :return: new fleet holding the selected vessels
+        """
+        return AISFleet({field: values[mask] for field, values in self.columns.items()})
@@ -0,0 +1,71 @@
+"""
+Contains functions interpolating vessel positions between two database snapshots.
+"""
+import numpy as np
+
+from seacharts.core.aisFleet import AISFleet
+
+
+def interpolate_headings(previous: np.ndarray, following: np.ndarray, fraction: np.ndarray) -> np.ndarray:
+    """
+    Interpolates headings along the shortest turn, e.g. from 350 to 10 degrees through 0.
+
+    :param previous: headings of the earlier reports, 511 (or more than 360) if not available
+    :param following: headings of the later reports, 511 (or more than 360) if not available
+    :param fraction: position of the interpolated time between the two reports, from 0 to 1
+    :return: interpolated headings, the known one if only one is available, 511 if none is
+    """
+    previous = np.nan_to_num(np.asarray(previous, dtype=np.float64), nan=511.0)
+    following = np.nan_to_num(np.asarray(following, dtype=np.float64), nan=511.0)
+    known_previous = previous < 360
+    known_following = following < 360
+    turn = (following - previous + 180) % 360 - 180
+    heading = np.where(known_previous & known_following, (previous + fraction * turn) % 360,
+                       np.where(known_previous, previous, following))
+    heading[~known_previous & ~known_following] = 511
+    return heading
+
+
+def interpolate_fleets(previous: AISFleet, following: AISFleet, now: float, time_start: float,
+                       time_end: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Linearly interpolates the vessels of two snapshots at an intermediate time.
+
+    Vessels present in both snapshots are matched by MMSI and moved between their two reports,
+    using the report times when known and the snapshot times otherwise. Vessels only present in
+    the earlier snapshot are kept until the later snapshot time, vessels only present in the later
+    one appear from their report time (or halfway between the snapshots if it is unknown).
+
+    :param previous: vessels of the earlier snapshot
+    :param following: vessels of the later snapshot
+    :param now: epoch time to interpolate at
+    :param time_start: epoch time of the earlier snapshot
+    :param time_end: epoch time of the later snapshot
+    :return: tuple of indices of the interpolated vessels in the concatenation of both snapshots
+        (the later one offset by the length of the earlier one), eastings, northings and headings
+    """
+    _, first, second = np.intersect1d(previous["mmsi"], following["mmsi"], return_indices=True)
+    reported_start = np.nan_to_num(previous["last_updated"][first], nan=time_start)
+    reported_end = np.nan_to_num(following["last_updated"][second], nan=time_end)
+    span = reported_end - reported_start
+    fraction = np.clip((now - reported_start) / np.where(span > 0, span, 1.0), 0.0, 1.0)
+    east = previous["east"][first] + fraction * (following["east"][second] - previous["east"][first])
+    north = previous["north"][first] + fraction * (following["north"][second] - previous["north"][first])
+    heading = interpolate_headings(previous["heading"][first], following["heading"][second], fraction)
+
+    only_previous = np.ones(len(previous), dtype=bool)
+    only_previous[first] = False
+    if now >= time_end:
+        only_previous[:] = False
+    only_previous = np.flatnonzero(only_previous)
+    only_following = np.ones(len(following), dtype=bool)
+    only_following[second] = False
+    appearance = np.nan_to_num(following["last_updated"], nan=(time_start + time_end) / 2)
+    only_following = np.flatnonzero(only_following & (appearance <= now))
+
+    indices = np.concatenate((second + len(previous), only_previous, only_following + len(previous)))
+    east = np.concatenate((east, previous["east"][only_previous], following["east"][only_following]))
+    north = np.concatenate((north, previous["north"][only_previous], following["north"][only_following]))
+    heading = np.concatenate((heading, interpolate_headings(previous["heading"][only_previous], 511, 0),
+                              interpolate_headings(following["heading"][only_following], 511, 0)))
+    return indices, east, north, heading
@@ -1,20 +1,36 @@
 from seacharts.core import AISParser, Scope
 from seacharts.core.aisShipData import AISShipData
+from seacharts.core.aisStream import AISSource, AISSourceStats, AISSentenceAssembler, AISDeduplicator, AISRawMessage, \
+    VESSEL_MESSAGE_TYPES
+from seacharts.core.aisDecodePool import AISDecodePool
+from seacharts.core.aisRecorder import AISRecorder
+from seacharts.core.aisMetrics import AISMetrics
+from seacharts.core.aisStaticCache import AISStaticCache
+from seacharts.core.aisTracker import AISLiveTracker
+from seacharts.core.aisFleet import AISFleet
+from seacharts.core.aisSharedMemory import AISSharedFleetPublisher
+from seacharts.core.aisDeadReckoning import AISDeadReckoning
 from pyais.stream import TCPConnection
-from pyais import AISTracker, AISTrack
+from pyais.exceptions import AISBaseException
+from pyais import AISTracker, AISTrack, decode
+from pyais.tracker import AISTrackEvent
 import threading
+import time
 from datetime import datetime
 
 class AISLiveParser(AISParser):
     """
-    Class for parsing AIS data from live stream
+    Class for parsing AIS data from live stream(s)
 
+    Several overlapping sources can be configured, each one is read by its own thread and
+    messages already received from another source are dropped before decoding. For high-rate
+    feeds, decoding can be moved to a pool of worker processes with 'decode_workers'.
     """
     def __init__(self, scope: Scope):
         self.scope = scope
-        self.host = self.scope.settings["enc"]["ais"]["address"]
-        self.port = self.scope.settings["enc"]["ais"]["port"]
-        self.interval = self.scope.settings["enc"]["ais"]["interval"]
+        settings = self.scope.settings["enc"]["ais"]
+        self.sources = self._resolve_sources(settings)
+        self.interval = settings["interval"]
         self.clear_threshold = {
             "hour": 3600,
             "day": 86400,
@@ -23,10 +39,47 @@ class AISLiveParser(AISParser):
             "year": 31536000
         }
         self.ships_info = []
-        self.ships_list_lock = threading.Lock()
+        metrics_settings = settings.get("metrics") or {}
+        self.metrics = AISMetrics(metrics_settings.get("interval", 1), metrics_settings.get("dump", False),
+                                  metrics_settings.get("file"))
+        self.ships_list_lock = self.metrics.timed_lock()
+        self.tracker_lock = threading.Lock()
+        self.source_stats = {source.name: AISSourceStats() for source in self.sources}
+        self.deduplicator = AISDeduplicator(window=settings.get("dedup_window", 30))
+        self.message_types = settings.get("message_types", VESSEL_MESSAGE_TYPES)
+        self.decode_pool = None
+        if settings.get("decode_workers"):
+            self.decode_pool = AISDecodePool(settings["decode_workers"], settings.get("decode_batch_size", 500),
+                                             metrics=self.metrics)
+        self.recorder = None
+        if settings.get("recorder"):
+            recorder_settings = settings["recorder"]
+            self.recorder = AISRecorder(recorder_settings["connection_string"], settings.get("db_fields"),
+                                        recorder_settings.get("flush_interval", 5.0),
+                                        recorder_settings.get("batch_size", 10000))
         self.ttl_value = self.clear_threshold[self.scope.time.period]*self.scope.time.period_mult
-        self.ais = AISTracker(ttl_in_seconds=self.ttl_value)
+        self.max_vessels = settings.get("max_vessels")
+        self.fleet = AISFleet.empty()
+        self.dead_reckoning = None
+        if settings.get("dead_reckoning"):
+            self.dead_reckoning = AISDeadReckoning(settings["dead_reckoning"].get("horizon", 60))
+        self.fleet_publisher = None
+        if settings.get("shared_memory"):
+            shared_settings = settings["shared_memory"]
+            self.fleet_publisher = AISSharedFleetPublisher(shared_settings["name"],
+                                                           shared_settings.get("capacity", self.max_vessels or 65536))
+        self.ais = self._create_tracker()
+        self.ais.register_callback(AISTrackEvent.DELETED, self._on_track_deleted)
+        self.static_cache = None
+        if settings.get("static_cache"):
+            cache_settings = settings["static_cache"]
+            self.static_cache = AISStaticCache(cache_settings["path"], cache_settings.get("flush_interval", 30),
+                                               cache_settings.get("max_age", 90))
+            self.ais.register_callback(AISTrackEvent.CREATED, self.static_cache.apply)
+            self.ais.register_callback(AISTrackEvent.UPDATED, self.static_cache.observe)
+        self._register_metrics()
         threading.Thread(target=self.start_stream_listen, daemon=True).start()
+        self.metrics.start()
 
 
         if self.scope.settings["enc"]["ais"].get("dynamic_scale") == True:
@@ -35,47 +88,257 @@ class AISLiveParser(AISParser):
             self._dynamic_scale = False
         self._user_scale = 1.0 if self.scope.settings["enc"]["ais"].get("scale") is None else self.scope.settings["enc"]["ais"]["scale"]
 
+    def _create_tracker(self) -> AISLiveTracker:
+        """
+        Create the tracker holding the received vessels, expiring them after the configured time period
+        and keeping at most 'max_vessels' of them
+
+        :return: AISLiveTracker object
+        """
+        return AISLiveTracker(self.ttl_value, self.max_vessels)
+
+    def _register_metrics(self) -> None:
+        """
+        Expose the per-source counters, the tracker size and the queue depths through the metrics
+
+        :return: None
+        """
+        stats = self.source_stats.values
+        self.metrics.register_counter("received", lambda: sum(s.received for s in stats()))
+        self.metrics.register_counter("filtered", lambda: sum(s.filtered for s in stats()))
+        self.metrics.register_counter("duplicates", lambda: sum(s.duplicates for s in stats()))
+        self.metrics.register_counter("errors", lambda: sum(s.errors for s in stats())
+                                      + (self.decode_pool.errors if self.decode_pool is not None else 0))
+        self.metrics.register_counter("evicted_ttl", lambda: self.ais.evicted_ttl)
+        self.metrics.register_counter("evicted_cap", lambda: self.ais.evicted_cap)
+        self.metrics.register_gauge("tracked", lambda: len(self.ais))
+        if self.decode_pool is not None:
+            self.metrics.register_gauge("decode_queue", lambda: self.decode_pool.queue_depth)
+        if self.recorder is not None:
+            self.metrics.register_gauge("recorder_pending", lambda: self.recorder.pending)
+        if self.static_cache is not None:
+            self.metrics.register_counter("static_cache_hits", lambda: self.static_cache.hits)
+            self.metrics.register_gauge("static_cache_size", lambda: len(self.static_cache))
+
+    def _on_track_deleted(self, track: AISTrack) -> None:
+        self.metrics.forget(track.mmsi)
+
+    def _now(self) -> float:
+        """
+        :return: current epoch time of the tracked data
+        """
+        return time.time()
+
+    @staticmethod
+    def _resolve_sources(settings: dict) -> list[AISSource]:
+        """
+        Collects the live sources from the 'address'/'port' pair and the 'sources' list of config.yaml
+
+        :param settings: AIS settings from config.yaml
+        :return: list of unique AIS sources
+        :raises ValueError: if no source is configured
+        """
+        sources = []
+        if settings.get("address") is not None:
+            sources.append(AISSource(settings["address"], settings["port"]))
+        for source in settings.get("sources", []):
+            sources.append(AISSource(source["address"], source["port"]))
+        sources = list(dict.fromkeys(sources))
+        if not sources:
+            raise ValueError("AIS live module requires 'address' and 'port' or a list of 'sources' in config")
+        return sources
+
     def get_ships(self) -> list[tuple]:
         """
         Retrieve list of ships received from AIS stream
 
-        :return: list of ships with format (mmsi, lon, lat, heading, color)
+        :return: list of ships with format (mmsi, lon, lat, heading, color), dead-reckoned to the current time if configured
         :rtype: list[tuple]
         """
         ship_list = self.read_ships()
+        if self.dead_reckoning is not None:
+            with self.ships_list_lock:
+                fleet = self.fleet
+            ship_list = self.dead_reckoning.apply(ship_list, fleet, self._now())
         return ship_list
 
     def start_stream_listen(self)->None:
         """
-        Start listening to AIS stream using AIS Tracker based on connection setting from config.yaml
+        Start listening to all AIS streams using AIS Tracker based on connection settings from config.yaml
 
         :return: None
         """
-        print(f"Listening to stream {self.host}:{self.port}")
         with self.ais as tracker:
             t = threading.Timer(self.interval, self.get_current_data, [tracker])
             t.start()
-            for msg in TCPConnection(self.host,port=self.port):
-                tracker.update(msg)
-    
+            if self.decode_pool is not None:
+                self.decode_pool.start(lambda tracks: self._merge_tracks(tracker, tracks))
+            listeners = [threading.Thread(target=self._listen_source, args=[tracker, source], daemon=True)
+                         for source in self.sources]
+            for listener in listeners:
+                listener.start()
+            for listener in listeners:
+                listener.join()
+
+    def _listen_source(self, tracker: AISTracker, source: AISSource) -> None:
+        """
+        Read a single AIS stream, dropping messages already received from any source
+
+        :param tracker: AISTracker object shared by all sources
+        :param source: AIS source to be read
+        :return: None
+        """
+        print(f"Listening to stream {source.name}")
+        stats = self.source_stats[source.name]
+        assembler = AISSentenceAssembler(self.message_types)
+        try:
+            for line in TCPConnection(source.host, port=source.port).read():
+                message = assembler.push(line, time.time())
+                if message is None:
+                    stats.filtered = assembler.filtered
+                    continue
+                stats.received += 1
+                if self.deduplicator.is_duplicate(message):
+                    stats.duplicates += 1
+                    continue
+                self.metrics.observe_report(message)
+                if self.decode_pool is not None:
+                    self.decode_pool.submit(message)
+                else:
+                    self._ingest(tracker, message, stats)
+        except OSError as e:
+            print(f"WARNING: AIS stream {source.name} closed: {e}")
+
+    def _ingest(self, tracker: AISTracker, message: AISRawMessage, stats: AISSourceStats) -> None:
+        """
+        Decode a single AIS message and update the tracker with it
+
+        :param tracker: AISTracker object
+        :param message: assembled AIS message
+        :param stats: counters of the source the message was received from
+        :return: None
+        """
+        start = time.perf_counter()
+        try:
+            decoded = decode(*message.lines)
+        except (AISBaseException, ValueError):
+            stats.errors += 1
+            return
+        self.metrics.decode_time.record(time.perf_counter() - start)
+        self.metrics.increment("decoded")
+        with self.tracker_lock:
+            try:
+                tracker.update(decoded, message.received_at)
+            except ValueError:
+                # report older than the one already tracked, received late from a slower source
+                return
+            if self.recorder is not None and getattr(decoded, "lat", None) is not None:
+                self._record(tracker, decoded.mmsi)
+
+    def _merge_tracks(self, tracker: AISTracker, tracks: list[AISTrack]) -> None:
+        """
+        Merge a batch of track updates decoded by the decode pool into the tracker
+
+        :param tracker: AISTracker object
+        :param tracks: decoded track updates in order of reception
+        :return: None
+        """
+        with self.tracker_lock:
+            for track in tracks:
+                try:
+                    tracker.insert_or_update(track.mmsi, track)
+                except ValueError:
+                    continue
+                if self.recorder is not None and track.lat is not None:
+                    self._record(tracker, track.mmsi)
+            tracker.cleanup()
+
+    def _record(self, tracker: AISTracker, mmsi: int) -> None:
+        """
+        Record the current track of a vessel, unless it was evicted by the vessel cap as soon as it was inserted
+
+        :param tracker: AISTracker object
+        :param mmsi: MMSI of the updated vessel
+        :return: None
+        """
+        track = tracker.get_track(mmsi)
+        if track is not None:
+            self.recorder.record(track)
+
+    def get_source_stats(self) -> dict[str, dict]:
+        """
+        Retrieve message counters of every configured source
+
+        :return: dict of counters (received, filtered, filtered_ratio, duplicates, errors) keyed by source 'address:port'
+        :rtype: dict[str, dict]
+        """
+        return {name: stats.as_dict() for name, stats in self.source_stats.items()}
+
     def get_current_data(self, tracker: AISTracker) -> None:
         """
-        Append newest data to ships_info list and start timer for next data retrieval
+        Append newest data to ships_info list and start timer for next data retrieval.
 
         :param tracker: AISTracker object
         :return: None
         """
-        with self.ships_list_lock:
-            self.ships_info.clear()
-            for ship in tracker.tracks:
-                aisship = AISLiveShipData(ship)
-                if aisship.lat is not None and aisship.lon is not None:
-                    lon,lat = self.convert_to_utm(float(aisship.lon), float(aisship.lat))
-                    if self.scope.extent.is_in_bounding_box(lon,lat):
-                        self.ships_info.append(aisship)
+        self._snapshot(tracker)
         timer = threading.Timer(self.interval, self.get_current_data, [tracker])
         timer.start()
 
+    def _snapshot(self, tracker: AISTracker) -> None:
+        """
+        Replace ships_info and fleet with the tracked vessels inside the chart, and publish the fleet to
+        shared memory if configured.
+        Vessels outside of the geographic envelope of the chart are rejected before projection,
+        the remaining ones are projected to UTM at once and keep the result for rendering.
+
+        :param tracker: AISTracker object
+        :return: None
+        """
+        with self.tracker_lock:
+            # expire vessels even when the stream is quiet
+            tracker.cleanup()
+            tracks = tracker.tracks
+        self.metrics.observe_snapshot(tracks, self._now())
+        extent = self.scope.extent
+        candidates = [track for track in tracks if track.lat is not None and track.lon is not None
+                      and extent.is_in_geographic_bbox(track.lon, track.lat)]
+        eastings, northings = extent.convert_lat_lon_array_to_utm([track.lat for track in candidates],
+                                                                  [track.lon for track in candidates])
+        x_min, y_min, x_max, y_max = extent.bbox
+        inside = (eastings >= x_min) & (eastings <= x_max) & (northings >= y_min) & (northings <= y_max)
+        visible = [track for track, keep in zip(candidates, inside.tolist()) if keep]
+        fleet = AISFleet.from_tracks(visible, eastings[inside], northings[inside])
+        if self.fleet_publisher is not None:
+            self.fleet_publisher.publish(fleet, self._now())
+        ships_info = []
+        for track, east, north in zip(visible, fleet["east"].tolist(), fleet["north"].tolist()):
+            aisship = AISLiveShipData(track)
+            aisship.utm = (int(east), int(north))
+            ships_info.append(aisship)
+        with self.ships_list_lock:
+            self.ships_info = ships_info
+            self.fleet = fleet
+
+    def get_metrics(self) -> dict:
+        """
+        Retrieve ingest metrics: message counters and their per-second rates (received, filtered, duplicates,
+        errors, decoded, evicted_ttl, evicted_cap), gauges (tracked vessels, queue depths) and histograms in seconds
+        (decode_time, lag from AIS report to snapshot, ships_lock_hold, ships_lock_wait)
+
+        :return: dict of metrics
+        :rtype: dict
+        """
+        return self.metrics.as_dict()
+
+    def get_fleet(self) -> AISFleet:
+        """
+        Retrieve the vessels of the last snapshot as columnar arrays
+
+        :return: AISFleet object
+        """
+        return self.fleet
+
     def transform_ship(self, ship: AISShipData) -> tuple:
         """
         Transform ship data to format (mmsi, lon, lat, heading, color)
@@ -87,7 +350,7 @@ class AISLiveParser(AISParser):
         """
         try:
             mmsi = ship.mmsi
-            lon,lat = self.convert_to_utm(float(ship.lon), float(ship.lat))
+            lon,lat = ship.utm if ship.utm is not None else self.convert_to_utm(float(ship.lon), float(ship.lat))
             heading = float(ship.heading) if ship.heading != None else 511
             heading = heading if heading <= 360 else 511
             color = ship.color
@@ -124,4 +387,5 @@ class AISLiveShipData(AISShipData):
         self.to_starboard = aistrack.to_starboard
         self.destination = aistrack.destination
         self.ship_type = aistrack.ship_type
-        self.color = AISParser.color_resolver(aistrack.ship_type)
\ No newline at end of file
+        self.color = AISParser.color_resolver(aistrack.ship_type)
+        self.utm = None
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+Contains the AISMetrics class gathering ingest-side instrumentation of the live AIS modules.
+"""
+import bisect
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from seacharts.core.aisStream import AISRawMessage, payload_timestamp
+
+# Upper bounds in seconds of the histogram buckets, doubling from 1 microsecond to about 18 minutes
+HISTOGRAM_BUCKETS = tuple(1e-6 * 2 ** i for i in range(31))
+
+
+class AISHistogram:
+    """
+    Histogram of durations with fixed exponential buckets, cheap enough to be fed from ingest threads.
+    Quantiles are estimated by the upper bound of the bucket they fall in.
+    """
+    def __init__(self):
+        self._counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        index = bisect.bisect_left(HISTOGRAM_BUCKETS, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def record_many(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        counts = np.bincount(np.searchsorted(HISTOGRAM_BUCKETS, values), minlength=len(self._counts))
+        with self._lock:
+            for index, count in enumerate(counts.tolist()):
+                self._counts[index] += count
+            self.count += len(values)
+            self.total += float(np.sum(values))
+            self.max = max(self.max, float(np.max(values)))
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: quantile between 0 and 1
+        :return: upper bound of the bucket holding the quantile (at most the maximum), 0 if the histogram is empty
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return min(HISTOGRAM_BUCKETS[index], self.max) if index < len(HISTOGRAM_BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class TimedLock:
+    """
+    Lock recording the time spent waiting for it and holding it, used as a drop-in replacement
+    of threading.Lock in 'with' statements.
+
+    :param hold: histogram of holding times
+    :param wait: histogram of waiting times
+    """
+    def __init__(self, hold: AISHistogram, wait: AISHistogram):
+        self._lock = threading.Lock()
+        self._hold = hold
+        self._wait = wait
+        self._acquired_at = 0.0
+
+    def __enter__(self) -> "TimedLock":
+        start = time.perf_counter()
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        self._wait.record(self._acquired_at - start)
+        return self
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        self._hold.record(held)
+
+
+class AISMetrics:
+    """
+    Ingest-side instrumentation of the live AIS modules.
+
+    Counters (e.g. received, decoded, rejected messages) are turned into per-second rates over
+    the last sampling window, gauges (e.g. tracker size, queue depths) are read at sampling time
+    and histograms hold the decode time of single messages, the end-to-end lag from the AIS
+    report timestamp to the snapshot including it, and the time spent waiting for and holding
+    the ships list lock. Samples are optionally printed and/or appended to a JSON lines file.
+
+    :param interval: sampling window in seconds of the rates
+    :param dump: print a summary line at every sample
+    :param dump_file: path of a JSON lines file receiving every sample
+    """
+    def __init__(self, interval: float = 1.0, dump: bool = False, dump_file: str | None = None):
+        self.interval = interval
+        self.dump = dump
+        self.dump_file = Path(dump_file) if dump_file else None
+        self.decode_time = AISHistogram()
+        self.lag = AISHistogram()
+        self.lock_hold = AISHistogram()
+        self.lock_wait = AISHistogram()
+        self._counters: dict[str, int] = {}
+        self._derived_counters: dict[str, Callable[[], int]] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._report_times: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._sample = None
+        self._rates: dict[str, float] = {}
+        self._last_snapshot = None
+
+    def start(self) -> None:
+        """
+        Start periodic sampling of the rates.
+
+        :return: None
+        """
+        self._sample = (time.perf_counter(), self.counters())
+        timer = threading.Timer(self.interval, self._sample_rates)
+        timer.daemon = True
+        timer.start()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def register_counter(self, name: str, read: Callable[[], int]) -> None:
+        """
+        Register a counter maintained elsewhere (e.g. per-source message counters).
+
+        :param name: name of the counter
+        :param read: callable returning the current value of the counter
+        :return: None
+        """
+        self._derived_counters[name] = read
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """
+        Register a gauge read at sampling time (e.g. a queue depth).
+
+        :param name: name of the gauge
+        :param read: callable returning the current value of the gauge
+        :return: None
+        """
+        self._gauges[name] = read
+
+    def timed_lock(self) -> TimedLock:
+        return TimedLock(self.lock_hold, self.lock_wait)
+
+    def counters(self) -> dict[str, int]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters.update({name: read() for name, read in self._derived_counters.items()})
+        return counters
+
+    def observe_report(self, message: AISRawMessage) -> None:
+        """
+        Remember the report time of a received position report, from its UTC second and receive time.
+
+        :param message: assembled AIS message
+        :return: None
+        """
+        second = payload_timestamp(message.payload)
+        if second is None or second >= 60:
+            return
+        received = message.received_at
+        reported = received - received % 60 + second
+        if reported > received + 5:
+            # reported in the previous minute
+            reported -= 60
+        with self._lock:
+            self._report_times[message.mmsi] = reported
+
+    def forget(self, mmsi: int) -> None:
+        with self._lock:
+            self._report_times.pop(mmsi, None)
+
+    def observe_snapshot(self, tracks: list, now: float) -> None:
+        """
+        Record the end-to-end lag of the reports included for the first time in a snapshot.
+
+        :param tracks: tracks of the snapshot
+        :param now: epoch time of the snapshot
+        :return: None
+        """
+        previous, self._last_snapshot = self._last_snapshot, now
+        if previous is None:
+            return
+        with self._lock:
+            report_times = self._report_times
+            lags = [now - report_times.get(track.mmsi, track.last_updated) for track in tracks
+                    if track.last_updated > previous]
+        self.lag.record_many(np.asarray(lags, dtype=float))
+
+    def _sample_rates(self) -> None:
+        current = time.perf_counter()
+        counters = self.counters()
+        previous_time, previous = self._sample
+        elapsed = current - previous_time
+        self._rates = {name: (value - previous.get(name, 0)) / elapsed for name, value in counters.items()}
+        self._sample = (current, counters)
+        if self.dump or self.dump_file is not None:
+            self._dump()
+        timer = threading.Timer(self.interval, self._sample_rates)
+        timer.daemon = True
+        timer.start()
+
+    def as_dict(self) -> dict:
+        """
+        :return: dict of counters, per-second rates over the last sampling window, gauges and histogram summaries
+        """
+        return {
+            "time": time.time(),
+            "uptime": time.time() - self._started_at,
+            "counters": self.counters(),
+            "rates": dict(self._rates),
+            "gauges": {name: read() for name, read in self._gauges.items()},
+            "histograms": {
+                "decode_time": self.decode_time.as_dict(),
+                "lag": self.lag.as_dict(),
+                "ships_lock_hold": self.lock_hold.as_dict(),
+                "ships_lock_wait": self.lock_wait.as_dict(),
+            },
+        }
+
+    def _dump(self) -> None:
+        metrics = self.as_dict()
+        if self.dump:
+            rates = ", ".join(f"{name} {rate:.0f}/s" for name, rate in metrics["rates"].items())
+            gauges = ", ".join(f"{name} {value}" for name, value in metrics["gauges"].items())
+            lag = metrics["histograms"]["lag"]
+            decode = metrics["histograms"]["decode_time"]
+            print(f"AIS metrics: {rates}; {gauges}; lag p50 {lag['p50']:.2f} s p99 {lag['p99']:.2f} s; "
+                  f"decode p50 {decode['p50'] * 1e6:.0f} us p99 {decode['p99'] * 1e6:.0f} us")
+        if self.dump_file is not None:
+            try:
+                with open(self.dump_file, "a") as dump_file:
+                    dump_file.write(json.dumps(metrics) + "\n")
+            except OSError as e:
+                print(f"WARNING: Unable to write AIS metrics to {self.dump_file}: {e}")
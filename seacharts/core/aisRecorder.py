@@ -0,0 +1,183 @@
+"""
+Contains the AISRecorder class for persisting live AIS data into the AIS history database.
+"""
+import atexit
+import sqlite3
+import threading
+
+from pyais import AISTrack
+
+# Track fields stored for every recorded report, mapped to their default AisHistory column names
+DEFAULT_COLUMN_NAMES = {
+    "mmsi": "mmsi",
+    "lon": "longtitude",
+    "lat": "latitude",
+    "last_updated": "last_updated",
+    "speed": "speed",
+    "course": "course",
+    "heading": "heading",
+    "turn": "turn",
+    "status": "status",
+    "ship_type": "ship_type",
+    "shipname": "shipname",
+    "callsign": "callsign",
+    "imo": "imo",
+    "to_bow": "to_bow",
+    "to_stern": "to_stern",
+    "to_port": "to_port",
+    "to_starboard": "to_starboard",
+    "destination": "destination",
+}
+
+_COLUMN_TYPES = {
+    "mmsi": "INTEGER",
+    "lon": "REAL",
+    "lat": "REAL",
+    "last_updated": "INTEGER",
+    "speed": "REAL",
+    "course": "REAL",
+    "heading": "INTEGER",
+    "turn": "REAL",
+    "status": "INTEGER",
+    "ship_type": "INTEGER",
+    "shipname": "TEXT",
+    "callsign": "TEXT",
+    "imo": "INTEGER",
+    "to_bow": "INTEGER",
+    "to_stern": "INTEGER",
+    "to_port": "INTEGER",
+    "to_starboard": "INTEGER",
+    "destination": "TEXT",
+}
+
+
+class AISRecorder:
+    """
+    Write-behind recorder of live AIS reports.
+
+    Reports are buffered in memory by the ingest threads and written by a background thread
+    into the 'AisHistory' table in large transactions, with epoch timestamps, so that a live
+    session can later be replayed with the database module ('timestamp_format: epoch').
+
+    :param connection_string: path of the SQLite database file, created if missing
+    :param db_fields: optional custom column names, as 'db_fields' of the database module
+    :param flush_interval: maximum time in seconds between two writes to the database
+    :param batch_size: number of buffered reports triggering an early write
+    :param max_pending: maximum number of buffered reports, newer reports are dropped when exceeded
+    """
+    def __init__(self, connection_string: str, db_fields: dict = None, flush_interval: float = 5.0,
+                 batch_size: int = 10000, max_pending: int = 1_000_000):
+        self._connection_string = connection_string
+        self.column_names = {**DEFAULT_COLUMN_NAMES, **{k: v for k, v in (db_fields or {}).items()
+                                                        if k in DEFAULT_COLUMN_NAMES}}
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.dropped = 0
+        self._buffer: list[tuple] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._fields = self._prepare_table()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.close)
+
+    def _prepare_table(self) -> list[str]:
+        """
+        Creates the AisHistory table if missing and finds the recorded fields it can hold.
+
+        :return: list of track fields having a column in the table
+        """
+        try:
+            connection = sqlite3.connect(self._connection_string)
+        except sqlite3.Error as error:
+            raise ValueError(f"Unable to connect to AIS recording database \n{error}") from None
+        with connection:
+            columns = ", ".join(f"{self.column_names[field]} {column_type}"
+                                for field, column_type in _COLUMN_TYPES.items())
+            connection.execute(f"CREATE TABLE IF NOT EXISTS AisHistory ({columns})")
+            connection.execute("PRAGMA journal_mode=WAL")
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(AisHistory)")}
+        connection.close()
+        return [field for field in DEFAULT_COLUMN_NAMES if self.column_names[field] in existing]
+
+    def record(self, track: AISTrack) -> None:
+        """
+        Buffers the current state of a track, called for every received position report.
+
+        :param track: merged track of the reporting vessel
+        :return: None
+        """
+        if track.lon is None or track.lat is None:
+            return
+        row = tuple(self._value(track, field) for field in self._fields)
+        with self._lock:
+            if len(self._buffer) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: number of buffered reports waiting to be written
+        """
+        return len(self._buffer)
+
+    @staticmethod
+    def _value(track: AISTrack, field: str):
+        value = getattr(track, field)
+        if field == "last_updated":
+            return int(value)
+        if field in ("status", "ship_type") and value is not None:
+            return int(value)
+        return value
+
+    def flush(self, connection: sqlite3.Connection) -> None:
+        """
+        Writes all buffered reports in a single transaction.
+
+        :param connection: connection to the recording database
+        :return: None
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        columns = ", ".join(self.column_names[field] for field in self._fields)
+        placeholders = ", ".join("?" for _ in self._fields)
+        try:
+            with connection:
+                connection.executemany(f"INSERT INTO AisHistory ({columns}) VALUES ({placeholders})", rows)
+            self.recorded += len(rows)
+        except sqlite3.Error as error:
+            self.dropped += len(rows)
+            print(f"WARNING: Unable to record {len(rows)} AIS reports \n{error}")
+
+    def close(self) -> None:
+        """
+        Stops the recorder, writing the remaining buffered reports.
+
+        :return: None
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        connection = sqlite3.connect(self._connection_string)
+        self.flush(connection)
+        connection.close()
+
+    def _run(self) -> None:
+        connection = sqlite3.connect(self._connection_string)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            self.flush(connection)
+        connection.close()
@@ -0,0 +1,131 @@
+"""
+Contains the AISReplayParser class for playing recorded NMEA logs through the live AIS pipeline.
+"""
+import threading
+import time
+from pathlib import Path
+
+from pyais import AISTracker
+
+from seacharts.core import Scope
+from seacharts.core.aisLive import AISLiveParser
+from seacharts.core.aisStream import AISSentenceAssembler, AISSourceStats, tag_block_timestamp
+from seacharts.core.aisTracker import AISLiveTracker
+
+
+class AISReplayParser(AISLiveParser):
+    """
+    Class for replaying a recorded NMEA/AIVDM log through the same tracker and snapshot path as AISLiveParser
+
+    The log is played on a simulated clock, driven by the 'c:' receive times of the NMEA tag blocks
+    (or by 'replay_rate' sentences per second for logs without them) and paced against the wall clock
+    by 'replay_speed'. Track expiry and snapshots every 'interval' seconds use the simulated clock, so
+    a replay reproduces the same vessels regardless of the speed or of the machine load.
+    """
+    def __init__(self, scope: Scope):
+        settings = scope.settings["enc"]["ais"]
+        self.replay_file = Path(settings["replay_file"])
+        if not self.replay_file.is_file():
+            raise ValueError(f"AIS replay file {self.replay_file} does not exist")
+        self.replay_speed = settings.get("replay_speed", 1)
+        self.replay_rate = settings.get("replay_rate", 100)
+        self.simulated_time = None
+        self.replay_stats = {
+            "lines": 0,
+            "messages": 0,
+            "snapshots": 0,
+            "snapshot_seconds": 0.0,
+            "simulated_seconds": 0.0,
+            "wall_seconds": 0.0,
+            "max_lag": 0.0,
+            "finished": False,
+        }
+        self.replay_finished = threading.Event()
+        super().__init__(scope)
+
+    def _resolve_sources(self, settings: dict) -> list:
+        return []
+
+    def _create_tracker(self) -> AISLiveTracker:
+        return AISLiveTracker(self.ttl_value, self.max_vessels, clock=lambda: self.simulated_time)
+
+    def _now(self) -> float:
+        return self.simulated_time if self.simulated_time is not None else time.time()
+
+    def start_stream_listen(self) -> None:
+        """
+        Replay the whole log file, taking snapshots of the tracked vessels every interval of simulated time
+
+        :return: None
+        """
+        print(f"Replaying AIS log {self.replay_file} at {self.replay_speed}x")
+        stats = self.source_stats.setdefault(self.replay_file.name, AISSourceStats())
+        assembler = AISSentenceAssembler(self.message_types)
+        step = 1 / self.replay_rate
+        with self.ais as tracker:
+            if self.decode_pool is not None:
+                self.decode_pool.start(lambda tracks: self._merge_tracks(tracker, tracks))
+            wall_start = time.perf_counter()
+            simulated_start = next_snapshot = None
+            with open(self.replay_file, "rb") as nmea_file:
+                for line in nmea_file:
+                    timestamp = tag_block_timestamp(line)
+                    if timestamp is None:
+                        timestamp = time.time() if self.simulated_time is None else self.simulated_time + step
+                    if simulated_start is None:
+                        simulated_start = timestamp
+                        next_snapshot = timestamp + self.interval
+                    # keep the clock monotonic when sentences of several stations are slightly out of order
+                    self.simulated_time = max(timestamp, self.simulated_time or timestamp)
+                    self.replay_stats["lines"] += 1
+
+                    delay = wall_start + (self.simulated_time - simulated_start) / self.replay_speed - time.perf_counter()
+                    if delay > 0.001:
+                        time.sleep(delay)
+                    elif -delay > self.replay_stats["max_lag"]:
+                        self.replay_stats["max_lag"] = -delay
+
+                    if self.simulated_time >= next_snapshot:
+                        self._timed_snapshot(tracker)
+                        while next_snapshot <= self.simulated_time:
+                            next_snapshot += self.interval
+
+                    message = assembler.push(line, timestamp)
+                    if message is None:
+                        stats.filtered = assembler.filtered
+                        continue
+                    stats.received += 1
+                    self.replay_stats["messages"] += 1
+                    if self.deduplicator.is_duplicate(message):
+                        stats.duplicates += 1
+                        continue
+                    self.metrics.observe_report(message)
+                    if self.decode_pool is not None:
+                        self.decode_pool.submit(message)
+                    else:
+                        self._ingest(tracker, message, stats)
+
+            self._timed_snapshot(tracker)
+            self.replay_stats["wall_seconds"] = time.perf_counter() - wall_start
+            if simulated_start is not None:
+                self.replay_stats["simulated_seconds"] = self.simulated_time - simulated_start
+            self.replay_stats["finished"] = True
+            self.replay_finished.set()
+            print(f"Replay of {self.replay_file} finished: {self.replay_stats['messages']} messages, "
+                  f"{self.replay_stats['simulated_seconds']:.0f} s simulated in {self.replay_stats['wall_seconds']:.1f} s")
+
+    def _timed_snapshot(self, tracker: AISTracker) -> None:
+        start = time.perf_counter()
+        self._snapshot(tracker)
+        self.replay_stats["snapshot_seconds"] += time.perf_counter() - start
+        self.replay_stats["snapshots"] += 1
+
+    def get_replay_stats(self) -> dict:
+        """
+        Retrieve replay counters and timings, used to measure ingest and render throughput
+
+        :return: dict with replayed lines and messages, number of snapshots and their total duration,
+            simulated and wall time of the replay, maximum lag behind schedule (seconds) and completion flag
+        :rtype: dict
+        """
+        return dict(self.replay_stats)
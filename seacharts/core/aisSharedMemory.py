@@ -0,0 +1,260 @@
+"""
+Contains classes publishing the live AIS fleet into shared memory and reading it from other processes.
+"""
+import atexit
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from seacharts.core.aisFleet import AISFleet, FLEET_FIELDS
+
+_MAGIC = 0x53454141495331  # "SEAAIS1"
+# incremented whenever FLEET_FIELDS or the block layout change
+LAYOUT_VERSION = 3
+_HEADER_DTYPE = np.dtype([
+    ("magic", np.uint64),
+    ("layout", np.uint64),
+    ("sequence", np.uint64),
+    ("count", np.uint64),
+    ("capacity", np.uint64),
+    ("timestamp", np.float64),
+    ("publisher", np.uint64),
+])
+_ALIGNMENT = 64
+# names of the blocks created by publishers of this process, registered to its resource tracker
+_created_blocks: set[str] = set()
+
+
+def _layout(capacity: int) -> tuple[dict[str, int], int]:
+    """
+    :param capacity: maximum number of vessels of the block
+    :return: tuple of column offsets keyed by field and total size of the block in bytes
+    """
+    offsets = {}
+    offset = _ALIGNMENT
+    for field, dtype in FLEET_FIELDS:
+        offsets[field] = offset
+        size = np.dtype(dtype).itemsize * capacity
+        offset += (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+    return offsets, offset
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    :param name: name of an existing shared memory block
+    :return: block attached without registering it to the resource tracker, which would unlink it on exit
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # before Python 3.13, attached blocks are registered to the resource tracker
+        from multiprocessing import resource_tracker
+        memory = shared_memory.SharedMemory(name)
+        if name not in _created_blocks:
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+def _is_running(pid: int) -> bool:
+    """
+    :param pid: process id
+    :return: False if no process with this id is running
+    """
+    if os.name == "nt":
+        # blocks are released with their last handle on Windows, an existing block is always in use
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _views(buffer: memoryview, capacity: int) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    offsets, _ = _layout(capacity)
+    header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=buffer)
+    columns = {field: np.ndarray((capacity,), dtype=dtype, buffer=buffer, offset=offsets[field])
+               for field, dtype in FLEET_FIELDS}
+    return header, columns
+
+
+class AISSharedFleetPublisher:
+    """
+    Publishes the fleet of every snapshot into a named shared memory block, readable by any
+    number of local processes with AISSharedFleetReader.
+
+    The block holds a header followed by one fixed-capacity array per fleet column. Writes are
+    guarded by a sequence lock: the sequence number is odd while a fleet is being written and
+    incremented again once it is complete, so readers can detect and retry torn reads without
+    ever blocking the writer.
+
+    A block left over by a publisher that did not exit cleanly is reused, but never unlinked, as
+    only the process that created a block removes it. A block of the same name that is still
+    published by another running process, or that does not hold an AIS fleet, is left untouched.
+
+    :param name: name of the shared memory block
+    :param capacity: maximum number of published vessels, vessels beyond it are not published
+    :raises ValueError: if the block exists and cannot be reused
+    """
+    def __init__(self, name: str, capacity: int = 65536):
+        self.name = name
+        self.capacity = capacity
+        _, size = _layout(capacity)
+        try:
+            self._memory = shared_memory.SharedMemory(name, create=True, size=size)
+            self._created = True
+            _created_blocks.add(name)
+        except FileExistsError:
+            self._memory = self._reuse(name, size)
+            self._created = False
+        self._header, self._columns = _views(self._memory.buf, capacity)
+        if self._created:
+            self._header["sequence"] = 0
+        else:
+            # readers still attached to a reused block keep seeing the sequence grow, the reset is written as an update
+            self._header["sequence"] += 1 + self._header["sequence"] % 2
+        self._header["count"] = 0
+        self._header["magic"] = _MAGIC
+        self._header["layout"] = LAYOUT_VERSION
+        self._header["capacity"] = capacity
+        self._header["publisher"] = os.getpid()
+        if not self._created:
+            self._header["sequence"] += 1
+        self._truncated = False
+        atexit.register(self.close)
+        print(f"INFO: Publishing AIS fleet to shared memory '{name}' ({size} bytes)")
+
+    @staticmethod
+    def _reuse(name: str, size: int) -> shared_memory.SharedMemory:
+        """
+        Attaches to an existing block left over by a publisher that is no longer running.
+
+        :param name: name of the shared memory block
+        :param size: size in bytes required by the publisher
+        :return: attached block
+        :raises ValueError: if the block is in use, does not hold an AIS fleet or is too small
+        """
+        memory = _attach(name)
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=memory.buf) if memory.size >= _ALIGNMENT else None
+        if header is None or header["magic"] != _MAGIC or header["layout"] != LAYOUT_VERSION:
+            error = f"Shared memory '{name}' already exists and does not hold an AIS fleet"
+        elif _is_running(int(header["publisher"])):
+            error = f"Shared memory '{name}' is already published by process {int(header['publisher'])}"
+        elif memory.size < size:
+            error = f"Shared memory '{name}' left over by process {int(header['publisher'])} is too small"
+        else:
+            print(f"INFO: Reusing shared memory '{name}' left over by process {int(header['publisher'])}")
+            return memory
+        del header
+        memory.close()
+        raise ValueError(f"{error}, use another name or remove it")
+
+    def publish(self, fleet: AISFleet, timestamp: float | None = None) -> None:
+        """
+        Writes a fleet into the block.
+
+        :param fleet: fleet to be published
+        :param timestamp: epoch time of the fleet, current time if not given
+        :return: None
+        """
+        count = min(len(fleet), self.capacity)
+        if count < len(fleet) and not self._truncated:
+            print(f"WARNING: {len(fleet)} vessels exceed the shared memory capacity of {self.capacity}")
+            self._truncated = True
+        header = self._header
+        header["sequence"] += 1
+        for field, column in self._columns.items():
+            column[:count] = fleet[field][:count]
+        header["count"] = count
+        header["timestamp"] = time.time() if timestamp is None else timestamp
+        header["sequence"] += 1
+
+    def close(self) -> None:
+        if self._memory is None:
+            return
+        self._header = self._columns = None
+        self._memory.close()
+        if self._created:
+            self._memory.unlink()
+            _created_blocks.discard(self.name)
+        self._memory = None
+
+
+class AISSharedFleetReader:
+    """
+    Reads the fleet published by AISSharedFleetPublisher in another process.
+
+    view() returns NumPy arrays backed by the shared memory, without any copy; as the publisher
+    may overwrite them at any time, the returned sequence number is checked with is_valid() after
+    using them. read() returns a consistent copy instead.
+
+    :param name: name of the shared memory block
+    """
+    def __init__(self, name: str):
+        self._memory = _attach(name)
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=self._memory.buf)
+        if header["magic"] != _MAGIC or header["layout"] != LAYOUT_VERSION:
+            self._memory.close()
+            raise ValueError(f"Shared memory '{name}' does not hold an AIS fleet of layout version {LAYOUT_VERSION}")
+        self.capacity = int(header["capacity"])
+        self._header, self._columns = _views(self._memory.buf, self.capacity)
+
+    @property
+    def sequence(self) -> int:
+        return int(self._header["sequence"])
+
+    @property
+    def timestamp(self) -> float:
+        return float(self._header["timestamp"])
+
+    def view(self) -> tuple[AISFleet, int]:
+        """
+        :return: tuple of the fleet as zero-copy views of the shared memory and its sequence number
+        """
+        while True:
+            sequence = int(self._header["sequence"])
+            if sequence % 2 == 0:
+                break
+            time.sleep(0)
+        count = int(self._header["count"])
+        return AISFleet({field: column[:count] for field, column in self._columns.items()}), sequence
+
+    def is_valid(self, sequence: int) -> bool:
+        """
+        :param sequence: sequence number returned by view()
+        :return: True if the viewed fleet has not been overwritten since
+        """
+        return int(self._header["sequence"]) == sequence
+
+    def read(self) -> AISFleet:
+        """
+        :return: consistent copy of the published fleet
+        """
+        while True:
+            fleet, sequence = self.view()
+            copy = AISFleet({field: values.copy() for field, values in fleet.columns.items()})
+            if self.is_valid(sequence):
+                return copy
+
+    def wait(self, sequence: int, timeout: float | None = None) -> bool:
+        """
+        Waits for a newer fleet than the given one.
+
+        :param sequence: sequence number of the last fleet read
+        :param timeout: maximum time to wait in seconds
+        :return: True if a newer fleet was published
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while int(self._header["sequence"]) <= sequence + 1:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self) -> None:
+        self._header = self._columns = None
+        self._memory.close()
@@ -0,0 +1,362 @@
+"""
+Contains the AISSimulator class, a local stand-in for a live AIS base-station feed used to
+benchmark and stress-test the live AIS parser.
+"""
+import math
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+from pyais import encode_dict
+
+from seacharts.core.aisStream import armored_char
+from seacharts.core.extent import Extent
+
+# Bit layout of AIS message type 1 (position report class A): (field, number of bits)
+_POSITION_REPORT_LAYOUT = (
+    ("msg_type", 6), ("repeat", 2), ("mmsi", 30), ("status", 4), ("turn", 8), ("speed", 10),
+    ("accuracy", 1), ("lon", 28), ("lat", 27), ("course", 12), ("heading", 9), ("second", 6),
+    ("maneuver", 2), ("spare", 3), ("raim", 1), ("radio", 19),
+)
+_PREFIX = b"!AIVDM,1,1,,A,"
+_SUFFIX = b",0*"
+_ARMOR = np.array([armored_char(value) for value in range(64)], dtype=np.uint8)
+_HEX = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+_SIXBIT_WEIGHTS = np.array([32, 16, 8, 4, 2, 1], dtype=np.uint8)
+
+
+def _xor(data: bytes) -> int:
+    checksum = 0
+    for byte in data:
+        checksum ^= byte
+    return checksum
+
+
+# checksum of the constant parts of the sentence, between '!' and '*'
+_CONSTANT_CHECKSUM = _xor(_PREFIX[1:]) ^ _xor(_SUFFIX[:-1])
+
+
+def encode_position_reports(mmsi: np.ndarray, lon: np.ndarray, lat: np.ndarray, speed: np.ndarray,
+                            course: np.ndarray, heading: np.ndarray, second: np.ndarray) -> bytes:
+    """
+    Encodes a batch of AIS position reports (type 1) into AIVDM sentences at once, much faster than
+    encoding them one by one with pyais.
+
+    :param mmsi: MMSI of each vessel
+    :param lon: longitude in decimal degrees
+    :param lat: latitude in decimal degrees
+    :param speed: speed over ground in knots
+    :param course: course over ground in degrees
+    :param heading: true heading in degrees
+    :param second: UTC second of the report
+    :return: CRLF-terminated sentences, one per report
+    """
+    count = len(mmsi)
+    values = {
+        "msg_type": np.ones(count, dtype=np.int64),
+        "mmsi": np.asarray(mmsi, dtype=np.int64),
+        "speed": np.minimum(np.rint(np.asarray(speed) * 10), 1022).astype(np.int64),
+        "lon": np.rint(np.asarray(lon) * 600000).astype(np.int64),
+        "lat": np.rint(np.asarray(lat) * 600000).astype(np.int64),
+        "course": np.rint(np.asarray(course) * 10).astype(np.int64) % 3600,
+        "heading": np.rint(np.asarray(heading)).astype(np.int64) % 360,
+        "second": np.asarray(second, dtype=np.int64) % 60,
+    }
+    bits = np.zeros((count, 168), dtype=np.uint8)
+    offset = 0
+    for field, length in _POSITION_REPORT_LAYOUT:
+        field_values = values.get(field)
+        if field_values is not None:
+            # negative coordinates are stored in two's complement
+            field_values = field_values & ((1 << length) - 1)
+            shifts = np.arange(length - 1, -1, -1, dtype=np.int64)
+            bits[:, offset:offset + length] = (field_values[:, None] >> shifts) & 1
+        offset += length
+    payload = _ARMOR[bits.reshape(count, 28, 6) @ _SIXBIT_WEIGHTS]
+    checksum = np.bitwise_xor.reduce(payload, axis=1) ^ _CONSTANT_CHECKSUM
+
+    lines = np.empty((count, len(_PREFIX) + 28 + len(_SUFFIX) + 4), dtype=np.uint8)
+    lines[:, :len(_PREFIX)] = np.frombuffer(_PREFIX, dtype=np.uint8)
+    end = len(_PREFIX) + 28
+    lines[:, len(_PREFIX):end] = payload
+    lines[:, end:end + len(_SUFFIX)] = np.frombuffer(_SUFFIX, dtype=np.uint8)
+    end += len(_SUFFIX)
+    lines[:, end] = _HEX[checksum >> 4]
+    lines[:, end + 1] = _HEX[checksum & 15]
+    lines[:, end + 2:] = np.frombuffer(b"\r\n", dtype=np.uint8)
+    return lines.tobytes()
+
+
+class AISSimulator:
+    """
+    Local TCP server synthesizing AIS traffic of vessels moving inside an area.
+
+    Vessels keep a random speed and a slowly drifting course, turning back at the border of the
+    area. Position reports (type 1) are sent round-robin at the target total message rate, and
+    every vessel sends its static and voyage related data (type 5) every 'static_interval' seconds.
+    Every connected client receives the whole stream; when a client does not keep up, messages
+    exceeding 'max_backlog' seconds of traffic are dropped and counted, as with a real feed.
+
+    :param area: Extent of the chart, or geographic bounding box (lon_min, lat_min, lon_max, lat_max)
+    :param vessels: number of simulated vessels
+    :param rate: target number of messages per second
+    :param port: local port of the server, 0 picks a free one
+    :param host: address the server listens on
+    :param static_interval: time in seconds between two static reports of a vessel
+    :param max_backlog: seconds of traffic buffered for a slow client before dropping messages
+    :param seed: seed of the random vessel generation, for reproducible traffic
+    """
+    def __init__(self, area: Extent | tuple[float, float, float, float], vessels: int = 1000, rate: float = 1000,
+                 port: int = 0, host: str = "127.0.0.1", static_interval: float = 360.0,
+                 max_backlog: float = 2.0, seed: int | None = None):
+        self.bbox = area.geographic_bbox if isinstance(area, Extent) else tuple(area)
+        self.vessels = vessels
+        self.rate = rate
+        self.host = host
+        self.static_interval = static_interval
+        self.tick = 0.05
+        self.generated = 0
+        self.sent = 0
+        self.dropped = 0
+        self._max_batches = max(1, math.ceil(max_backlog / self.tick))
+        self._rng = np.random.default_rng(seed)
+        self._create_vessels()
+        self._static_reports: dict[int, bytes] = {}
+        self._clients: list[queue.Queue] = []
+        self._clients_lock = threading.Lock()
+        self._running = threading.Event()
+        self._server = socket.create_server((host, port))
+        self.port = self._server.getsockname()[1]
+
+    def _create_vessels(self) -> None:
+        lon_min, lat_min, lon_max, lat_max = self.bbox
+        count = self.vessels
+        self.mmsi = 200000000 + np.arange(count, dtype=np.int64)
+        self.lon = self._rng.uniform(lon_min, lon_max, count)
+        self.lat = self._rng.uniform(lat_min, lat_max, count)
+        self.speed = self._rng.uniform(2.0, 20.0, count)
+        self.course = self._rng.uniform(0.0, 360.0, count)
+        self.turn_rate = self._rng.normal(0.0, 2.0, count)  # degrees per minute
+        self.ship_type = self._rng.choice([30, 36, 52, 60, 70, 80], count)
+        self._next_vessel = 0
+        self._next_static = self._rng.uniform(0.0, self.static_interval, count)
+
+    def move(self, dt: float) -> None:
+        """
+        Moves all vessels forward in time.
+
+        :param dt: elapsed time in seconds
+        :return: None
+        """
+        self.turn_rate += self._rng.normal(0.0, 0.1, self.vessels) * math.sqrt(dt)
+        np.clip(self.turn_rate, -10.0, 10.0, out=self.turn_rate)
+        self.course = (self.course + self.turn_rate * dt / 60) % 360
+        distance = self.speed * dt / 3600 / 60  # knots to degrees of latitude
+        radians = np.radians(self.course)
+        self.lat += distance * np.cos(radians)
+        self.lon += distance * np.sin(radians) / np.cos(np.radians(self.lat))
+
+        lon_min, lat_min, lon_max, lat_max = self.bbox
+        outside = (self.lon < lon_min) | (self.lon > lon_max)
+        self.course[outside] = (360 - self.course[outside]) % 360
+        outside = (self.lat < lat_min) | (self.lat > lat_max)
+        self.course[outside] = (180 - self.course[outside]) % 360
+        np.clip(self.lon, lon_min, lon_max, out=self.lon)
+        np.clip(self.lat, lat_min, lat_max, out=self.lat)
+
+    def _static_report(self, index: int) -> bytes:
+        report = self._static_reports.get(index)
+        if report is None:
+            sentences = encode_dict({
+                "msg_type": 5, "mmsi": int(self.mmsi[index]), "shipname": f"SIM {index}",
+                "callsign": f"SIM{index % 10000:04d}", "ship_type": int(self.ship_type[index]),
+                "to_bow": 60, "to_stern": 20, "to_port": 8, "to_starboard": 8, "destination": "SIMULATION",
+            }, talker_id="AI", sentence_type="VDM")
+            report = "".join(sentence + "\r\n" for sentence in sentences).encode()
+            self._static_reports[index] = report
+        return report
+
+    def generate(self, count: int, now: float) -> tuple[bytes, int]:
+        """
+        Produces the next messages of the stream: position reports of the next vessels in turn,
+        preceded by the static reports that are due.
+
+        :param count: number of position reports
+        :param now: simulated epoch time (seconds) of the reports
+        :return: tuple of raw sentences and number of AIS messages they contain
+        """
+        chunks = []
+        due = np.flatnonzero(self._next_static <= now)
+        if len(due):
+            self._next_static[due] = now + self.static_interval
+            chunks.extend(self._static_report(index) for index in due.tolist())
+        if count:
+            indices = (self._next_vessel + np.arange(count)) % self.vessels
+            self._next_vessel = int(indices[-1] + 1) % self.vessels
+            chunks.append(encode_position_reports(
+                self.mmsi[indices], self.lon[indices], self.lat[indices], self.speed[indices],
+                self.course[indices], self.course[indices], np.full(count, int(now) % 60)))
+        return b"".join(chunks), count + len(due)
+
+    def start(self) -> "AISSimulator":
+        """
+        Starts accepting clients and streaming traffic in background threads.
+
+        :return: the simulator itself
+        """
+        self._running.set()
+        self._next_static += time.time()
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self._produce, daemon=True).start()
+        print(f"AIS simulator: {self.vessels} vessels at {self.rate} msg/s on {self.host}:{self.port}")
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the traffic, buffered messages are still sent to the connected clients.
+
+        :return: None
+        """
+        self._running.clear()
+        self._server.close()
+
+    def __enter__(self) -> "AISSimulator":
+        return self.start()
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        """
+        :return: dict of generated, sent and dropped message counts, and of connected clients
+        """
+        return {"generated": self.generated, "sent": self.sent, "dropped": self.dropped, "clients": len(self._clients)}
+
+    def _accept(self) -> None:
+        while self._running.is_set():
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            client = queue.Queue(maxsize=self._max_batches)
+            with self._clients_lock:
+                self._clients.append(client)
+            threading.Thread(target=self._write, args=[connection, client], daemon=True).start()
+
+    def _write(self, connection: socket.socket, client: queue.Queue) -> None:
+        with connection:
+            while True:
+                try:
+                    data, count = client.get(timeout=self.tick)
+                except queue.Empty:
+                    if self._running.is_set():
+                        continue
+                    break
+                try:
+                    connection.sendall(data)
+                except OSError:
+                    break
+                self.sent += count
+        with self._clients_lock:
+            self._clients.remove(client)
+
+    def _produce(self) -> None:
+        start = last = time.perf_counter()
+        produced = 0.0
+        while self._running.is_set():
+            current = time.perf_counter()
+            self.move(current - last)
+            last = current
+            count = int(self.rate * (current - start) - produced)
+            produced += count
+            data, messages = self.generate(count, time.time())
+            self.generated += messages
+            with self._clients_lock:
+                for client in self._clients:
+                    try:
+                        client.put_nowait((data, messages))
+                    except queue.Full:
+                        self.dropped += messages
+            delay = self.tick - (time.perf_counter() - current)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def stress_live_parser(settings: dict, rates: list[float], vessels: int = 1000, duration: float = 10.0) -> dict:
+    """
+    Drives AISLiveParser with simulated traffic at several message rates.
+
+    For each rate, a simulator is started and a live parser connected to it for 'duration' seconds.
+    The ingest rate is the number of messages received by the parser per second, the drain lag is
+    the time the parser needs after the end of the traffic to receive all sent messages, and the
+    snapshot latency is the mean duration of a snapshot of the tracked vessels.
+
+    :param settings: seacharts settings (as read from config.yaml) with an 'ais' block, its address is replaced
+    :param rates: list of target message rates
+    :param vessels: number of simulated vessels
+    :param duration: duration of each run in seconds
+    :return: dict of measurements keyed by target rate
+    """
+    from seacharts.core.aisLive import AISLiveParser
+    from seacharts.core.scope import Scope
+
+    scope = Scope(settings)
+    results = {}
+    for rate in rates:
+        simulator = AISSimulator(scope.extent, vessels, rate).start()
+        ais_settings = settings["enc"]["ais"]
+        ais_settings.update({"module": "live", "address": simulator.host, "port": simulator.port, "sources": []})
+        ais_settings.setdefault("interval", 1)
+        parser = AISLiveParser(scope)
+        snapshots = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            time.sleep(1)
+            start = time.perf_counter()
+            parser._snapshot(parser.ais)
+            snapshots.append(time.perf_counter() - start)
+        simulator.stop()
+        stopped = time.perf_counter()
+        stats = parser.source_stats[f"{simulator.host}:{simulator.port}"]
+        while stats.received < simulator.sent and time.perf_counter() - stopped < duration:
+            time.sleep(0.01)
+        received = stats.received
+        results[rate] = {
+            "sent": simulator.sent,
+            "received": received,
+            "dropped": simulator.dropped + simulator.sent - received,
+            "ingest_rate": received / (stopped - (end - duration)),
+            "drain_lag": time.perf_counter() - stopped,
+            "snapshot_latency": sum(snapshots) / len(snapshots) if snapshots else 0.0,
+            "tracked": len(parser.ais.tracks),
+        }
+        print(f"{rate} msg/s: " + ", ".join(f"{key} {value:.3f}" if isinstance(value, float) else f"{key} {value}"
+                                           for key, value in results[rate].items()))
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    from seacharts.core.config import Config
+    from seacharts.core.scope import Scope
+
+    arguments = argparse.ArgumentParser(description="Local AIS feed simulator for the seacharts live AIS module")
+    arguments.add_argument("config", nargs="?", default=None, help="seacharts config.yaml defining the chart extent")
+    arguments.add_argument("--vessels", type=int, default=1000)
+    arguments.add_argument("--rate", type=float, default=1000, help="messages per second")
+    arguments.add_argument("--port", type=int, default=5631)
+    arguments.add_argument("--stress", type=float, nargs="+", metavar="RATE",
+                           help="run the live parser against the given rates instead of serving")
+    arguments.add_argument("--duration", type=float, default=10.0)
+    options = arguments.parse_args()
+
+    config = Config(options.config)
+    if options.stress:
+        config.settings["enc"].setdefault("ais", {})
+        stress_live_parser(config.settings, options.stress, options.vessels, options.duration)
+    else:
+        with AISSimulator(Scope(config.settings).extent, options.vessels, options.rate, options.port):
+            while True:
+                time.sleep(1)
@@ -0,0 +1,148 @@
+"""
+Contains the AISStaticCache class keeping static vessel data of the live AIS modules across restarts.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+
+from pyais import AISTrack
+
+# Track fields reported by static and voyage related messages (types 5 and 24)
+STATIC_FIELDS = ("shipname", "callsign", "imo", "ship_type", "to_bow", "to_stern", "to_port", "to_starboard",
+                 "destination")
+_COLUMN_TYPES = ("TEXT", "TEXT", "INTEGER", "INTEGER", "INTEGER", "INTEGER", "INTEGER", "INTEGER", "TEXT")
+
+
+class AISStaticCache:
+    """
+    On-disk cache of static vessel data (name, ship type, dimensions...) keyed by MMSI.
+
+    Static reports are only broadcast every few minutes, so after a restart vessels would be rendered
+    without their colour and scale until their static data is received again. The cache is loaded at
+    startup and filled into every new track, while static data received from the stream is written
+    back by a background thread every 'flush_interval' seconds, along with the time the vessels
+    still reporting the same static data were last seen. Data is kept in a single SQLite
+    table without rowid, about 100 bytes per vessel.
+
+    :param path: path of the SQLite cache file, created if missing
+    :param flush_interval: time in seconds between two writes of the changed entries
+    :param max_age: entries not updated for this number of days are dropped at startup, None keeps all of them
+    """
+    def __init__(self, path: str, flush_interval: float = 30.0, max_age: float | None = 90):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_age = max_age
+        self.hits = 0
+        self._entries: dict[int, tuple] = {}
+        self._dirty: dict[int, tuple] = {}
+        self._seen: set[int] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._load()
+        threading.Thread(target=self._run, daemon=True).start()
+        atexit.register(self.close)
+
+    def _load(self) -> None:
+        try:
+            connection = sqlite3.connect(self.path)
+        except sqlite3.Error as error:
+            raise ValueError(f"Unable to open AIS static data cache {self.path} \n{error}") from None
+        columns = ", ".join(f"{field} {column_type}" for field, column_type in zip(STATIC_FIELDS, _COLUMN_TYPES))
+        with connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS StaticData "
+                               f"(mmsi INTEGER PRIMARY KEY, {columns}, updated INTEGER) WITHOUT ROWID")
+            if self.max_age is not None:
+                connection.execute("DELETE FROM StaticData WHERE updated < ?",
+                                   (int(time.time() - self.max_age * 86400),))
+            rows = connection.execute(f"SELECT mmsi, {', '.join(STATIC_FIELDS)} FROM StaticData").fetchall()
+        connection.close()
+        self._entries = {row[0]: row[1:] for row in rows}
+        print(f"INFO: Loaded static data of {len(self._entries)} vessels from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def apply(self, track: AISTrack) -> None:
+        """
+        Fills the missing static fields of a new track with the cached ones. Registered as a tracker callback.
+
+        :param track: newly created track
+        :return: None
+        """
+        cached = self._entries.get(track.mmsi)
+        if cached is not None:
+            self.hits += 1
+            for field, value in zip(STATIC_FIELDS, cached):
+                if getattr(track, field) is None:
+                    setattr(track, field, value)
+        self.observe(track)
+
+    def observe(self, track: AISTrack) -> None:
+        """
+        Remembers the static fields of a track if they changed, or that the vessel is still active
+        otherwise, so that its entry is not dropped after 'max_age'. Registered as a tracker callback.
+
+        :param track: created or updated track
+        :return: None
+        """
+        values = tuple(getattr(track, field) for field in STATIC_FIELDS)
+        if all(value is None for value in values):
+            return
+        if values == self._entries.get(track.mmsi):
+            if track.mmsi not in self._seen:
+                with self._lock:
+                    self._seen.add(track.mmsi)
+            return
+        # enumerations (e.g. ship type) are stored by value
+        values = tuple(int(value) if isinstance(value, int) else value for value in values)
+        with self._lock:
+            self._entries[track.mmsi] = values
+            self._dirty[track.mmsi] = values
+
+    def flush(self, connection: sqlite3.Connection) -> None:
+        """
+        Writes the changed entries, and the update time of the entries seen unchanged, in a single transaction.
+
+        :param connection: connection to the cache file
+        :return: None
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            seen, self._seen = self._seen - dirty.keys(), set()
+        if not dirty and not seen:
+            return
+        updated = int(time.time())
+        placeholders = ", ".join("?" for _ in range(len(STATIC_FIELDS) + 2))
+        try:
+            with connection:
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO StaticData (mmsi, {', '.join(STATIC_FIELDS)}, updated) "
+                    f"VALUES ({placeholders})",
+                    [(mmsi, *values, updated) for mmsi, values in dirty.items()])
+                connection.executemany("UPDATE StaticData SET updated = ? WHERE mmsi = ?",
+                                       [(updated, mmsi) for mmsi in seen])
+        except sqlite3.Error as error:
+            print(f"WARNING: Unable to write AIS static data cache {self.path} \n{error}")
+
+    def close(self) -> None:
+        """
+        Stops the cache, writing the remaining changed entries.
+
+        :return: None
+        """
+        if self._closed:
+            return
+        self._closed = True
+        connection = sqlite3.connect(self.path)
+        self.flush(connection)
+        connection.close()
+
+    def _run(self) -> None:
+        connection = sqlite3.connect(self.path)
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            if self._closed:
+                break
+            self.flush(connection)
+        connection.close()
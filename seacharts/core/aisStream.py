@@ -0,0 +1,291 @@
+"""
+Contains helpers for the raw live AIS stream: sentence assembly, cheap payload field
+extraction, cross-source deduplication and per-source counters.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# AIS message types affecting the tracked vessels: position reports (1, 2, 3, 18, 19, 27)
+# and static and voyage related data (5, 24)
+VESSEL_MESSAGE_TYPES = (1, 2, 3, 5, 18, 19, 24, 27)
+
+
+@dataclass(frozen=True)
+class AISSource:
+    """
+    Single live AIS feed (e.g. a base station) given by its address and port.
+
+    :param host: Network address of the AIS stream.
+    :param port: Port number of the AIS stream.
+    """
+    host: str
+    port: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+@dataclass
+class AISSourceStats:
+    """
+    Message counters gathered for a single AIS source.
+
+    :param received: Number of complete AIS messages received from the source.
+    :param filtered: Number of messages dropped before assembly because of their message type.
+    :param duplicates: Number of messages dropped as already received from any source.
+    :param errors: Number of messages that could not be decoded.
+    """
+    received: int = 0
+    filtered: int = 0
+    duplicates: int = 0
+    errors: int = 0
+
+    @property
+    def filtered_ratio(self) -> float:
+        total = self.received + self.filtered
+        return self.filtered / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "filtered": self.filtered,
+            "filtered_ratio": self.filtered_ratio,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
+
+
+@dataclass
+class AISRawMessage:
+    """
+    Complete AIS message assembled from one or more AIVDM/AIVDO sentences, not yet decoded.
+
+    :param lines: Raw NMEA sentences forming the message, in fragment order.
+    :param payload: Concatenated 6-bit armored payload of all fragments.
+    :param fill_bits: Number of fill bits of the last fragment.
+    :param received_at: Epoch time (seconds) at which the message was received.
+    """
+    lines: tuple[bytes, ...]
+    payload: bytes
+    fill_bits: int
+    received_at: float
+
+    @property
+    def msg_type(self) -> int | None:
+        return payload_msg_type(self.payload)
+
+    @property
+    def mmsi(self) -> int | None:
+        return payload_mmsi(self.payload)
+
+
+def payload_bits(payload: bytes, start: int, length: int) -> int | None:
+    """
+    Extracts an unsigned integer field from a 6-bit armored AIS payload without decoding
+    the whole message.
+
+    :param payload: Armored AIS payload as found in the 6th field of an AIVDM sentence.
+    :param start: Index of the first bit of the field.
+    :param length: Number of bits of the field.
+    :return: Value of the field, or None if the payload is too short.
+    """
+    first = start // 6
+    last = (start + length - 1) // 6
+    if last >= len(payload):
+        return None
+    value = 0
+    for char in payload[first:last + 1]:
+        char -= 48
+        if char > 40:
+            char -= 8
+        value = (value << 6) | char
+    shift = (last + 1) * 6 - (start + length)
+    return (value >> shift) & ((1 << length) - 1)
+
+
+def armored_char(value: int) -> int:
+    """
+    :param value: 6-bit value (0-63).
+    :return: ASCII code of the character encoding the value in an armored AIS payload.
+    """
+    return value + 48 if value < 40 else value + 56
+
+
+def payload_msg_type(payload: bytes) -> int | None:
+    """
+    :param payload: Armored AIS payload.
+    :return: AIS message type (first 6 bits of the payload).
+    """
+    return payload_bits(payload, 0, 6)
+
+
+def payload_mmsi(payload: bytes) -> int | None:
+    """
+    :param payload: Armored AIS payload.
+    :return: MMSI of the reporting station (bits 8-37 of the payload).
+    """
+    return payload_bits(payload, 8, 30)
+
+
+def payload_timestamp(payload: bytes) -> int | None:
+    """
+    Reads the UTC second of the report for the position report message types.
+
+    :param payload: Armored AIS payload.
+    :return: UTC second of the report (0-63), or None for message types without one.
+    """
+    msg_type = payload_msg_type(payload)
+    if msg_type in (1, 2, 3):
+        return payload_bits(payload, 137, 6)
+    if msg_type in (18, 19):
+        return payload_bits(payload, 133, 6)
+    return None
+
+
+def tag_block_timestamp(line: bytes) -> float | None:
+    """
+    Reads the receive time from the NMEA 4.10 tag block preceding a sentence, as written by
+    most AIS loggers (e.g. '\\s:2573135,c:1671620143*0B\\!AIVDM,...').
+
+    :param line: Single raw line of an NMEA log.
+    :return: Epoch time (seconds) of the 'c:' field, or None if the line has no such field.
+    """
+    line = line.lstrip()
+    if not line.startswith(b"\\"):
+        return None
+    block, _, _ = line[1:].partition(b"\\")
+    for field in block.split(b"*")[0].split(b","):
+        if field.startswith(b"c:"):
+            try:
+                value = int(field[2:])
+            except ValueError:
+                return None
+            # some loggers write milliseconds
+            return value / 1000 if value > 10 ** 11 else float(value)
+    return None
+
+
+class AISSentenceAssembler:
+    """
+    Assembles raw AIVDM/AIVDO sentences of a single stream into complete AIS messages.
+
+    Each source requires its own assembler, as fragments of multi-sentence messages are
+    only matched within a stream. Out-of-order and orphaned fragments are dropped.
+
+    Messages can be filtered by type before assembly: the type is the first 6 bits of the
+    payload, so it is read from a single character of the first fragment without decoding.
+    Later fragments of a filtered message are then dropped as orphans.
+
+    :param message_types: AIS message types to keep, None keeps all of them.
+    """
+    def __init__(self, message_types: Iterable[int] | None = None):
+        self._fragments: dict[tuple, list[bytes]] = {}
+        self._accepted_chars = None
+        if message_types is not None:
+            self._accepted_chars = frozenset(armored_char(t) for t in message_types)
+        self.filtered = 0
+
+    def push(self, line: bytes, received_at: float) -> AISRawMessage | None:
+        """
+        Adds a raw line of the stream to the assembler.
+
+        :param line: Single raw line received from the stream.
+        :param received_at: Epoch time (seconds) at which the line was received.
+        :return: Complete AIS message if the line finished one, otherwise None.
+        """
+        line = line.strip()
+        if line.startswith(b"\\"):
+            # NMEA 4.10 tag block preceding the sentence
+            _, _, line = line[1:].partition(b"\\")
+        if line[:1] != b"!" or line[3:6] not in (b"VDM", b"VDO"):
+            return None
+        fields = line.split(b",")
+        if len(fields) < 7:
+            return None
+        try:
+            frag_cnt, frag_num = int(fields[1]), int(fields[2])
+            fill_bits = int(fields[6][:1])
+        except ValueError:
+            return None
+
+        if frag_num == 1 and self._accepted_chars is not None:
+            payload = fields[5]
+            if not payload or payload[0] not in self._accepted_chars:
+                self.filtered += 1
+                return None
+
+        if frag_cnt == 1:
+            return AISRawMessage((line,), fields[5], fill_bits, received_at)
+
+        slot = (fields[3], fields[4], frag_cnt)
+        if frag_num == 1:
+            self._fragments[slot] = [line]
+            return None
+        parts = self._fragments.get(slot)
+        if parts is None or len(parts) != frag_num - 1:
+            self._fragments.pop(slot, None)
+            return None
+        parts.append(line)
+        if frag_num < frag_cnt:
+            return None
+        del self._fragments[slot]
+        payload = b"".join(part.split(b",")[5] for part in parts)
+        return AISRawMessage(tuple(parts), payload, fill_bits, received_at)
+
+
+class AISDeduplicator:
+    """
+    Drops AIS messages already received from another (or the same) source within a
+    time window. Messages are identified by (mmsi, message type, timestamp, payload hash),
+    kept in an insertion-ordered set bounded both by the window and by a maximum size.
+
+    :param window: Time in seconds for which a received message is remembered, 0 disables deduplication.
+    :param max_entries: Maximum number of remembered messages.
+    """
+    def __init__(self, window: float = 30.0, max_entries: int = 200_000):
+        self.window = window
+        self.max_entries = max_entries
+        self._seen: OrderedDict[tuple, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(message: AISRawMessage) -> tuple:
+        payload = message.payload
+        return (
+            payload_mmsi(payload),
+            payload_msg_type(payload),
+            payload_timestamp(payload),
+            zlib.crc32(payload),
+        )
+
+    def is_duplicate(self, message: AISRawMessage) -> bool:
+        """
+        Checks whether the message was already seen within the window and remembers it otherwise.
+
+        :param message: Assembled AIS message.
+        :return: True if the message is a duplicate and should be dropped.
+        """
+        if not self.window:
+            return False
+        key = self.key(message)
+        with self._lock:
+            self._expire(message.received_at)
+            if key in self._seen:
+                return True
+            self._seen[key] = message.received_at
+            return False
+
+    def _expire(self, now: float) -> None:
+        seen = self._seen
+        while seen:
+            oldest = next(iter(seen.values()))
+            if now - oldest <= self.window and len(seen) < self.max_entries:
+                break
+            seen.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._seen)
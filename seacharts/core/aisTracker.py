@@ -0,0 +1,76 @@
+"""
+Contains the AISLiveTracker class, an AISTracker with bounded eviction cost and memory.
+"""
+import heapq
+import time
+from typing import Callable
+
+from pyais import AISTrack, AISTracker
+
+
+class AISLiveTracker(AISTracker):
+    """
+    AISTracker evicting stale vessels through an expiry min-heap and capping the number of tracked vessels.
+
+    Every insert or update pushes (last update time, mmsi) on the heap. Expired vessels are popped
+    from the top of the heap, entries superseded by a later update are skipped when popped (lazy
+    deletion), and the heap is rebuilt when superseded entries outnumber the tracks. Each entry is
+    popped at most once, so the eviction cost stays proportional to the number of updates instead of
+    the number of tracked vessels. With 'max_vessels' set, the least recently seen vessel (the top of
+    the heap) is evicted whenever a new vessel exceeds the cap.
+
+    :param ttl_in_seconds: time in seconds after which a vessel that has not been updated is removed, None keeps them
+    :param max_vessels: maximum number of tracked vessels, None for no limit
+    :param clock: callable returning the current epoch time in seconds, the wall clock by default
+    """
+    def __init__(self, ttl_in_seconds: int | None = 600, max_vessels: int | None = None,
+                 clock: Callable[[], float | None] = time.time):
+        super().__init__(ttl_in_seconds=ttl_in_seconds)
+        self.max_vessels = max_vessels
+        self.evicted_ttl = 0
+        self.evicted_cap = 0
+        self._clock = clock
+        self._expiry: list[tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def insert_or_update(self, mmsi: int, track: AISTrack) -> None:
+        super().insert_or_update(mmsi, track)
+        heapq.heappush(self._expiry, (self._tracks[mmsi].last_updated, mmsi))
+        if self.max_vessels is not None:
+            while len(self._tracks) > self.max_vessels:
+                self._pop_oldest()
+                self.evicted_cap += 1
+        if len(self._expiry) > 2 * len(self._tracks) + 1024:
+            self._expiry = [(t.last_updated, t.mmsi) for t in self._tracks.values()]
+            heapq.heapify(self._expiry)
+
+    def cleanup(self) -> None:
+        """
+        Delete all vessels whose last update is older than the time-to-live.
+
+        :return: None
+        """
+        if self.ttl_in_seconds is None:
+            return
+        current = self._clock()
+        if current is None:
+            return
+        limit = current - self.ttl_in_seconds
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= limit:
+            last_updated, mmsi = heapq.heappop(expiry)
+            track = self._tracks.get(mmsi)
+            if track is not None and track.last_updated == last_updated:
+                self.pop_track(mmsi)
+                self.evicted_ttl += 1
+
+    def _pop_oldest(self) -> None:
+        expiry = self._expiry
+        while expiry:
+            last_updated, mmsi = heapq.heappop(expiry)
+            track = self._tracks.get(mmsi)
+            if track is not None and track.last_updated == last_updated:
+                self.pop_track(mmsi)
+                return
@@ -0,0 +1,105 @@
+"""
+Contains the AISTracks class holding vessel trajectories and their Douglas-Peucker simplification.
+"""
+import numpy as np
+
+
+def douglas_peucker(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplifies a polyline with the Douglas-Peucker algorithm.
+
+    Instead of recursing into one segment at a time, every pending segment of a recursion level is
+    processed at once: the distances of all their interior points are computed in one pass and the
+    farthest point of each segment is found with reduceat, so the number of NumPy calls grows with
+    the recursion depth (logarithmic for usual tracks) instead of the number of kept points.
+
+    :param x: x coordinates of the points
+    :param y: y coordinates of the points
+    :param tolerance: maximum distance of a removed point to the simplified polyline, 0 keeps all points
+    :return: boolean mask of the kept points, the first and last points are always kept
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(x)
+    if count < 3 or tolerance <= 0:
+        return np.ones(count, dtype=bool)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    starts = np.array([0])
+    ends = np.array([count - 1])
+    while len(starts):
+        lengths = ends - starts - 1
+        pending = lengths > 0
+        starts, ends, lengths = starts[pending], ends[pending], lengths[pending]
+        if not len(starts):
+            break
+        first = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(starts)), lengths)
+        points = starts[segment] + 1 + np.arange(lengths.sum()) - first[segment]
+        x0, y0 = x[starts][segment], y[starts][segment]
+        dx, dy = x[ends][segment] - x0, y[ends][segment] - y0
+        norm = np.hypot(dx, dy)
+        px, py = x[points] - x0, y[points] - y0
+        distance = np.where(norm > 0, np.abs(dx * py - dy * px) / np.where(norm > 0, norm, 1.0), np.hypot(px, py))
+        farthest = np.maximum.reduceat(distance, first)
+        split = np.minimum.reduceat(np.where(distance == farthest[segment], points, count), first)
+        splitting = farthest > tolerance
+        split = split[splitting]
+        keep[split] = True
+        starts, ends = np.concatenate((starts[splitting], split)), np.concatenate((split, ends[splitting]))
+    return keep
+
+
+class AISTracks:
+    """
+    Trajectories of several vessels in compressed sparse row layout: the points of all vessels are
+    stored back to back, vessel i owning the rows offsets[i] to offsets[i + 1].
+
+    :param mmsi: MMSI of the vessels
+    :param offsets: start of the points of each vessel, followed by the total number of points
+    :param times: epoch times of the points
+    :param points: UTM eastings and northings of the points, of shape (number of points, 2)
+    """
+    def __init__(self, mmsi: np.ndarray, offsets: np.ndarray, times: np.ndarray, points: np.ndarray):
+        self.mmsi = mmsi
+        self.offsets = offsets
+        self.times = times
+        self.points = points
+
+    def __len__(self) -> int:
+        return len(self.mmsi)
+
+    def __getitem__(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param index: index of the vessel
+        :return: tuple of epoch times and points of the vessel, as views
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.times[start:end], self.points[start:end]
+
+    def segments(self) -> list[np.ndarray]:
+        """
+        :return: points of every vessel as views, ready to be passed to matplotlib's LineCollection
+        """
+        return np.split(self.points, self.offsets[1:-1])
+
+    @classmethod
+    def from_sorted(cls, mmsi: np.ndarray, times: np.ndarray, points: np.ndarray,
+                    tolerance: float = 0.0) -> "AISTracks":
+        """
+        Builds the trajectories from points sorted by MMSI and time, simplifying each of them.
+
+        :param mmsi: MMSI of every point
+        :param times: epoch times of the points
+        :param points: UTM eastings and northings of the points, of shape (number of points, 2)
+        :param tolerance: Douglas-Peucker tolerance in metres, 0 keeps all points
+        :return: AISTracks object
+        """
+        vessels, starts = np.unique(mmsi, return_index=True)
+        offsets = np.append(starts, len(mmsi))
+        if tolerance > 0 and len(mmsi):
+            keep = np.concatenate([douglas_peucker(points[start:end, 0], points[start:end, 1], tolerance)
+                                   for start, end in zip(offsets[:-1], offsets[1:])])
+            times, points = times[keep], points[keep]
+            offsets = np.append(0, np.cumsum(np.add.reduceat(keep, offsets[:-1])))
+        return cls(vessels, offsets, times, points)
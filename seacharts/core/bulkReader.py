@@ -0,0 +1,78 @@
+"""
+Contains functions reading whole layers of spatial files into geometry arrays and attribute columns.
+"""
+import warnings
+from pathlib import Path
+
+import fiona
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+try:
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def bulk_reader_available() -> bool:
+    """
+    :return: True if pyogrio is installed, so that layers can be read without per-feature Python objects
+    """
+    return pyogrio is not None
+
+
+def read_arrays(path: Path, layer: str | None = None,
+                bounding_box: tuple[int, int, int, int] | None = None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Reads the features of a layer intersecting a bounding box at once. With pyogrio, OGR returns the
+    whole layer as Arrow columns (or as NumPy arrays if pyarrow is not installed), geometries being
+    converted from WKB in a single vectorized call. Without it, features are read one by one with fiona.
+
+    :param path: path of the spatial file
+    :param layer: name of the layer, the first one if None
+    :param bounding_box: (xmin, ymin, xmax, ymax) the features must intersect, all features if None
+    :return: tuple of the array of geometries and the attribute columns
+    :raises ValueError: if the layer does not exist, with a 'Null layer: ' message as raised by fiona
+    """
+    if pyogrio is None:
+        return _read_records(path, layer, bounding_box)
+    try:
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=RuntimeWarning)
+            if pyarrow is not None:
+                meta, table = pyogrio.raw.read_arrow(path, layer=layer, bbox=bounding_box)
+                geometry_name = meta["geometry_name"] or "wkb_geometry"
+                wkb = table.column(geometry_name).to_numpy(zero_copy_only=False)
+                columns = {name: table.column(name).to_numpy(zero_copy_only=False)
+                           for name in table.column_names if name != geometry_name}
+            else:
+                meta, _, wkb, fields = pyogrio.raw.read(path, layer=layer, bbox=bounding_box)
+                columns = dict(zip(meta["fields"], fields))
+    except pyogrio.errors.DataLayerError as error:
+        raise ValueError(f"Null layer: '{layer}'") from error
+    geometries = shapely.from_wkb(wkb)
+    present = ~shapely.is_missing(geometries)
+    if not present.all():
+        geometries = geometries[present]
+        columns = {name: values[present] for name, values in columns.items()}
+    return geometries, columns
+
+
+def _read_records(path: Path, layer: str | None,
+                  bounding_box: tuple[int, int, int, int] | None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    with fiona.open(path, "r", layer=layer) as source:
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=RuntimeWarning)
+            records = [record for record in (source.filter(bbox=bounding_box) if bounding_box else source)
+                       if record["geometry"] is not None]
+        names = list(source.schema["properties"])
+    geometries = np.array([shape(record["geometry"]) for record in records], dtype=object)
+    columns = {name: np.array([record["properties"].get(name) for record in records], dtype=object)
+               for name in names}
+    return geometries, columns
@@ -4,7 +4,9 @@ transformations needed to work with ENC spatial data.
 """
 import math
 import re
+from functools import cached_property
 
+import numpy as np
 from pyproj import Transformer
 
 
@@ -60,6 +62,8 @@ class Extent:
         # Calculate bounding box and area based on origin and size
         self.bbox = self._bounding_box_from_origin_size()
         self.area: int = self.size[0] * self.size[1]
+        # Geographic envelope of the bounding box, for cheap filtering of lon/lat data before projection
+        self.geographic_bbox = self._geographic_bbox_from_bounding_box()
 
     @staticmethod
     def _is_southern_hemisphere(center_east: int = None, crs_hemisphere_sym: str = None) -> bool:
@@ -108,6 +112,20 @@ class Extent:
         """
         return str(math.floor(longitude / 6 + 31))
 
+    @cached_property
+    def _utm_transformer(self) -> Transformer:
+        """
+        Transformer from WGS84 longitude/latitude to the UTM projection of the extent, built once.
+        """
+        return Transformer.from_crs('epsg:4326', self.out_proj, always_xy=True)
+
+    @cached_property
+    def _lat_lon_transformer(self) -> Transformer:
+        """
+        Transformer from the UTM projection of the extent to WGS84 longitude/latitude, built once.
+        """
+        return Transformer.from_crs(self.out_proj, 'epsg:4326', always_xy=True)
+
     def convert_lat_lon_to_utm(self, latitude, longitude):
         """
         Converts latitude and longitude coordinates to UTM coordinates.
@@ -116,15 +134,25 @@ class Extent:
         :param longitude: Longitude in decimal degrees.
         :return: Tuple of UTM east and north coordinates.
         """
-        in_proj = 'epsg:4326'  # WGS84
-
-        transformer = Transformer.from_crs(in_proj, self.out_proj, always_xy=True)
-        utm_east, utm_north = transformer.transform(longitude, latitude)
+        utm_east, utm_north = self._utm_transformer.transform(longitude, latitude)
 
         utm_east = math.ceil(utm_east)
         utm_north = math.ceil(utm_north)
         return utm_east, utm_north
 
+    def convert_lat_lon_array_to_utm(self, latitudes, longitudes) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Converts arrays of latitude and longitude coordinates to UTM coordinates in a single call.
+
+        :param latitudes: Sequence of latitudes in decimal degrees.
+        :param longitudes: Sequence of longitudes in decimal degrees.
+        :return: Tuple of arrays of UTM east and north coordinates.
+        """
+        utm_east, utm_north = self._utm_transformer.transform(
+            np.asarray(longitudes, dtype=float), np.asarray(latitudes, dtype=float)
+        )
+        return np.ceil(utm_east), np.ceil(utm_north)
+
     def convert_utm_to_lat_lon(self, utm_east, utm_north):
         """
         Converts UTM coordinates to latitude and longitude.
@@ -133,10 +161,7 @@ class Extent:
         :param utm_north: UTM northing coordinate.
         :return: Tuple of latitude and longitude.
         """
-        out_proj = 'epsg:4326'  # WGS84
-        in_proj = self.out_proj
-        transformer = Transformer.from_crs(in_proj, out_proj, always_xy=True)
-        longitude, latitude = transformer.transform(utm_east, utm_north)
+        longitude, latitude = self._lat_lon_transformer.transform(utm_east, utm_north)
 
         return latitude, longitude
 
@@ -163,9 +188,33 @@ class Extent:
         )
 
     def is_in_bounding_box(self,x,y) -> bool:
-        x_min,y_min,x_max,y_max = self._bounding_box_from_origin_size()
+        x_min,y_min,x_max,y_max = self.bbox
         return (x_min <= x <= x_max) and (y_min <= y <= y_max)
 
+    def is_in_geographic_bbox(self, longitude, latitude) -> bool:
+        """
+        Checks if geographic coordinates fall within the geographic envelope of the bounding box.
+        The envelope encloses the whole (UTM) bounding box, so points passing this cheap test
+        still have to be projected and checked with is_in_bounding_box.
+
+        :param longitude: Longitude in decimal degrees.
+        :param latitude: Latitude in decimal degrees.
+        :return: True if the point lies within the envelope.
+        """
+        lon_min, lat_min, lon_max, lat_max = self.geographic_bbox
+        return (lon_min <= longitude <= lon_max) and (lat_min <= latitude <= lat_max)
+
+    def _geographic_bbox_from_bounding_box(self) -> tuple[float, float, float, float]:
+        """
+        Calculates the longitude/latitude envelope of the UTM bounding box, densifying its edges
+        to account for their curvature in geographic coordinates.
+
+        :return: Tuple of envelope coordinates (lon_min, lat_min, lon_max, lat_max).
+        """
+        margin = 1e-4  # about 10 m, covers rounding of the projected bounding box
+        lon_min, lat_min, lon_max, lat_max = self._lat_lon_transformer.transform_bounds(*self.bbox, densify_pts=21)
+        return lon_min - margin, lat_min - margin, lon_max + margin, lat_max + margin
+
     def _bounding_box_from_origin_size(self) -> tuple[int, int, int, int]:
         """
         Calculates the bounding box based on the origin and size.
@@ -0,0 +1,185 @@
+"""
+Contains the LayerCache class storing the loaded geometry of a layer in a binary format.
+"""
+import json
+import mmap
+import warnings
+from pathlib import Path
+
+import numpy as np
+import shapely
+from shapely.errors import GEOSException
+
+from seacharts.layers import Layer
+
+
+class LayerCache:
+    """
+    Binary cache of a layer, stored next to its shapefile, holding what loading the shapefile
+    produces: the unified geometry of the layer, the geometries of its features and their
+    attributes. Loading it skips reading the shapefile record by record and unifying its features.
+
+    The cache is made of four files in the directory of the shapefile:
+    - <label>.geometry.wkb: WKB of the unified geometry
+    - <label>.features.wkb: WKB of the features, back to back
+    - <label>.features.npy: offsets of the features in the previous file, followed by its size
+    - <label>.attributes.json: attributes of the features by column, and the signature (size and
+      modification time) of the shapefile the cache was made from
+
+    WKB files are memory-mapped, and the cache is ignored when the shapefile changed since it was written.
+
+    :param directory: directory of the shapefile of the layer
+    :param label: label of the layer
+    """
+    def __init__(self, directory: Path, label: str):
+        self.directory = directory
+        self.label = label
+
+    def _path(self, suffix: str) -> Path:
+        return self.directory / f"{self.label}.{suffix}"
+
+    @staticmethod
+    def signature(shapefile: Path) -> list[int] | None:
+        """
+        :param shapefile: path of a shapefile (.shp)
+        :return: sizes and modification times of its geometry and attribute files, None if it does not exist
+        """
+        signature = []
+        for path in (shapefile, shapefile.with_suffix(".dbf")):
+            if not path.exists():
+                return None
+            stat = path.stat()
+            signature += [stat.st_size, stat.st_mtime_ns]
+        return signature
+
+    def load(self, layer: Layer, signature: list[int]) -> bool:
+        """
+        Loads the cache into a layer if it was made from the shapefile with the given signature.
+
+        :param layer: Layer object to load the geometry and features into
+        :param signature: signature of the current shapefile of the layer
+        :return: True if the cache was loaded
+        """
+        try:
+            attributes = json.loads(self._path("attributes.json").read_text())
+            if attributes.get("signature") != signature:
+                return False
+            offsets = np.load(self._path("features.npy"), mmap_mode="r")
+            geometry = shapely.from_wkb(self._read_mapped(self._path("geometry.wkb"), [0, None])[0])
+            features = shapely.from_wkb(self._read_mapped(self._path("features.wkb"), offsets))
+        except (OSError, EOFError, ValueError, GEOSException):
+            return False
+        layer.geometry = geometry
+        layer.records = None
+        layer.record_geometries = features
+        layer.record_properties = attributes["columns"]
+        return True
+
+    def save(self, layer: Layer, signature: list[int]) -> None:
+        """
+        Writes the loaded geometry of a layer and the features it was unified from, taken from its
+        records or, if it was read in bulk, from its feature arrays.
+
+        :param layer: Layer object loaded from its shapefile
+        :param signature: signature of the shapefile the layer was read from
+        :return: None
+        """
+        if layer.record_geometries is not None:
+            features = shapely.to_wkb(layer.record_geometries)
+            columns = {name: self._column(values) for name, values in layer.record_properties.items()}
+        else:
+            records = layer.records or []
+            features = shapely.to_wkb(np.array([layer._record_to_geometry(record) for record in records],
+                                               dtype=object))
+            names = list(dict.fromkeys(name for record in records for name in record["properties"].keys()))
+            columns = {name: [record["properties"].get(name) for record in records] for name in names}
+        offsets = np.zeros(len(features) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(wkb) for wkb in features])
+        try:
+            self._path("geometry.wkb").write_bytes(shapely.to_wkb(layer.geometry))
+            self._path("features.wkb").write_bytes(b"".join(features))
+            np.save(self._path("features.npy"), offsets)
+            # written last, so that an interrupted write leaves no valid cache
+            self._path("attributes.json").write_text(json.dumps({"signature": signature, "columns": columns}))
+        except (OSError, TypeError, ValueError) as error:
+            warnings.warn(f"Unable to write the cache of {self.label}: {error}")
+
+    @staticmethod
+    def _column(values: np.ndarray) -> list:
+        """
+        :param values: attribute column read in bulk
+        :return: values as JSON serializable Python objects, dates as ISO strings
+        """
+        values = np.asarray(values)
+        if values.dtype.kind == "M":
+            values = np.where(np.isnat(values), None, np.datetime_as_string(values))
+        return values.tolist()
+
+    @staticmethod
+    def _read_mapped(path: Path, offsets) -> np.ndarray:
+        """
+        :param path: path of a file of WKB geometries stored back to back
+        :param offsets: offsets of the geometries in the file, followed by its size
+        :return: array of the WKB of the geometries, sliced from the memory-mapped file
+        """
+        with open(path, "rb") as file:
+            if path.stat().st_size == 0:
+                return np.array([b""] * (len(offsets) - 1), dtype=object)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return np.array([mapped[start:end] for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+
+
+def benchmark(count: int, seed: int = 0) -> None:
+    """
+    Times loading a layer of random polygons from its shapefile, from its shapefile while writing
+    its binary cache (cold start), and from its binary cache (warm start).
+
+    :param count: number of polygons of the layer
+    :param seed: seed of the random polygons
+    :return: None
+    """
+    import shutil
+    import tempfile
+    import time
+
+    import fiona
+
+    from seacharts.core import paths
+    from seacharts.core.parserFGDB import FGDBParser
+    from seacharts.layers import Seabed
+
+    generator = np.random.default_rng(seed)
+    side = np.sqrt(count) * 100
+    geometries = shapely.buffer(shapely.points(generator.uniform(0, side, (count, 2))),
+                                generator.uniform(10, 50, count), quad_segs=4)
+    depths = generator.integers(0, 100, count)
+    shapefiles = paths.shapefiles
+    paths.shapefiles = Path(tempfile.mkdtemp())
+    try:
+        layer = Seabed(depth=10)
+        directory = paths.shapefiles / layer.label
+        directory.mkdir()
+        schema = {"geometry": "Polygon", "properties": {"DRVAL1": "int", "OBJNAM": "str"}}
+        with fiona.open(directory / f"{layer.label}.shp", "w", driver="ESRI Shapefile", schema=schema,
+                        crs="EPSG:32633") as sink:
+            sink.writerecords({"geometry": shapely.geometry.mapping(geometry),
+                               "properties": {"DRVAL1": int(depth), "OBJNAM": f"area {index}"}}
+                              for index, (geometry, depth) in enumerate(zip(geometries, depths)))
+        print(f"Loading a layer of {count} polygons")
+        bounding_box = (0, 0, int(side) + 100, int(side) + 100)
+        for name, cache_format in (("shapefile", "shapefile"), ("cold start", "wkb"), ("warm start", "wkb")):
+            layer = Seabed(depth=10)
+            start_time = time.perf_counter()
+            FGDBParser(bounding_box, [], {"cache_format": cache_format}).load_shapefiles(layer)
+            print(f"  {name}: {time.perf_counter() - start_time:.2f} s, area {layer.geometry.area:.0f}")
+    finally:
+        shutil.rmtree(paths.shapefiles, ignore_errors=True)
+        paths.shapefiles = shapefiles
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arguments = argparse.ArgumentParser(description="Benchmark of the binary layer cache against shapefiles")
+    arguments.add_argument("--count", type=int, default=100000, help="number of polygons")
+    benchmark(arguments.parse_args().count)
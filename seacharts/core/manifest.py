@@ -0,0 +1,108 @@
+"""
+Contains the BuildManifest class recording the inputs of the shapefiles of a map.
+"""
+import hashlib
+import json
+import warnings
+from pathlib import Path
+
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """
+    :param path: path of a file
+    :param block_size: number of bytes read at once
+    :return: digest of the content of the file
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Manifest of the shapefiles of a map, recording the source files they were built from and the
+    inputs of every layer (bounding box, coordinate reference system, depth bin, source layer...).
+    A shapefile is only loaded if the inputs of its layer did not change since it was built, the
+    other layers are rebuilt from the sources.
+
+    Source files are identified by their content hash. The size and modification time of every file
+    are recorded next to its hash, so that only files whose size or modification time changed are
+    hashed again.
+
+    :param path: path of the JSON manifest file
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.sources: dict[str, dict] = {}
+        self.layers: dict[str, dict] = {}
+        self._digests: dict[tuple[str, ...], str] = {}
+        if path.exists():
+            try:
+                manifest = json.loads(path.read_text())
+                self.sources = manifest.get("sources", {})
+                self.layers = manifest.get("layers", {})
+            except (OSError, ValueError) as error:
+                warnings.warn(f"Unable to read build manifest {path}: {error}")
+
+    def source_digest(self, files: list[Path]) -> str:
+        """
+        Hashes the content of source files, reusing the recorded hash of files whose size and
+        modification time did not change.
+
+        :param files: paths of the source files
+        :return: digest of the names and contents of the files
+        """
+        key = tuple(sorted(str(path) for path in files))
+        if key in self._digests:
+            return self._digests[key]
+        digest = hashlib.blake2b(digest_size=16)
+        for name in key:
+            path = Path(name)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            recorded = self.sources.get(name, {})
+            if recorded.get("size") != stat.st_size or recorded.get("mtime") != stat.st_mtime_ns:
+                recorded = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": file_hash(path)}
+                self.sources[name] = recorded
+            digest.update(f"{path.name}:{recorded['hash']};".encode())
+        self._digests[key] = digest.hexdigest()
+        return self._digests[key]
+
+    def is_current(self, label: str, inputs: dict) -> bool:
+        """
+        :param label: label of the layer
+        :param inputs: inputs the layer would be built from now
+        :return: True if the shapefile of the layer was built from the same inputs
+        """
+        return self.layers.get(label) == json.loads(json.dumps(inputs))
+
+    def changes(self, label: str, inputs: dict) -> list[str]:
+        """
+        :param label: label of the layer
+        :param inputs: inputs the layer would be built from now
+        :return: names of the inputs that changed since the layer was built
+        """
+        recorded = self.layers.get(label, {})
+        inputs = json.loads(json.dumps(inputs))
+        return sorted(key for key in recorded.keys() | inputs.keys() if recorded.get(key) != inputs.get(key))
+
+    def record(self, label: str, inputs: dict) -> None:
+        """
+        Records the inputs a layer was built from.
+
+        :param label: label of the layer
+        :param inputs: inputs of the layer
+        :return: None
+        """
+        self.layers[label] = json.loads(json.dumps(inputs))
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"sources": self.sources, "layers": self.layers}, indent=1))
+        except OSError as error:
+            warnings.warn(f"Unable to write build manifest {self.path}: {error}")
@@ -7,8 +7,12 @@ from pathlib import Path
 from typing import Generator
 
 import fiona
+import numpy as np
 
 from seacharts.core import paths
+from seacharts.core.bulkReader import bulk_reader_available, read_arrays
+from seacharts.core.layerCache import LayerCache
+from seacharts.core.manifest import BuildManifest
 from seacharts.layers import Layer
 
 
@@ -19,14 +23,61 @@ class DataParser:
 
     :param bounding_box: Tuple defining bounding box coordinates as (xmin, ymin, xmax, ymax).
     :param path_strings: List of paths to spatial data sources.
+    :param build: Build settings of the config, 'union' holds the options of the partitioned union of layers.
     """
     def __init__(
         self,
         bounding_box: tuple[int, int, int, int],
         path_strings: list[str],
+        build: dict | None = None,
     ):
         self.bounding_box = bounding_box
         self.paths = set([p.resolve() for p in (map(Path, path_strings))])
+        self.build = build if build is not None else {}
+        self._manifest: BuildManifest | None = None
+
+    @property
+    def _union_options(self) -> dict:
+        """
+        :return: keyword arguments of the union of layer geometries, chunk_size 0 unions them at once
+        """
+        union = self.build.get("union", {})
+        return {"chunk_size": union.get("chunk_size", 0), "workers": union.get("workers")}
+
+    @property
+    def manifest(self) -> BuildManifest:
+        """
+        :return: Build manifest of the shapefile directory of the map.
+        """
+        path = paths.shapefiles / "manifest.json"
+        if self._manifest is None or self._manifest.path != path:
+            self._manifest = BuildManifest(path)
+        return self._manifest
+
+    def source_files(self) -> list[Path]:
+        """
+        Lists the files the layers are built from.
+
+        :return: List of paths to the source files.
+        """
+        files = []
+        for path in self._file_paths:
+            files += [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+        return files
+
+    def layer_inputs(self, layer: Layer) -> dict:
+        """
+        Collects the inputs a layer is built from, a layer whose inputs changed has to be rebuilt.
+
+        :param layer: Layer object to be built.
+        :return: Dictionary of the inputs of the layer.
+        """
+        return {
+            "format": self.__class__.__name__,
+            "bounding_box": list(self.bounding_box),
+            "sources": self.manifest.source_digest(self.source_files()),
+            "depth": layer.depth,
+        }
 
     @staticmethod
     def _shapefile_path(label):
@@ -69,6 +120,30 @@ class DataParser:
             print(message)
         return
 
+    @property
+    def _bulk_read(self) -> bool:
+        """
+        :return: True if layers are read in bulk into geometry arrays instead of record by record
+        """
+        return self.build.get("reader", "fiona") == "pyogrio" and bulk_reader_available()
+
+    def _read_spatial_arrays(self, path: Path, layer: str | None = None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        Reads the features of a spatial file within the bounding box at once, see read_arrays.
+
+        :param path: Path to the spatial file to be read.
+        :param layer: Name of the layer to read, the first one if None.
+        :return: Tuple of the array of geometries and the attribute columns, empty if the layer was not found.
+        """
+        try:
+            return read_arrays(path, layer, self.bounding_box)
+        except ValueError as e:
+            message = str(e)
+            if "Null layer: " in message:
+                message = f"Warning: {message[12:]} not found in data set."
+            print(message)
+        return np.empty(0, dtype=object), {}
+
     def _read_shapefile(self, label: str) -> Generator:
         """
         Reads records from a specified shapefile if it exists.
@@ -82,13 +157,32 @@ class DataParser:
 
     def load_shapefiles(self, layer: Layer) -> None:
         """
-        Loads records from shapefiles into the specified layer.
+        Loads records from shapefiles into the specified layer, in bulk with the pyogrio reader
+        (see read_arrays) or record by record with fiona. With the 'wkb' cache format,
+        the layer is loaded from its binary cache if it is up to date with the shapefile,
+        and the cache is written after reading the shapefile otherwise, see LayerCache.
 
         :param layer: Layer object to load the records into.
         """
-        records = list(self._read_shapefile(layer.label))
-        layer.records_as_geometry(records)
-        layer.records= records
+        cache, signature = None, None
+        if self.build.get("cache_format", "shapefile") == "wkb":
+            cache = LayerCache(self._shapefile_dir_path(layer.label), layer.label)
+            signature = cache.signature(self._shapefile_path(layer.label))
+            if signature is not None and cache.load(layer, signature):
+                return
+        if self._bulk_read:
+            file_path = self._shapefile_path(layer.label)
+            geometries, properties = np.empty(0, dtype=object), {}
+            if file_path.exists():
+                geometries, properties = self._read_spatial_arrays(file_path)
+            layer.arrays_as_geometry(geometries, properties, **self._union_options)
+        else:
+            records = list(self._read_shapefile(layer.label))
+            layer.records_as_geometry(records, **self._union_options)
+            layer.records= records
+            layer.record_geometries, layer.record_properties = None, None
+        if cache is not None and signature is not None:
+            cache.save(layer, signature)
         
 
     def _valid_paths_and_resources(self, paths: set[Path], resources: list[str], area: float)-> bool:
@@ -135,6 +229,16 @@ class DataParser:
         """
         pass
 
+    def update_resources(self, regions_list: list[Layer]) -> list[Layer]:
+        """
+        Applies changes of the resources to already parsed layers. Formats without
+        incremental updates have nothing to apply.
+
+        :param regions_list: List of loaded Layer objects.
+        :return: List of the Layer objects that were updated.
+        """
+        return []
+
     @abstractmethod
     def _is_map_type(self, path) -> bool:
         """
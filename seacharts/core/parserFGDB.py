@@ -1,19 +1,91 @@
+import multiprocessing
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Generator
 
 import fiona
+import numpy as np
+import shapely
 
 from seacharts.core import DataParser, paths
 from seacharts.layers import Layer, labels
 
 
-class FGDBParser(DataParser):
+def build_region(task: tuple) -> dict:
+    """
+    Reads, clips, merges, simplifies and buffers one region of the FGDB resources. Executed by the
+    worker processes of a parallel build, the geometry is returned as WKB and errors are reported
+    instead of raised.
+
+    :param task: tuple of (region, resource paths, bounding box, build settings)
+    :return: dict with the layer name, number of records, WKB geometry (None if no records were found),
+        elapsed seconds and error
+    """
+    region, path_strings, bounding_box, build = task
+    start_time = time.perf_counter()
+    count, wkb, error = 0, None, None
+    try:
+        parser = FGDBParser(bounding_box, path_strings, build)
+        geometries = parser._load_geometries(region, verbose=False)
+        count = len(geometries)
+        if count:
+            region.unify_geometries(geometries, bounding_box=bounding_box, **parser._union_options)
+            region.simplify(0)
+            region.buffer(0)
+            wkb = shapely.to_wkb(region.geometry)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"layer": region.name, "records": count, "wkb": wkb,
+            "seconds": time.perf_counter() - start_time, "error": error}
+
 
-    def _load_from_file(self, layer: Layer) -> list[dict]:
+class FGDBParser(DataParser):
+    """
+    Parser for FGDB spatial data, merging the records of every region into a single geometry.
+
+    :param bounding_box: Tuple defining bounding box coordinates as (xmin, ymin, xmax, ymax).
+    :param path_strings: List of paths to data sources.
+    :param build: Build settings, with 'workers' set regions are built concurrently on a pool of processes.
+    """
+    def __init__(self, bounding_box: tuple[int, int, int, int], path_strings: list[str], build: dict = None):
+        super().__init__(bounding_box, path_strings, build)
+        self.build_report: list[dict] = []
+
+    def _load_geometries(self, layer: Layer, verbose: bool = True) -> np.ndarray:
+        """
+        Reads the geometries of a layer from all FGDB resources, in bulk into geometry arrays with
+        the pyogrio reader, seabed depths being filtered on the depth columns at once.
+
+        :param layer: Layer object to be read.
+        :param verbose: If True, the number of read records is printed.
+        :return: Array of the geometries of the layer within the bounding box.
+        """
+        if not self._bulk_read:
+            records = self._load_from_file(layer, verbose)
+            return np.array([layer._record_to_geometry(record) for record in records], dtype=object)
+        depth = layer.depth if hasattr(layer, "depth") else 0
+        external_labels = labels.NORWEGIAN_LABELS[layer.__class__.__name__]
+        parts = []
+        for gdb_path in self._file_paths:
+            for label in external_labels:
+                if isinstance(label, dict):
+                    geometries, columns = self._read_spatial_arrays(gdb_path, label["layer"])
+                    if len(geometries):
+                        geometries = geometries[np.asarray(columns[label["depth"]], dtype=np.float64) >= depth]
+                else:
+                    geometries, _ = self._read_spatial_arrays(gdb_path, label)
+                parts.append(geometries)
+        geometries = np.concatenate(parts) if parts else np.empty(0, dtype=object)
+        if verbose:
+            print(f"\rNumber of {layer.label} records read: {len(geometries)}", end="")
+        return geometries
+
+    def _load_from_file(self, layer: Layer, verbose: bool = True) -> list[dict]:
         depth = layer.depth if hasattr(layer, "depth") else 0
         external_labels = labels.NORWEGIAN_LABELS[layer.__class__.__name__]
-        return list(self._read_file(layer.label, external_labels, depth))
+        return list(self._read_file(layer.label, external_labels, depth, verbose))
 
     def parse_resources(
             self,
@@ -23,17 +95,20 @@ class FGDBParser(DataParser):
     ) -> None:
         if not self._valid_paths_and_resources(self.paths, resources, area):
             return # interrupt parsing if paths are not valid
+        if self.build.get("workers") is not None:
+            self._parse_parallel(regions_list)
+            return
         for regions in regions_list:
             start_time = time.time()
-            records = self._load_from_file(regions)
-            info = f"{len(records)} {regions.name} geometries"
+            geometries = self._load_geometries(regions)
+            info = f"{len(geometries)} {regions.name} geometries"
 
-            if not records:
+            if not len(geometries):
                 print(f"\rFound {info}.")
                 return
             else:
-                print(f"\rMerging {info}...", end="")
-                regions.unify(records)
+                print(f"\rClipping and merging {info}...", end="")
+                regions.unify_geometries(geometries, bounding_box=self.bounding_box, **self._union_options)
 
                 print(f"\rSimplifying {info}...", end="")
                 regions.simplify(0)
@@ -41,13 +116,46 @@ class FGDBParser(DataParser):
                 print(f"\rBuffering {info}...", end="")
                 regions.buffer(0)
 
-                print(f"\rClipping {info}...", end="")
-                regions.clip(self.bounding_box)
-
             self._write_to_shapefile(regions)
             end_time = round(time.time() - start_time, 1)
             print(f"\rSaved {info} to shapefile in {end_time} s.")
 
+    def _parse_parallel(self, regions_list: list[Layer]) -> None:
+        """
+        Builds regions on a pool of worker processes, one region per task, so that the GEOS
+        operations of independent regions run concurrently. Geometries are sent back as WKB and
+        written to shapefiles by this process, and the time and error of every region are
+        gathered in 'build_report'.
+
+        :param regions_list: List of Layer objects to be parsed.
+        """
+        if not regions_list:
+            return
+        path_strings = [str(path) for path in self.paths]
+        # regions are already built concurrently, their unions run within the worker processes
+        build = {key: value for key, value in self.build.items() if key != "workers"}
+        build["union"] = {"chunk_size": self._union_options["chunk_size"]}
+        tasks = [(region, path_strings, self.bounding_box, build) for region in regions_list]
+        workers = min(self.build["workers"] or os.cpu_count() or 1, len(tasks))
+        print(f"\rBuilding {len(tasks)} layers on {workers} processes...", end="")
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            self.build_report = list(executor.map(build_region, tasks))
+        elapsed = time.perf_counter() - start_time
+
+        for region, result in zip(regions_list, self.build_report):
+            if result["wkb"] is not None:
+                region.geometry = shapely.from_wkb(result["wkb"])
+                self._write_to_shapefile(region)
+            status = "failed: " + result["error"] if result["error"] else "done"
+            print(f"\r{result['layer']}: {result['records']} geometries, {round(result['seconds'], 1)} s, {status}")
+        total = sum(result["seconds"] for result in self.build_report)
+        errors = [result for result in self.build_report if result["error"]]
+        print(f"\rBuilt {len(tasks)} layers on {workers} processes in {round(elapsed, 1)} s "
+              f"({round(total, 1)} s of processing)")
+        if errors:
+            print(f"WARNING: {len(errors)} layer builds failed: {', '.join(result['layer'] for result in errors)}")
+
     @staticmethod
     def _parse_records(records, name):
         for i, record in enumerate(records):
@@ -56,11 +164,22 @@ class FGDBParser(DataParser):
         return
 
     def _read_file(
-        self, name: str, external_labels: list[str], depth: int
+        self, name: str, external_labels: list[str], depth: int, verbose: bool = True
     ) -> Generator:
         for gdb_path in self._file_paths:
             records = self._parse_layers(gdb_path, external_labels, depth)
-            yield from self._parse_records(records, name)
+            yield from self._parse_records(records, name) if verbose else records
+
+    def layer_inputs(self, layer: Layer) -> dict:
+        """
+        Collects the inputs a layer is built from, a layer whose inputs changed has to be rebuilt.
+
+        :param layer: Layer object to be built.
+        :return: Dictionary of the inputs of the layer.
+        """
+        inputs = super().layer_inputs(layer)
+        inputs["labels"] = labels.NORWEGIAN_LABELS[layer.__class__.__name__]
+        return inputs
 
     def _is_map_type(self, path) -> bool:
         return path.is_dir() and path.suffix == ".gdb"
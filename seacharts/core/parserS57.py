@@ -1,12 +1,59 @@
+import multiprocessing
 import os.path
+import shutil
 import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import shapely
+from shapely import geometry as geo
 
 from seacharts.core import DataParser
+from seacharts.core import paths
+from seacharts.core.s57Reader import S57CellReader, depth_bins, merge_cells, read_cell, scan_cell, write_shapefile
+from seacharts.core.s57Updates import S57UpdateState, fingerprint, touched_layers
 from seacharts.layers import Layer, Land, Shore, Seabed
 
 
+def convert_task(task: tuple) -> dict:
+    """
+    Converts one layer (or the depth bins of DEPARE) of an S57 file to shapefiles. Executed by the
+    worker processes of a parallel build, errors are reported instead of raised.
+
+    :param task: tuple of (name, kind, s57 path, epsg, bounding box, arguments), where kind is one of
+        'layer' and 'depths' (in-process reader) or 'ogr2ogr_layer' and 'ogr2ogr_depth'
+    :return: dict with the layer name, number of written features (None for ogr2ogr), fingerprints of the
+        written shapefiles keyed by path (in-process reader only), elapsed seconds and error
+    """
+    name, kind, s57_path, epsg, bounding_box, arguments = task
+    start_time = time.perf_counter()
+    features, fingerprints, error = None, {}, None
+    try:
+        if kind == "layer":
+            features, digest = S57CellReader(s57_path, epsg, bounding_box).convert_layer(*arguments)
+            fingerprints[arguments[1]] = digest
+        elif kind == "depths":
+            counts, digests = S57CellReader(s57_path, epsg, bounding_box).convert_depths(*arguments)
+            features = sum(counts)
+            fingerprints = {path: digest for path, digest in zip(arguments[1], digests) if path is not None}
+        elif kind == "ogr2ogr_layer":
+            layer, dest_path = arguments
+            if not S57Parser.convert_s57_to_utm_shapefile(s57_path, dest_path, layer, epsg, bounding_box):
+                error = f"ogr2ogr failed to convert {layer}"
+        elif kind == "ogr2ogr_depth":
+            depth, dest_path, next_depth = arguments
+            if not S57Parser.convert_s57_depth_to_utm_shapefile(s57_path, dest_path, depth, epsg, bounding_box,
+                                                                 next_depth):
+                error = f"ogr2ogr failed to convert DEPARE from {depth} m"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"layer": name, "features": features, "fingerprints": fingerprints,
+            "seconds": time.perf_counter() - start_time, "error": error}
+
+
 class S57Parser(DataParser):
     """
     Parser for S57 maritime spatial data. This class manages data parsing, 
@@ -16,15 +63,22 @@ class S57Parser(DataParser):
     :param bounding_box: Tuple defining bounding box coordinates as (xmin, ymin, xmax, ymax).
     :param path_strings: List of paths to data sources.
     :param epsg: EPSG code for the desired coordinate reference system.
+    :param build: Build settings, 's57_reader' selects the in-process reader ('fiona', default) or 'ogr2ogr',
+        'workers' enables the conversion of layers on a pool of processes (0 for one per CPU).
+    :param depths: Depths of all seabed bins of the map, so that a subset of them can be rebuilt on its own.
     """
     def __init__(
             self,
             bounding_box: tuple[int, int, int, int],
             path_strings: list[str],
-            epsg: str
+            epsg: str,
+            build: dict | None = None,
+            depths: list[int] | None = None
     ):
-        super().__init__(bounding_box, path_strings)
+        super().__init__(bounding_box, path_strings, build)
         self.epsg = epsg
+        self.depths = depths if depths is not None else []
+        self.build_report: list[dict] = []
 
     def get_source_root_name(self) -> str:
         """ 
@@ -39,19 +93,22 @@ class S57Parser(DataParser):
                 return path.stem
 
     @staticmethod
-    def __run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path) -> None:
+    def __run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path) -> bool:
         """
         Executes the ogr2ogr command to convert S57 files to shapefiles.
 
         :param ogr2ogr_cmd: Command to be executed for conversion.
         :param s57_file_path: Path to the input S57 file.
         :param shapefile_output_path: Path where the output shapefile will be saved.
+        :return: True if the conversion succeeded.
         """
         try:
             subprocess.run(ogr2ogr_cmd, check=True)
             print(f"Conversion successful: {s57_file_path} -> {shapefile_output_path}")
-        except subprocess.CalledProcessError as e:
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
             print(f"Error during conversion: {e}")
+            return False
 
     @staticmethod
     def convert_s57_to_utm_shapefile(s57_file_path, shapefile_output_path, layer: str, epsg:str, bounding_box):
@@ -75,7 +132,7 @@ class S57Parser(DataParser):
             '-clipdst', x_min, y_min, x_max, y_max, # Clipping to bounding box
             '-skipfailures'                         # Skip failures in processing
         ]
-        S57Parser.__run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path)
+        return S57Parser.__run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path)
         
 
     @staticmethod
@@ -104,7 +161,7 @@ class S57Parser(DataParser):
             '-clipdst', x_min, y_min, x_max, y_max, # Clipping to bounding box
             '-skipfailures'                         # Skip failures in processing
         ]
-        S57Parser.__run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path)
+        return S57Parser.__run_org2ogr(ogr2ogr_cmd, s57_file_path, shapefile_output_path)
 
     def parse_resources(
             self,
@@ -121,20 +178,280 @@ class S57Parser(DataParser):
         """
         if not self._valid_paths_and_resources(self.paths, resources, area): 
             return # interrupt parsing if paths are not valid
-        s57_path = None
-        for path in self._file_paths:
-            s57_path = self.get_s57_file_path(path)
-        s57_path = str(s57_path)
+        cells = self.get_s57_cells()
+        s57_path = str(cells[0]) if cells else None
 
         # Separate Seabeds from rest of regions to extract depths from DEPARE correctly
         seabeds = [region for region in regions_list if isinstance(region, Seabed)]
         rest_of_regions = [region for region in regions_list if not isinstance(region, Seabed)]
-        
-        for index, region in enumerate(seabeds):
-            self._parse_S57_depth(index, region, s57_path, seabeds)
-        for region in rest_of_regions:
-            self._parse_S57_region(region, s57_path)
-        print(f"\rFinished processing {len(regions_list)} layers for S57 map at {s57_path}")
+
+        state = S57UpdateState(self._update_state_path())
+        if len(cells) > 1:
+            self._parse_S57_cells(seabeds, rest_of_regions, cells, state)
+            print(f"\rFinished processing {len(regions_list)} layers for {len(cells)} S57 cells")
+        elif self.build.get("workers") is not None:
+            self._parse_S57_parallel(seabeds, rest_of_regions, s57_path, state)
+            print(f"\rFinished processing {len(regions_list)} layers for S57 map at {s57_path}")
+        elif self.build.get("s57_reader", "fiona") == "fiona":
+            self._parse_S57_cell(seabeds, rest_of_regions, s57_path, state)
+            print(f"\rFinished processing {len(regions_list)} layers for S57 map at {s57_path}")
+        else:
+            for region in seabeds:
+                self._parse_S57_depth(region, s57_path, seabeds)
+            for region in rest_of_regions:
+                self._parse_S57_region(region, s57_path)
+            print(f"\rFinished processing {len(regions_list)} layers for S57 map at {s57_path}")
+        state.record_cells(cells)
+        state.save()
+
+    def update_resources(self, regions_list: list[Layer]) -> list[Layer]:
+        """
+        Applies new S57 update files (.001, .002...) to the shapefiles of already converted regions.
+        Only the layers touched by the updates are read again (GDAL applies update files when reading
+        their base cell), and only the shapefiles whose content changed are written and loaded again.
+
+        :param regions_list: List of loaded Layer objects.
+        :return: List of the Layer objects whose shapefiles were rewritten.
+        """
+        cells = self.get_s57_cells()
+        state = S57UpdateState(self._update_state_path())
+        updates = state.new_updates(cells)
+        if not updates:
+            return []
+        start_time = time.time()
+        names = ", ".join(update.name for cell_updates in updates.values() for update in cell_updates)
+        print(f"INFO: Applying S57 updates {names}")
+        touched = touched_layers([update for cell_updates in updates.values() for update in cell_updates])
+        seabeds = [region for region in regions_list if isinstance(region, Seabed)
+                   and (touched is None or "DEPARE" in touched)]
+        regions = [region for region in regions_list if not isinstance(region, Seabed)
+                   and (touched is None or self._s57_layer_name(region) in touched)]
+        if len(cells) > 1:
+            changed = self._parse_S57_cells(seabeds, regions, cells, state, force=False)
+        elif self.build.get("s57_reader", "fiona") == "fiona":
+            changed = self._parse_S57_cell(seabeds, regions, str(cells[0]), state, force=False)
+        else:
+            for region in seabeds + regions:
+                self._clear_region(region)
+            for region in seabeds:
+                self._parse_S57_depth(region, str(cells[0]), seabeds)
+            for region in regions:
+                self._parse_S57_region(region, str(cells[0]))
+            changed = seabeds + regions
+        state.record_cells(cells)
+        state.save()
+        end_time = round(time.time() - start_time, 1)
+        print(f"INFO: Updated {len(changed)} of {len(seabeds) + len(regions)} touched layers in {end_time} s.")
+        return changed
+
+    def _parse_S57_cell(self, seabeds: list[Seabed], regions: list[Layer], s57_path: str,
+                        state: S57UpdateState, force: bool = True) -> list[Layer]:
+        """
+        Parses regions from the S57 file within the process, reading every layer once and
+        distributing DEPARE into all depth bins in a single pass.
+
+        :param seabeds: Seabed objects to be parsed, in ascending depth order.
+        :param regions: Other Layer objects to be parsed.
+        :param s57_path: Path to the input S57 file.
+        :param state: Update state receiving the fingerprints of the written shapefiles.
+        :param force: If False, shapefiles are only written if their content changed.
+        :return: List of the Layer objects whose shapefiles were written.
+        """
+        reader = S57CellReader(s57_path, self.epsg, self.bounding_box)
+        return self._save_regions(seabeds, regions, reader.read_layer, state, force)
+
+    def _save_regions(self, seabeds: list[Seabed], regions: list[Layer],
+                      read_layer: Callable[[str], tuple[dict, list, list[dict]]],
+                      state: S57UpdateState, force: bool) -> list[Layer]:
+        """
+        Writes regions to shapefiles and loads them.
+
+        :param seabeds: Seabed objects to be written, in ascending depth order.
+        :param regions: Other Layer objects to be written.
+        :param read_layer: Callable returning the schema, geometries and properties of an S57 layer.
+        :param state: Update state receiving the fingerprints of the written shapefiles.
+        :param force: If False, shapefiles are only written if their content changed.
+        :return: List of the Layer objects whose shapefiles were written.
+        """
+        written = []
+        if seabeds:
+            start_time = time.time()
+            schema, geometries, properties = read_layer("DEPARE")
+            depths = self._bin_depths(seabeds)
+            bins = depth_bins(depths, properties)
+            count = 0
+            for region in seabeds:
+                selected = np.flatnonzero(bins == depths.index(region.depth))
+                if self._save_region(region, schema, [geometries[i] for i in selected],
+                                     [properties[i] for i in selected], state, force):
+                    written.append(region)
+                    count += len(selected)
+            end_time = round(time.time() - start_time, 1)
+            print(f"\rSaved {count} DEPARE features to {len(written)} depth shapefiles in {end_time} s.")
+        for region in regions:
+            start_time = time.time()
+            schema, geometries, properties = read_layer(self._s57_layer_name(region))
+            if self._save_region(region, schema, geometries, properties, state, force):
+                written.append(region)
+                end_time = round(time.time() - start_time, 1)
+                print(f"\rSaved {len(geometries)} {region.name} features to shapefile in {end_time} s.")
+        return written
+
+    def _save_region(self, region: Layer, schema: dict, geometries: list, properties: list[dict],
+                     state: S57UpdateState, force: bool) -> bool:
+        """
+        Writes a region to its shapefile and loads it, unless its content did not change.
+
+        :return: True if the shapefile was written.
+        """
+        digest = fingerprint(geometries, properties)
+        if not force and state.fingerprints.get(region.label) == digest:
+            return False
+        self._clear_region(region)
+        write_shapefile(self.__get_dest_path(region.label), self.epsg, schema, geometries, properties)
+        state.fingerprints[region.label] = digest
+        self.load_shapefiles(region)
+        return True
+
+    def _clear_region(self, region: Layer) -> None:
+        """
+        Removes the shapefile and geometry of a region before it is converted again.
+
+        :param region: Layer object to be cleared.
+        """
+        shutil.rmtree(self._shapefile_dir_path(region.label), ignore_errors=True)
+        region.geometry = geo.MultiPolygon()
+        region.records = None
+
+    def _bin_depths(self, seabeds: list[Seabed]) -> list[int]:
+        """
+        :param seabeds: Seabed objects being parsed.
+        :return: Depths of all seabed bins of the map in ascending order, so that the bins of the parsed
+            seabeds end where the next bin of the map starts even if that one is not parsed.
+        """
+        return sorted(set(self.depths) | {region.depth for region in seabeds})
+
+    def _next_depth(self, region: Seabed, seabeds: list[Seabed]) -> int | None:
+        """
+        :param region: Seabed object being parsed.
+        :param seabeds: Seabed objects being parsed.
+        :return: Depth where the bin of the region ends, None for the deepest bin.
+        """
+        depths = self._bin_depths(seabeds)
+        index = depths.index(region.depth)
+        return depths[index + 1] if index < len(depths) - 1 else None
+
+    @staticmethod
+    def _update_state_path() -> Path:
+        return paths.shapefiles / "s57_updates.json"
+
+    def _parse_S57_parallel(self, seabeds: list[Seabed], regions: list[Layer], s57_path: str,
+                            state: S57UpdateState):
+        """
+        Parses regions from the S57 file on a pool of worker processes, converting independent layers
+        (and with ogr2ogr, depth bins) concurrently. Shapefiles are loaded once all conversions are done,
+        and the time and error of every conversion are gathered in 'build_report'.
+
+        :param seabeds: Seabed objects to be parsed, in ascending depth order.
+        :param regions: Other Layer objects to be parsed.
+        :param s57_path: Path to the input S57 file.
+        :param state: Update state receiving the fingerprints of the written shapefiles.
+        """
+        common = (s57_path, self.epsg, self.bounding_box)
+        tasks = []
+        if self.build.get("s57_reader", "fiona") == "fiona":
+            if seabeds:
+                depths = self._bin_depths(seabeds)
+                dest_paths = {region.depth: self.__get_dest_path(region.label) for region in seabeds}
+                tasks.append(("DEPARE", "depths", *common, (depths, [dest_paths.get(depth) for depth in depths])))
+            tasks += [(region.name, "layer", *common, (self._s57_layer_name(region), self.__get_dest_path(region.label)))
+                      for region in regions]
+        else:
+            for region in seabeds:
+                tasks.append((region.name, "ogr2ogr_depth", *common,
+                              (region.depth, self.__get_dest_path(region.label), self._next_depth(region, seabeds))))
+            tasks += [(region.name, "ogr2ogr_layer", *common,
+                       (self._s57_layer_name(region), self.__get_dest_path(region.label)))
+                      for region in regions]
+        if not tasks:
+            return
+        workers = self.build["workers"] or os.cpu_count() or 1
+        workers = min(workers, len(tasks))
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            self.build_report = list(executor.map(convert_task, tasks))
+        elapsed = time.perf_counter() - start_time
+
+        labels = {self.__get_dest_path(region.label): region.label for region in seabeds + regions}
+        for result in self.build_report:
+            if not result["error"]:
+                for dest_path, digest in result["fingerprints"].items():
+                    state.fingerprints[labels[dest_path]] = digest
+
+        for region in seabeds + regions:
+            self.load_shapefiles(region)
+        for result in sorted(self.build_report, key=lambda result: -result["seconds"]):
+            features = "" if result["features"] is None else f"{result['features']} features, "
+            status = "failed: " + result["error"] if result["error"] else "done"
+            print(f"\r{result['layer']}: {features}{round(result['seconds'], 1)} s, {status}")
+        total = sum(result["seconds"] for result in self.build_report)
+        errors = [result for result in self.build_report if result["error"]]
+        print(f"\rConverted {len(tasks)} layers on {workers} processes in {round(elapsed, 1)} s "
+              f"({round(total, 1)} s of conversion)")
+        if errors:
+            print(f"WARNING: {len(errors)} layer conversions failed: {', '.join(result['layer'] for result in errors)}")
+
+    def _parse_S57_cells(self, seabeds: list[Seabed], regions: list[Layer], cells: list[Path],
+                         state: S57UpdateState, force: bool = True) -> list[Layer]:
+        """
+        Parses regions covered by several S57 cells. The cells intersecting the bounding box are found
+        from their coverage, read (concurrently with 'workers' set) and merged per layer, the most
+        detailed usage band winning where cells overlap and features split by cell boundaries being
+        dissolved, see merge_cells.
+
+        :param seabeds: Seabed objects to be parsed, in ascending depth order.
+        :param regions: Other Layer objects to be parsed.
+        :param cells: Paths to the S57 files.
+        :param state: Update state receiving the fingerprints of the written shapefiles.
+        :param force: If False, shapefiles are only written if their content changed.
+        :return: List of the Layer objects whose shapefiles were written.
+        """
+        start_time = time.time()
+        workers = self.build.get("workers")
+        executor = None
+        if workers is not None:
+            executor = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(cells)),
+                                           mp_context=multiprocessing.get_context("spawn"))
+        run = executor.map if executor is not None else map
+        try:
+            scans = list(run(scan_cell, map(str, cells), [self.epsg] * len(cells)))
+            area = shapely.box(*self.bounding_box)
+            selected = [(str(cell), band, shapely.from_wkb(coverage)) for cell, (band, coverage) in zip(cells, scans)
+                        if shapely.intersects(shapely.from_wkb(coverage), area)]
+            print(f"\rINFO: {len(selected)} of {len(cells)} S57 cells intersect the bounding box")
+            layers = (["DEPARE"] if seabeds else []) + [self._s57_layer_name(region) for region in regions]
+            count = len(selected)
+            read = list(run(read_cell, [cell for cell, _, _ in selected], [self.epsg] * count,
+                            [self.bounding_box] * count, [layers] * count))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        cells_layers = [(band, coverage, layers_read) for (_, band, coverage), layers_read in zip(selected, read)]
+        print(f"\rRead {count} S57 cells in {round(time.time() - start_time, 1)} s.")
+
+        return self._save_regions(seabeds, regions, lambda layer: merge_cells(cells_layers, layer), state, force)
+
+    @staticmethod
+    def _s57_layer_name(region: Layer) -> str:
+        """
+        :param region: Layer object to be parsed.
+        :return: Name of the S57 layer holding the features of the region.
+        """
+        if isinstance(region, Land):
+            return "LNDARE"
+        elif isinstance(region, Shore):
+            return "COALNE"
+        return region.name
 
     def _parse_S57_region(self, region: Layer, s57_path: str):
         """
@@ -146,33 +463,24 @@ class S57Parser(DataParser):
         start_time = time.time()
         dest_path = self.__get_dest_path(region.label)
 
-        if isinstance(region, Land):
-            self.convert_s57_to_utm_shapefile(s57_path, dest_path, "LNDARE", self.epsg, self.bounding_box)
-        elif isinstance(region, Shore):
-            self.convert_s57_to_utm_shapefile(s57_path, dest_path, "COALNE", self.epsg, self.bounding_box)
-        else:
-            self.convert_s57_to_utm_shapefile(s57_path, dest_path, region.name, self.epsg, self.bounding_box)
+        self.convert_s57_to_utm_shapefile(s57_path, dest_path, self._s57_layer_name(region), self.epsg, self.bounding_box)
 
         self.load_shapefiles(region)
         end_time = round(time.time() - start_time, 1)
         print(f"\rSaved {region.name} to shapefile in {end_time} s.")
 
-    def _parse_S57_depth(self, index: int, region: Seabed, s57_path: str, seabeds: list[Seabed]):
+    def _parse_S57_depth(self, region: Seabed, s57_path: str, seabeds: list[Seabed]):
         """
         Parses a seabed region (DEPARE) from the S57 file and converts it to a shapefile based on depth.
 
-        :param index: Index of the seabed region in the list.
         :param region: Seabed object representing the region to be parsed.
         :param s57_path: Path to the input S57 file.
-        :param seabeds: List of all seabed regions.
+        :param seabeds: List of the seabed regions being parsed.
         """
         start_time = time.time()
         dest_path = self.__get_dest_path(region.label)
-        if index < len(seabeds) - 1:
-            next_depth = seabeds[index + 1].depth
-            self.convert_s57_depth_to_utm_shapefile(s57_path, dest_path, region.depth, self.epsg, self.bounding_box, next_depth)
-        else:
-            self.convert_s57_depth_to_utm_shapefile(s57_path, dest_path, region.depth, self.epsg, self.bounding_box)
+        next_depth = self._next_depth(region, seabeds)
+        self.convert_s57_depth_to_utm_shapefile(s57_path, dest_path, region.depth, self.epsg, self.bounding_box, next_depth)
         self.load_shapefiles(region)
         end_time = round(time.time() - start_time, 1)
         print(f"\rSaved {region.name} to shapefile in {end_time} s.")
@@ -187,6 +495,46 @@ class S57Parser(DataParser):
         return os.path.join(self._shapefile_dir_path(region_label), region_label + ".shp")
 
 
+    def source_files(self) -> list[Path]:
+        """
+        Lists the S57 base cells the layers are built from. Update files are applied to the
+        built layers by update_resources instead of triggering a rebuild.
+
+        :return: List of paths to the S57 files.
+        """
+        return self.get_s57_cells()
+
+    def layer_inputs(self, layer: Layer) -> dict:
+        """
+        Collects the inputs a layer is built from, a layer whose inputs changed has to be rebuilt.
+
+        :param layer: Layer object to be built.
+        :return: Dictionary of the inputs of the layer.
+        """
+        inputs = super().layer_inputs(layer)
+        inputs["epsg"] = self.epsg
+        inputs["s57_reader"] = self.build.get("s57_reader", "fiona")
+        if isinstance(layer, Seabed):
+            inputs["layer"] = "DEPARE"
+            inputs["next_depth"] = self._next_depth(layer, [layer])
+        else:
+            inputs["layer"] = self._s57_layer_name(layer)
+        return inputs
+
+    def get_s57_cells(self) -> list[Path]:
+        """
+        Retrieves the paths of all S57 files (with .000 extension) in the configured resources.
+
+        :return: List of paths to the S57 files.
+        """
+        cells = []
+        for path in self._file_paths:
+            if path.is_file():
+                cells.append(path)
+            else:
+                cells += sorted(p for p in path.iterdir() if p.suffix == ".000")
+        return cells
+
     @staticmethod
     def get_s57_file_path(path: Path) -> Path | None:
         """
@@ -0,0 +1,364 @@
+"""
+Contains the S57CellReader class and functions converting layers of S57 cells to shapefiles in-process.
+"""
+import warnings
+from pathlib import Path
+
+import fiona
+import numpy as np
+import shapely
+from pyproj import Transformer
+from shapely.geometry import mapping, shape
+
+from seacharts.core.s57Updates import fingerprint
+from seacharts.shapes.union import repair
+
+_POLYGONAL = ("Polygon", "MultiPolygon")
+_LINEAR = ("LineString", "MultiLineString")
+_SEAM_GRID = 0.01
+# distance in metres within which a feature is considered to touch a seam between two cells
+_SEAM_DISTANCE = 1.0
+# length in degrees of the segments of cell coverages before reprojection
+_COVERAGE_SEGMENT = 0.001
+# S57 record identifiers, which differ between the parts of a feature split by cell boundaries
+_IDENTITY_FIELDS = {"RCID", "PRIM", "GRUP", "OBJL", "RVER", "AGEN", "FIDN", "FIDS", "LNAM", "LNAM_REFS", "FFPT_RIND",
+                    "SORDAT", "SORIND", "RECDAT", "RECIND"}
+
+
+def write_shapefile(shapefile_output_path: str, epsg: str, schema: dict, geometries: list[shapely.Geometry],
+                    properties: list[dict]) -> None:
+    """
+    Writes features to a shapefile. List attributes, not supported by shapefiles, are written as
+    comma-separated strings. A layer without features is written as an empty shapefile, as with
+    ogr2ogr, so that it is recorded as built.
+
+    :param shapefile_output_path: path of the written shapefile
+    :param epsg: EPSG code of the coordinate reference system of the geometries
+    :param schema: properties schema of the features
+    :param geometries: geometries of the features
+    :param properties: properties of the features
+    :return: None
+    """
+    Path(shapefile_output_path).parent.mkdir(parents=True, exist_ok=True)
+    lists = {name for name, field_type in schema.items() if field_type.startswith("List")}
+    schema = {name: "str" if name in lists else field_type for name, field_type in schema.items()}
+    types = {geometry.geom_type for geometry in geometries}
+    if not types:
+        geometry_type, compatible = "Unknown", ()
+    elif types <= set(_POLYGONAL):
+        geometry_type, compatible = ("MultiPolygon" if "MultiPolygon" in types else "Polygon"), _POLYGONAL
+    elif types <= set(_LINEAR):
+        geometry_type, compatible = ("MultiLineString" if "MultiLineString" in types else "LineString"), _LINEAR
+    else:
+        geometry_type = geometries[0].geom_type
+        compatible = (geometry_type,)
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=RuntimeWarning)
+        with fiona.open(shapefile_output_path, "w", driver="ESRI Shapefile", crs=epsg,
+                        schema={"geometry": geometry_type, "properties": schema}) as sink:
+            sink.writerecords(
+                {"geometry": mapping(geometry),
+                 "properties": {name: ",".join(map(str, value)) if name in lists and value is not None else value
+                                for name, value in values.items()}}
+                for geometry, values in zip(geometries, properties) if geometry.geom_type in compatible
+            )
+
+
+def depth_bins(depths: list[int], properties: list[dict]) -> np.ndarray:
+    """
+    :param depths: depths of the bins in ascending order
+    :param properties: properties of DEPARE features
+    :return: index of the bin of every feature, the deepest one whose depth does not exceed its DRVAL1,
+        -1 for features shallower than all bins or without DRVAL1
+    """
+    drval1 = np.array([np.nan if values.get("DRVAL1") is None else values["DRVAL1"] for values in properties],
+                      dtype=np.float64)
+    bins = np.searchsorted(np.asarray(depths, dtype=np.float64), drval1, side="right") - 1
+    bins[np.isnan(drval1)] = -1
+    return bins
+
+
+def write_depth_bins(depths: list[int], shapefile_output_paths: list[str], epsg: str, schema: dict,
+                     geometries: list[shapely.Geometry], properties: list[dict]) -> list[int]:
+    """
+    Writes DEPARE features to one shapefile per depth bin: a feature belongs to the deepest bin whose
+    depth does not exceed its DRVAL1, as with one 'DRVAL1 >= depth AND DRVAL1 < next depth' query per bin.
+
+    :param depths: depths of the bins in ascending order
+    :param shapefile_output_paths: paths of the written shapefiles, one per bin, None for bins not to write
+    :param epsg: EPSG code of the coordinate reference system of the geometries
+    :param schema: properties schema of the features
+    :param geometries: geometries of the features
+    :param properties: properties of the features
+    :return: number of written features per bin
+    """
+    bins = depth_bins(depths, properties)
+    counts = []
+    for index, output_path in enumerate(shapefile_output_paths):
+        selected = np.flatnonzero(bins == index)
+        if output_path is None:
+            counts.append(0)
+            continue
+        write_shapefile(output_path, epsg, schema, [geometries[i] for i in selected],
+                        [properties[i] for i in selected])
+        counts.append(len(selected))
+    return counts
+
+
+class S57CellReader:
+    """
+    Reads layers of an S57 cell (or any vector data set readable by fiona) within the process,
+    reprojecting and clipping their features in memory, instead of running ogr2ogr for every layer.
+
+    Each layer is read once: only the features intersecting the bounding box are read, their
+    coordinates are reprojected in a single vectorized call and they are clipped to the bounding
+    box at once. DEPARE features are read once and distributed into every depth bin.
+
+    :param path: path of the S57 cell (.000 file)
+    :param epsg: EPSG code of the target coordinate reference system, e.g. 'epsg:32633'
+    :param bounding_box: tuple of (xmin, ymin, xmax, ymax) in the target coordinate reference system
+    """
+    def __init__(self, path: str, epsg: str, bounding_box: tuple[int, int, int, int]):
+        self.path = path
+        self.epsg = epsg.upper()
+        self.bounding_box = bounding_box
+        try:
+            self.layers = set(fiona.listlayers(path))
+        except fiona.errors.FionaError as error:
+            raise ValueError(f"Unable to open S57 cell {path} \n{error}") from None
+
+    def read_layer(self, layer: str) -> tuple[dict, list[shapely.Geometry], list[dict]]:
+        """
+        Reads the features of a layer intersecting the bounding box. Invalid geometries are repaired
+        before clipping, and features left empty by the repair are dropped.
+
+        :param layer: name of the layer, e.g. 'LNDARE'
+        :return: tuple of properties schema, reprojected and clipped geometries and their properties
+        """
+        if layer not in self.layers:
+            print(f"Warning: {layer} not found in data set.")
+            return {}, [], []
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=RuntimeWarning)
+            with fiona.open(self.path, layer=layer) as source:
+                transformer = Transformer.from_crs(source.crs or "EPSG:4326", self.epsg, always_xy=True)
+                bounds = transformer.transform_bounds(*self.bounding_box, direction="INVERSE")
+                features = [feature for feature in source.filter(bbox=bounds) if feature.geometry is not None]
+                schema = dict(source.schema["properties"])
+        if not features:
+            return schema, [], []
+        geometries = np.array([shape(feature.geometry) for feature in features], dtype=object)
+        geometries = shapely.transform(geometries, lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])))
+        # invalid source polygons, e.g. self-intersecting rings, would make the intersection fail for the whole layer
+        geometries = repair(geometries)
+        clipped = shapely.intersection(geometries, shapely.box(*self.bounding_box))
+        kept = ~shapely.is_empty(clipped)
+        geometries = [self._same_dimension(clipped, original)
+                      for clipped, original in zip(clipped[kept], geometries[kept])]
+        properties = [dict(feature.properties) for feature, keep in zip(features, kept) if keep]
+        return schema, geometries, properties
+
+    def convert_layer(self, layer: str, shapefile_output_path: str) -> tuple[int, str]:
+        """
+        Converts a layer to a shapefile.
+
+        :param layer: name of the layer, e.g. 'LNDARE'
+        :param shapefile_output_path: path of the written shapefile
+        :return: tuple of the number of written features and the fingerprint of their content
+        """
+        schema, geometries, properties = self.read_layer(layer)
+        write_shapefile(shapefile_output_path, self.epsg, schema, geometries, properties)
+        return len(geometries), fingerprint(geometries, properties)
+
+    def convert_depths(self, depths: list[int], shapefile_output_paths: list[str]) -> tuple[list[int], list[str]]:
+        """
+        Converts the DEPARE layer to one shapefile per depth bin in a single pass, see write_depth_bins.
+
+        :param depths: depths of the bins in ascending order
+        :param shapefile_output_paths: paths of the written shapefiles, one per bin, None for bins not to write
+        :return: tuple of the number of written features and the fingerprint of their content per bin
+        """
+        schema, geometries, properties = self.read_layer("DEPARE")
+        counts = write_depth_bins(depths, shapefile_output_paths, self.epsg, schema, geometries, properties)
+        bins = depth_bins(depths, properties)
+        fingerprints = []
+        for index in range(len(depths)):
+            selected = np.flatnonzero(bins == index)
+            fingerprints.append(fingerprint([geometries[i] for i in selected], [properties[i] for i in selected]))
+        return counts, fingerprints
+
+    def coverage(self) -> shapely.Geometry:
+        """
+        :return: area covered by data in the cell (M_COVR with CATCOV 1), or the extent of its features
+            if the cell has no coverage record, in the target coordinate reference system
+        """
+        layer = "M_COVR" if "M_COVR" in self.layers else None
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=RuntimeWarning)
+            if layer is not None:
+                with fiona.open(self.path, layer=layer) as source:
+                    transformer = Transformer.from_crs(source.crs or "EPSG:4326", self.epsg, always_xy=True)
+                    covered = [shape(feature.geometry) for feature in source
+                               if feature.geometry is not None and feature.properties.get("CATCOV", 1) == 1]
+                if covered:
+                    covered = shapely.union_all(covered)
+                    if transformer.source_crs.is_geographic:
+                        # edges of cells follow meridians and parallels, which are curved once projected
+                        covered = shapely.segmentize(covered, _COVERAGE_SEGMENT)
+                    return shapely.transform(covered, lambda xy: np.column_stack(
+                        transformer.transform(xy[:, 0], xy[:, 1])))
+            bounds = []
+            for name in self.layers:
+                with fiona.open(self.path, layer=name) as source:
+                    if len(source):
+                        transformer = Transformer.from_crs(source.crs or "EPSG:4326", self.epsg, always_xy=True)
+                        bounds.append(transformer.transform_bounds(*source.bounds))
+        if not bounds:
+            return shapely.Polygon()
+        bounds = np.array(bounds)
+        return shapely.box(*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0))
+
+    def usage_band(self) -> int:
+        """
+        :return: navigational purpose of the cell, from 1 (overview) to 6 (berthing), read from the
+            DSID_INTU field of the data set identification record or the third character of the cell name
+        """
+        if "DSID" in self.layers:
+            with fiona.open(self.path, layer="DSID") as source:
+                for feature in source:
+                    band = feature.properties.get("DSID_INTU")
+                    if band:
+                        return int(band)
+        name = Path(self.path).stem
+        return int(name[2]) if len(name) > 2 and name[2].isdigit() else 0
+
+    @staticmethod
+    def _same_dimension(clipped: shapely.Geometry, original: shapely.Geometry) -> shapely.Geometry:
+        """
+        :param clipped: clipped geometry, possibly a collection when a feature touches the bounding box
+        :param original: geometry before clipping
+        :return: parts of the clipped geometry of the same dimension as the original one
+        """
+        if clipped.geom_type != "GeometryCollection":
+            return clipped
+        dimension = shapely.get_dimensions(original)
+        parts = [part for part in shapely.get_parts(clipped) if shapely.get_dimensions(part) == dimension]
+        if not parts:
+            return clipped
+        return shapely.union_all(parts) if len(parts) > 1 else parts[0]
+
+
+def scan_cell(path: str, epsg: str) -> tuple[int, bytes]:
+    """
+    Reads the usage band and coverage of a cell. Executed by the worker processes.
+
+    :param path: path of the S57 cell
+    :param epsg: EPSG code of the target coordinate reference system
+    :return: tuple of usage band and coverage as WKB
+    """
+    reader = S57CellReader(path, epsg, (0, 0, 0, 0))
+    return reader.usage_band(), shapely.to_wkb(reader.coverage())
+
+
+def read_cell(path: str, epsg: str, bounding_box: tuple[int, int, int, int], layers: list[str]) -> dict:
+    """
+    Reads layers of a cell for a multi-cell build. Executed by the worker processes, geometries are
+    returned as WKB as they are much cheaper to pickle.
+
+    :param path: path of the S57 cell
+    :param epsg: EPSG code of the target coordinate reference system
+    :param bounding_box: tuple of (xmin, ymin, xmax, ymax) in the target coordinate reference system
+    :param layers: names of the layers to be read
+    :return: dict of (schema, WKB geometries, properties) keyed by layer name
+    """
+    reader = S57CellReader(path, epsg, bounding_box)
+    result = {}
+    for layer in layers:
+        schema, geometries, properties = reader.read_layer(layer)
+        result[layer] = schema, shapely.to_wkb(np.array(geometries, dtype=object)).tolist(), properties
+    return result
+
+
+def merge_cells(cells: list[tuple[int, shapely.Geometry, dict]],
+                layer: str) -> tuple[dict, list[shapely.Geometry], list[dict]]:
+    """
+    Merges a layer read from several cells. Where cells overlap, features of the most detailed usage
+    band are kept and features of less detailed cells are cut away from its coverage. Features split
+    by cell boundaries are then dissolved back: features touching a seam between the areas kept from
+    two cells are unioned with the touching features of the same attributes (apart from record
+    identifiers), polygons and lines being split into their parts again. Features away from seams are
+    kept as they are.
+
+    :param cells: list of (usage band, coverage, layers read by read_cell) tuples
+    :param layer: name of the merged layer
+    :return: tuple of properties schema, merged geometries and their properties
+    """
+    schema, geometries, properties = {}, [], []
+    covered = shapely.Polygon()
+    regions = []
+    for band in sorted({cell[0] for cell in cells}, reverse=True):
+        band_cells = [cell for cell in cells if cell[0] == band]
+        for _, coverage, layers in band_cells:
+            regions.append(coverage if covered.is_empty else shapely.difference(coverage, covered))
+            cell_schema, wkb, cell_properties = layers.get(layer, ({}, [], []))
+            for name, field_type in cell_schema.items():
+                schema.setdefault(name, field_type)
+            if not wkb:
+                continue
+            cell_geometries = shapely.from_wkb(wkb)
+            if not covered.is_empty:
+                cell_geometries = shapely.difference(cell_geometries, covered)
+            kept = np.flatnonzero(~shapely.is_empty(cell_geometries))
+            geometries += cell_geometries[kept].tolist()
+            properties += [cell_properties[i] for i in kept]
+        covered = shapely.union_all([covered] + [coverage for _, coverage, _ in band_cells])
+        shapely.prepare(covered)
+    if len(cells) < 2 or not geometries:
+        return schema, geometries, properties
+    return schema, *_dissolve_seams(geometries, properties, _seams(regions))
+
+
+def _seams(regions: list[shapely.Geometry]) -> shapely.Geometry:
+    """
+    :param regions: areas where the features of each cell were kept
+    :return: parts of the boundaries of the regions lying along the region of another cell
+    """
+    tree = shapely.STRtree(regions)
+    seams = []
+    for index, region in enumerate(regions):
+        neighbours = [other for other in tree.query(region, predicate="dwithin", distance=_SEAM_DISTANCE) if other != index]
+        if neighbours:
+            others = shapely.buffer(shapely.union_all([regions[other] for other in neighbours]), _SEAM_DISTANCE)
+            seams.append(shapely.intersection(shapely.boundary(region), others))
+    return shapely.union_all(seams) if seams else shapely.LineString()
+
+
+def _dissolve_seams(geometries: list[shapely.Geometry], properties: list[dict],
+                    seams: shapely.Geometry) -> tuple[list[shapely.Geometry], list[dict]]:
+    array = np.array(geometries, dtype=object)
+    touching = shapely.dwithin(array, seams, _SEAM_DISTANCE)
+    groups: dict[tuple, list[int]] = {}
+    merged_geometries, merged_properties = [], []
+    for index, values in enumerate(properties):
+        dimension = shapely.get_dimensions(geometries[index])
+        if dimension == 0 or not touching[index]:
+            merged_geometries.append(geometries[index])
+            merged_properties.append(values)
+            continue
+        key = tuple(sorted((name, str(value)) for name, value in values.items() if name not in _IDENTITY_FIELDS))
+        groups.setdefault((dimension, key), []).append(index)
+    for (dimension, _), indices in groups.items():
+        if len(indices) == 1:
+            merged_geometries.append(geometries[indices[0]])
+            merged_properties.append(properties[indices[0]])
+            continue
+        # coordinates are snapped to a centimetre grid, so that edges shared by two cells match exactly
+        merged = shapely.union_all(array[indices], grid_size=_SEAM_GRID)
+        if dimension == 1:
+            merged = shapely.line_merge(merged)
+        for part in shapely.get_parts(merged).tolist():
+            # each part keeps the attributes of the first feature it was dissolved from
+            source = indices[int(np.argmax(shapely.intersects(array[indices], part)))]
+            merged_geometries.append(part)
+            merged_properties.append(properties[source])
+    return merged_geometries, merged_properties
@@ -0,0 +1,104 @@
+"""
+Contains the S57UpdateState class tracking the S57 update files applied to the shapefile cache.
+"""
+import hashlib
+import json
+import warnings
+from pathlib import Path
+
+import fiona
+import shapely
+
+
+def find_updates(cell: Path) -> list[Path]:
+    """
+    :param cell: path of an S57 base cell (.000 file)
+    :return: paths of its update files (.001, .002...), in application order
+    """
+    updates = [path for path in cell.parent.glob(cell.stem + ".*")
+               if path.suffix[1:].isdigit() and int(path.suffix[1:]) > 0]
+    return sorted(updates, key=lambda path: int(path.suffix[1:]))
+
+
+def touched_layers(updates: list[Path]) -> set[str] | None:
+    """
+    Lists the object classes (layers) holding records of update files, by opening them on their own
+    without applying them to their base cell.
+
+    :param updates: paths of update files
+    :return: names of the touched layers, None if an update file could not be read, in which case
+        every layer has to be checked
+    """
+    layers = set()
+    with fiona.Env(OGR_S57_OPTIONS="UPDATES=IGNORE"):
+        for update in updates:
+            try:
+                layers.update(fiona.listlayers(str(update)))
+            except fiona.errors.FionaError:
+                return None
+    # metadata records do not change the content of the converted layers
+    return {layer for layer in layers if layer not in ("DSID", "M_COVR")}
+
+
+def fingerprint(geometries: list[shapely.Geometry], properties: list[dict]) -> str:
+    """
+    :param geometries: geometries of the features of a layer
+    :param properties: properties of the features
+    :return: digest of the content of the layer, independent of the order of its features
+    """
+    digests = sorted(hashlib.blake2b(shapely.to_wkb(geometry) + repr(sorted(values.items())).encode(),
+                                     digest_size=16).digest()
+                     for geometry, values in zip(geometries, properties))
+    return hashlib.blake2b(b"".join(digests), digest_size=16).hexdigest()
+
+
+class S57UpdateState:
+    """
+    State of the shapefile cache of an S57 map: the update files already applied to every cell and
+    a fingerprint of the content of every converted shapefile. When new update files appear, only
+    the layers they touch are read again, and only the shapefiles whose fingerprint changed are
+    written and loaded again.
+
+    :param path: path of the JSON state file
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.cells: dict[str, list[str]] = {}
+        self.fingerprints: dict[str, str] = {}
+        if path.exists():
+            try:
+                state = json.loads(path.read_text())
+                self.cells = state.get("cells", {})
+                self.fingerprints = state.get("fingerprints", {})
+            except (OSError, ValueError) as error:
+                warnings.warn(f"Unable to read S57 update state {path}: {error}")
+
+    def new_updates(self, cells: list[Path]) -> dict[Path, list[Path]]:
+        """
+        :param cells: paths of the base cells
+        :return: update files not applied yet, keyed by cell
+        """
+        updates = {}
+        for cell in cells:
+            applied = set(self.cells.get(cell.name, []))
+            new = [update for update in find_updates(cell) if update.name not in applied]
+            if new:
+                updates[cell] = new
+        return updates
+
+    def record_cells(self, cells: list[Path]) -> None:
+        """
+        Marks all current update files of the cells as applied.
+
+        :param cells: paths of the base cells
+        :return: None
+        """
+        for cell in cells:
+            self.cells[cell.name] = [update.name for update in find_updates(cell)]
+
+    def save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({"cells": self.cells, "fingerprints": self.fingerprints}, indent=1))
+        except OSError as error:
+            warnings.warn(f"Unable to write S57 update state {self.path}: {error}")
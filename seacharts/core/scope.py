@@ -56,6 +56,9 @@ class Scope:
         else:
             self.time = None
 
+        # Settings of the conversion of resources into shapefiles
+        self.build: dict = settings["enc"].get("build", {})
+
         # Set weather data sources and any extra S57 layers
         self.weather = settings["enc"].get("weather", [])
         self.extra_layers:dict[str,str] = settings["enc"].get("S57_layers", {})
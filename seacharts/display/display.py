@@ -2,6 +2,7 @@
 Contains the Display class for displaying and plotting maritime spatial data.
 """
 import math
+from bisect import bisect_right
 import threading
 import tkinter as tk
 from pathlib import Path
@@ -17,6 +18,7 @@ from cartopy.crs import UTM
 from matplotlib.gridspec import GridSpec
 from matplotlib_scalebar.scalebar import ScaleBar
 import sys
+from datetime import datetime
 
 from .colors import assign_custom_colors
 import seacharts.environment as env
@@ -49,6 +51,8 @@ class Display:
                        southern_hemisphere=environment.scope.extent.southern_hemisphere)
         self._bbox = self._set_bbox(environment)
         self._environment = environment
+        self._playback_time = None
+        self._playback_paused = False
         self._background = None
         self._dark_mode = False
         self._colorbar_mode = False
@@ -74,9 +78,22 @@ class Display:
 
         if self._settings["enc"].get("ais") is not None and self._settings["enc"].get("ais").get("colors") is not None:
             assign_custom_colors(self._settings["enc"]["ais"]["colors"])
-        if self._settings["enc"].get("ais") is not None and self._settings["enc"].get("ais").get("module") == "live":
+        if self._settings["enc"].get("ais") is not None and self._settings["enc"].get("ais").get("module") in ("live", "replay"):
             interval = self._settings["enc"]["ais"]["interval"] if self._settings["enc"]["ais"].get("interval") is not None else 60
+            if self._settings["enc"]["ais"].get("dead_reckoning", {}).get("render_interval") is not None:
+                # intermediate frames are dead-reckoned between snapshots
+                interval = self._settings["enc"]["ais"]["dead_reckoning"]["render_interval"]
+            if self._settings["enc"]["ais"].get("module") == "replay":
+                # intervals are given in simulated time
+                interval /= self._settings["enc"]["ais"].get("replay_speed", 1)
             self._animation = FuncAnimation(self.figure, self.update_ais, interval=interval*1000, blit=True, cache_frame_data=False)
+        elif self._settings["enc"].get("ais") is not None and self._settings["enc"]["ais"].get("module") == "db" \
+                and self._settings["enc"]["ais"].get("playback") is not None:
+            playback = self._settings["enc"]["ais"]["playback"]
+            self._playback_time = self._environment.scope.time.epoch_times[0]
+            self._playback_paused = not playback.get("autoplay", True)
+            interval = playback.get("frame_interval", 0.5)
+            self._animation = FuncAnimation(self.figure, self.update_playback, interval=interval*1000, blit=True, cache_frame_data=False)
         
         
         
@@ -518,6 +535,33 @@ class Display:
         self.add_vessels(*ships)
         return self.features.animated
 
+    def update_playback(self, frame=None) -> list:
+        """
+        Advance the database playback by one frame, vessels are interpolated between
+        the two slider timestamps bracketing the playback time
+        :return: list of artists to be animated
+        """
+        if self._playback_paused:
+            return self.features.animated
+        playback = self._settings["enc"]["ais"]["playback"]
+        epoch_times = self._environment.scope.time.epoch_times
+        self._playback_time += playback.get("frame_interval", 0.5) * playback.get("speed", 60)
+        if self._playback_time > epoch_times[-1]:
+            self._playback_time = epoch_times[0]
+        self.features.static_info_data = []
+        ships = self._environment.ais.interpolate(datetime.fromtimestamp(self._playback_time))
+        self.add_vessels(*ships)
+        if getattr(self, "slider", None) is not None:
+            index = bisect_right(epoch_times, self._playback_time) - 1
+            if index != self.slider.val:
+                self.slider.set_val(index)
+        return self.features.animated
+
+    def _toggle_playback(self):
+        if self._playback_time is None:
+            return
+        self._playback_paused = not self._playback_paused
+
     def update_plot(self):
         """
         Update only the animated artists of the plot
@@ -737,7 +781,7 @@ class Display:
         return plt.fignum_exists(self.figure.number)
 
     def _terminate(self,event = None):
-        if self._settings["enc"].get("ais") is not None and self._settings["enc"].get("ais").get("module") == "live" and self._animation is not None:
+        if self._settings["enc"].get("ais") is not None and self._settings["enc"].get("ais").get("module") in ("live", "replay") and self._animation is not None:
             plt.pause(0.1)
             self._animation.event_source.stop()
 
@@ -769,10 +813,17 @@ class Display:
             nonlocal last_value
             if event.button == 1 and event.inaxes == ax_slider:
                 val = self.slider.val
-                if val != last_value:
+                # during a playback the slider follows the playback time, so its last value is not a reliable reference
+                if val != last_value or self._playback_time is not None:
                     self._weather_slider_handle(val)
                     last_value = val
-                    if self._settings["enc"].get("ais").get("module") == "db":
+                    if self._playback_time is not None:
+                        # playback continues from the selected timestamp
+                        self._playback_time = self._environment.scope.time.epoch_times[last_value]
+                        ships = self._environment.ais.interpolate(self._environment.scope.time.datetimes[last_value])
+                        self.add_vessels(*ships)
+                        self.redraw_plot()
+                    elif self._settings["enc"].get("ais").get("module") == "db":
                         ships = self._environment.get_db_data_fun(self._environment.scope.time.datetimes[last_value])
                         self.add_vessels(*ships)
                         self.redraw_plot()
@@ -131,6 +131,9 @@ class EventsManager:
         elif event.key == "S":
             self._display._save_figure("high_res", scale=10.0)
 
+        elif event.key == " ":
+            self._display._toggle_playback()
+
         elif event.key == "shift":
             self._shift_pressed = True
 
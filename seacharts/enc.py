@@ -2,8 +2,10 @@
 Contains the ENC class for reading, storing and plotting maritime spatial data.
 """
 import _warnings
+from datetime import datetime
 from pathlib import Path
 from shapely.geometry import Point, Polygon
+from shapely.geometry.base import BaseGeometry
 from seacharts.core import Config
 from seacharts.display import Display
 from seacharts.environment import Environment
@@ -67,6 +69,23 @@ class ENC:
             _warnings.warn(f"Couldn't find any value for parameter {param_name} in layer {layer_name}")
         return None
 
+    def get_vessels_in_area(self, area: str | BaseGeometry, time_start: datetime,
+                            time_end: datetime) -> list[tuple[int, float, float]]:
+        """
+        Finds the vessels of the AIS history that were inside an area during a period (database mode only).
+
+        :param area: name of a layer (e.g. an extra layer such as 'CTNARE') or a geometry in the ENC coordinate system
+        :param time_start: start of the period
+        :param time_end: end of the period
+        :return: list of visits with format (mmsi, entry time, exit time), times as epoch seconds
+        """
+        if isinstance(area, str):
+            layer = self._environment.get_layer_by_name(area)
+            if layer is None:
+                raise ValueError(f"Layer {area} not found")
+            area = layer.geometry
+        return self._environment.ais.get_vessels_in_area(area, time_start, time_end)
+
     def update(self) -> None:
         """
         Update ENC with spatial data parsed from user-specified resources
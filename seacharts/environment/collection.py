@@ -68,16 +68,50 @@ class ShapefileBasedCollection(DataCollection, ABC):
 
     :param scope: The scope object defining the context and extent of the data collection.
     :param parser: The DataParser instance responsible for parsing the spatial data.
+    :param empty_labels: Labels of the regions built from the current inputs that hold no features.
     """
+    empty_labels: set[str] = field(default_factory=set, init=False)
+
+    @property
+    def not_loaded_regions(self) -> list[Layer]:
+        """
+        Retrieves the regions that have not been loaded or contain no geometry, except those
+        whose up to date shapefile is empty, so that they are not rebuilt on every start.
+
+        :return: A list of Layer instances that are empty.
+        """
+        return [layer for layer in super().not_loaded_regions if layer.label not in self.empty_labels]
+
+    @property
+    def empty_regions(self) -> list[Layer]:
+        """
+        Retrieves the regions built from the current inputs that hold no features.
+
+        :return: A list of empty Layer instances with an up to date shapefile.
+        """
+        return [layer for layer in self.layers if layer.label in self.empty_labels]
+
     def load_existing_shapefiles(self) -> None:
         """
         Loads existing shapefiles for the featured regions using the specified parser.
+        Shapefiles built from other inputs than the current ones (source files, bounding box,
+        depth bins...) according to the build manifest are not loaded, so that they are rebuilt.
 
         If any spatial data is found, it prints a confirmation message; 
         otherwise, it indicates that no data was found.
         """
+        manifest = self.parser.manifest
         for region in self.featured_regions:
-            self.parser.load_shapefiles(region)
+            if manifest.is_current(region.label, self.parser.layer_inputs(region)):
+                self.parser.load_shapefiles(region)
+                if region.geometry.is_empty:
+                    self.empty_labels.add(region.label)
+            elif self.parser._shapefile_path(region.label).exists():
+                if region.label in manifest.layers:
+                    changes = ", ".join(manifest.changes(region.label, self.parser.layer_inputs(region)))
+                    print(f"INFO: {region.name} is outdated ({changes} changed), it will be rebuilt.")
+                else:
+                    print(f"INFO: {region.name} has no build record, it will be rebuilt.")
         if self.loaded:
             print("INFO: ENC created using data from existing shapefiles.\n")
         else:
@@ -89,11 +123,23 @@ class ShapefileBasedCollection(DataCollection, ABC):
 
         This method utilizes the parser to process the resources defined in the scope 
         and updates the ENC based on the results. It prints a completion message 
-        based on the loading status of the regions.
+        based on the loading status of the regions. The inputs of the parsed regions
+        are recorded in the build manifest.
         """
-        self.parser.parse_resources(
-            self.not_loaded_regions, self.scope.resources, self.scope.extent.area
-        )
+        regions = self.not_loaded_regions
+        # outdated shapefiles must not be mistaken for rebuilt ones if a layer yields no data
+        for region in regions:
+            shapefile = self.parser._shapefile_path(region.label)
+            for path in shapefile.parent.glob(shapefile.stem + ".*"):
+                path.unlink()
+        self.parser.parse_resources(regions, self.scope.resources, self.scope.extent.area)
+        manifest = self.parser.manifest
+        for region in regions:
+            if self.parser._shapefile_path(region.label).exists():
+                manifest.record(region.label, self.parser.layer_inputs(region))
+                if region.geometry.is_empty:
+                    self.empty_labels.add(region.label)
+        manifest.save()
         if self.loaded:
             print("\nENC update complete.\n")
         else:
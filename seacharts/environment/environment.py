@@ -2,7 +2,7 @@
 Contains the Environment class for collecting and manipulating loaded spatial data.
 """
 import _warnings
-from seacharts.core import Scope, MapFormat, S57Parser, FGDBParser, DataParser, AISParser, AISLiveParser,AISDatabaseParser
+from seacharts.core import Scope, MapFormat, S57Parser, FGDBParser, DataParser, AISParser, AISLiveParser,AISDatabaseParser,AISReplayParser
 from .map import MapData
 from .weather import WeatherData
 from .extra import ExtraLayers
@@ -31,11 +31,16 @@ class Environment:
         self.extra_layers = ExtraLayers(self.scope, self.parser)
 
         self.map.load_existing_shapefiles()
+        if self.scope.type is MapFormat.S57:
+            self.extra_layers.load_existing_shapefiles()
+            # apply new S57 update files to the cached layers before converting missing ones
+            self.parser.update_resources(self.map.loaded_regions + self.map.empty_regions
+                                         + self.extra_layers.loaded_regions + self.extra_layers.empty_regions)
+
         if len(self.map.not_loaded_regions) > 0:
             self.map.parse_resources_into_shapefiles()
 
         if self.scope.type is MapFormat.S57:
-            self.extra_layers.load_existing_shapefiles()
             if len(self.extra_layers.not_loaded_regions) > 0:
                 self.extra_layers.parse_resources_into_shapefiles()
 
@@ -75,9 +80,9 @@ class Environment:
         """
         if self.scope.type is MapFormat.S57:
             return S57Parser(self.scope.extent.bbox, self.scope.resources,
-                             self.scope.extent.out_proj)
+                             self.scope.extent.out_proj, self.scope.build, self.scope.depths)
         elif self.scope.type is MapFormat.FGDB:
-            return FGDBParser(self.scope.extent.bbox, self.scope.resources)
+            return FGDBParser(self.scope.extent.bbox, self.scope.resources, self.scope.build)
         else:
             raise ValueError("Unsupported map format")
         
@@ -85,6 +90,8 @@ class Environment:
     def set_ais_parser(self, settings: dict) -> AISParser:
         if settings.get("module") == "live":
             return AISLiveParser(self.scope)
+        if settings.get("module") == "replay":
+            return AISReplayParser(self.scope)
         if(settings.get("module") == "db"):
             return AISDatabaseParser(self.scope)
         return AISParser(self.scope)
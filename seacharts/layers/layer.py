@@ -4,12 +4,15 @@ Contains the Layer class and depth-specific types for layered spatial data.
 from abc import ABC
 from dataclasses import dataclass, field
 
+import numpy as np
+import shapely
 from shapely import geometry as geo
 from shapely.geometry import base as geobase, Polygon, Point
 from shapely.ops import unary_union
 
 from seacharts.layers.types import ZeroDepth, SingleDepth, MultiDepth
 from seacharts.shapes import Shape
+from seacharts.shapes.union import partitioned_union, repair
 
 
 @dataclass
@@ -23,10 +26,16 @@ class Layer(Shape, ABC):
 
     :param geometry: The geometry of the layer, defaulting to an empty MultiPolygon.
     :param depth: An optional depth associated with the layer.
+    :param records: Records the geometry was unified from, as read from a shapefile.
+    :param record_geometries: Geometries of the features the geometry was unified from, when loaded
+        in bulk instead of as records.
+    :param record_properties: Attributes of these features, by column.
     """
     geometry: geobase.BaseMultipartGeometry = field(default_factory=geo.MultiPolygon)
     depth: int = None
     records: list[dict] = None
+    record_geometries: np.ndarray = None
+    record_properties: dict[str, list] = None
     
     @property
     def label(self) -> str:
@@ -37,15 +46,23 @@ class Layer(Shape, ABC):
         """
         return self.name.lower()
 
-    def _geometries_to_multi(self, multi_geoms, geometries, geo_class):
+    def _geometries_to_multi(self, multi_geoms, geometries, geo_class, chunk_size: int = 0,
+                             workers: int | None = None):
         """
         Combines geometries into a single MultiGeometry.
 
         :param multi_geoms: A list of MultiGeometries to combine.
         :param geometries: A list of geometries to add to the MultiGeometry.
         :param geo_class: The class type for the resulting geometry (MultiPolygon or MultiLineString).
+        :param chunk_size: If set, more geometries than this are unioned in spatial partitions of this size.
+        :param workers: Number of processes unioning the partitions, see partitioned_union.
         :return: A unified geometry of the specified type.
         """
+        if chunk_size and len(geometries) + len(multi_geoms) > chunk_size:
+            geom = partitioned_union(geometries + multi_geoms, chunk_size, workers)
+            if not isinstance(geom, geo_class):
+                geom = geo_class([geom])
+            return geom
         if len(geometries):
             geometries = self.as_multi(geometries)
             multi_geoms.append(geometries)
@@ -54,7 +71,7 @@ class Layer(Shape, ABC):
             geom = geo_class([geom])
         return geom
 
-    def records_as_geometry(self, records: list[dict]) -> None:
+    def records_as_geometry(self, records: list[dict], chunk_size: int = 0, workers: int | None = None) -> None:
         """
         Converts a list of geometric data records into geometries for the layer.
 
@@ -67,6 +84,8 @@ class Layer(Shape, ABC):
                         dictionary is expected to contain information necessary for 
                         constructing a geometry, which is handled by the 
                         _record_to_geometry method.
+        :param chunk_size: If set, more geometries than this are unioned in spatial partitions of this size.
+        :param workers: Number of processes unioning the partitions, see partitioned_union.
 
         The method distinguishes between different types of geometries:
         - Polygons and MultiPolygons are stored for area representations.
@@ -99,21 +118,75 @@ class Layer(Shape, ABC):
                     multi_linestrings.append(geom_tmp) # For multiple linear geometries
 
             if len(geometries) + len(multi_geoms) > 0:
-                self.geometry = self._geometries_to_multi(multi_geoms, geometries, geo.MultiPolygon)
+                self.geometry = self._geometries_to_multi(multi_geoms, geometries, geo.MultiPolygon,
+                                                          chunk_size, workers)
 
             elif len(linestrings) + len(multi_linestrings) > 0:
-                self.geometry = self._geometries_to_multi(multi_linestrings, linestrings, geo.MultiLineString)
+                self.geometry = self._geometries_to_multi(multi_linestrings, linestrings, geo.MultiLineString,
+                                                          chunk_size, workers)
         
-    def unify(self, records: list[dict]) -> None:
+    def arrays_as_geometry(self, geometries: np.ndarray, properties: dict[str, np.ndarray],
+                           chunk_size: int = 0, workers: int | None = None) -> None:
+        """
+        Converts arrays of geometries and attribute columns, as read in bulk, into the layer's geometry.
+        Counterpart of records_as_geometry without a Python object per record: polygons are unified into
+        a MultiPolygon, or lines into a MultiLineString if there are no polygons, and the features are
+        kept in record_geometries and record_properties instead of records.
+
+        :param geometries: An array of geometries.
+        :param properties: Attribute columns of the geometries.
+        :param chunk_size: If set, more geometries than this are unioned in spatial partitions of this size.
+        :param workers: Number of processes unioning the partitions, see partitioned_union.
+        """
+        types = shapely.get_type_id(geometries)
+        if np.isin(types, (3, 6)).any():
+            self.geometry = self._geometries_to_multi(list(geometries[types == 6]), list(geometries[types == 3]),
+                                                      geo.MultiPolygon, chunk_size, workers)
+        elif np.isin(types, (1, 5)).any():
+            self.geometry = self._geometries_to_multi(list(geometries[types == 5]), list(geometries[types == 1]),
+                                                      geo.MultiLineString, chunk_size, workers)
+        self.records = None
+        self.record_geometries = geometries
+        self.record_properties = properties
+
+    def unify(self, records: list[dict], chunk_size: int = 0, workers: int | None = None,
+              bounding_box: tuple[int, int, int, int] | None = None) -> None:
         """
         Unifies geometries from a list of records into the layer's geometry.
 
         :param records: A list of dictionaries representing geometrical data.
+        :param chunk_size: If set, more geometries than this are unioned in spatial partitions of this size.
+        :param workers: Number of processes unioning the partitions, see partitioned_union.
+        :param bounding_box: If given, geometries are clipped to (xmin, ymin, xmax, ymax) before the union,
+            so that features extending far outside of it only bring their vertices inside into the union.
+        """
+        geometries = np.array([self._record_to_geometry(r) for r in records], dtype=object)
+        self.unify_geometries(geometries, chunk_size, workers, bounding_box)
+
+    def unify_geometries(self, geometries: np.ndarray, chunk_size: int = 0, workers: int | None = None,
+                         bounding_box: tuple[int, int, int, int] | None = None) -> None:
+        """
+        Unifies an array of geometries into the layer's geometry, see unify.
+
+        :param geometries: An array of geometries.
+        :param chunk_size: If set, more geometries than this are unioned in spatial partitions of this size.
+        :param workers: Number of processes unioning the partitions, see partitioned_union.
+        :param bounding_box: If given, geometries are clipped to (xmin, ymin, xmax, ymax) before the union.
         """
-        geometries = [self._record_to_geometry(r) for r in records]
-        self.geometry = self.collect(geometries)
+        if bounding_box is not None and len(geometries):
+            geometries = shapely.clip_by_rect(repair(geometries), *bounding_box)
+            geometries = geometries[~shapely.is_empty(geometries)]
+        self.geometry = self.collect(geometries, chunk_size, workers)
 
     def get_params_at_coord(self, easting: int, northing: int) -> dict | None:
+        if self.record_geometries is not None:
+            polygons = np.flatnonzero(shapely.get_type_id(self.record_geometries) == 3)
+            shells = shapely.polygons(shapely.get_exterior_ring(self.record_geometries[polygons]))
+            inside = polygons[shapely.contains_xy(shells, easting, northing)]
+            if not len(inside):
+                return None
+            values = {name: column[inside[0]] for name, column in self.record_properties.items()}
+            return {name: value.item() if isinstance(value, np.generic) else value for name, value in values.items()}
         point = Point(easting, northing)
         for record in self.records:
             if record['geometry']['type'] == 'Polygon' and Polygon(record['geometry']['coordinates'][0]).contains(point):
@@ -4,8 +4,12 @@ Contains the Shape base class for creating and manipulating shapes.
 from abc import ABC
 from dataclasses import dataclass
 from typing import Any
+
+import numpy as np
 from shapely import geometry as geo, ops
 
+from seacharts.shapes.union import partitioned_union, repair
+
 
 @dataclass
 class Shape(ABC):
@@ -56,9 +60,10 @@ class Shape(ABC):
             raise NotImplementedError(type(geometry))
 
     @staticmethod
-    def collect(geometries: list[Any]) -> Any:
-        if any(not g.is_valid for g in geometries):
-            geometries = [g.buffer(0) if not g.is_valid else g for g in geometries]
+    def collect(geometries: list[Any], chunk_size: int = 0, workers: int | None = None) -> Any:
+        if chunk_size and len(geometries) > chunk_size:
+            return partitioned_union(geometries, chunk_size, workers)
+        geometries = repair(np.asarray(geometries, dtype=object))
         geometry = ops.unary_union(geometries)
         if not geometry.is_valid:
             geometry = geometry.buffer(0)
@@ -0,0 +1,161 @@
+"""
+Contains functions computing the union of large sets of geometries in spatial partitions.
+"""
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+
+def repair(geometries: np.ndarray) -> np.ndarray:
+    """
+    Repairs invalid geometries with a zero-width buffer, in one vectorized call.
+
+    :param geometries: array of geometries
+    :return: array of valid geometries, the input array if all of them were valid
+    """
+    invalid = ~shapely.is_valid(geometries)
+    if invalid.any():
+        geometries = geometries.copy()
+        geometries[invalid] = shapely.buffer(geometries[invalid], 0)
+    return geometries
+
+
+def tiles(geometries: np.ndarray, chunk_size: int) -> np.ndarray:
+    """
+    Divides the extent of geometries into rectangular tiles holding about chunk_size geometries each.
+    The extent is cut into columns at quantiles of the eastings of the bounding box centres, and each
+    column into rows at quantiles of the northings of its geometries, so that dense areas get
+    smaller tiles.
+
+    :param geometries: array of geometries
+    :param chunk_size: number of geometries per tile
+    :return: array of tiles of shape (number of tiles, 4), with (xmin, ymin, xmax, ymax) rows
+    """
+    bounds = shapely.bounds(geometries)
+    x_min, y_min = np.nanmin(bounds[:, :2], axis=0)
+    x_max, y_max = np.nanmax(bounds[:, 2:], axis=0)
+    centre_x = (bounds[:, 0] + bounds[:, 2]) / 2
+    centre_y = (bounds[:, 1] + bounds[:, 3]) / 2
+    count = max(1, math.ceil(math.sqrt(len(geometries) / chunk_size)))
+    x_edges = np.unique(np.concatenate(([x_min], np.quantile(centre_x, np.linspace(0, 1, count + 1)[1:-1]), [x_max])))
+    column = np.clip(np.searchsorted(x_edges, centre_x, side="right") - 1, 0, len(x_edges) - 2)
+    result = []
+    for index in range(len(x_edges) - 1):
+        northings = centre_y[column == index]
+        if not len(northings):
+            continue
+        y_edges = np.unique(np.concatenate(([y_min], np.quantile(northings, np.linspace(0, 1, count + 1)[1:-1]),
+                                            [y_max])))
+        for bottom, top in zip(y_edges[:-1], y_edges[1:]):
+            result.append((x_edges[index], bottom, x_edges[index + 1], top))
+    return np.array(result)
+
+
+def _union_tile(task: tuple) -> bytes:
+    """
+    Unions the parts of geometries inside a tile, possibly in another process.
+
+    :param task: tuple of geometries as WKB and tile as (xmin, ymin, xmax, ymax)
+    :return: union as WKB
+    """
+    wkb, tile = task
+    return shapely.to_wkb(shapely.union_all(shapely.clip_by_rect(shapely.from_wkb(wkb), *tile)))
+
+
+def partitioned_union(geometries: list[BaseGeometry] | np.ndarray, chunk_size: int = 5000,
+                      workers: int | None = None) -> BaseGeometry:
+    """
+    Unions a large set of polygons tile by tile. The extent is divided into tiles of about chunk_size
+    polygons (see tiles), and the parts of the polygons inside every tile are unioned on their own.
+    Only the resulting polygons reaching a border between tiles have to be unioned again to dissolve
+    the seams, the others are kept as they are. Each tile union only holds the vertices of one part
+    of the extent, which lowers the peak memory of the union, and with workers set the tiles are
+    unioned concurrently on a pool of processes, geometries being sent as WKB.
+
+    Other geometry types, and sets of at most chunk_size polygons, are unioned at once.
+
+    :param geometries: geometries to union
+    :param chunk_size: number of polygons per tile
+    :param workers: number of processes unioning tiles, 0 for one per CPU, in-process if None
+    :return: valid union of the geometries
+    """
+    geometries = repair(np.asarray(geometries, dtype=object))
+    polygonal = np.isin(shapely.get_type_id(geometries), (3, 6)).all()
+    if len(geometries) <= chunk_size or not polygonal:
+        geometry = shapely.union_all(geometries)
+    else:
+        areas = tiles(geometries, chunk_size)
+        tree = shapely.STRtree(geometries)
+        selected = [tree.query(shapely.box(*tile)) for tile in areas]
+        if workers is None:
+            unions = [shapely.union_all(shapely.clip_by_rect(geometries[indices], *tile))
+                      for indices, tile in zip(selected, areas)]
+        else:
+            workers = min(workers or os.cpu_count() or 1, len(areas))
+            tasks = [(shapely.to_wkb(geometries[indices]), tuple(tile)) for indices, tile in zip(selected, areas)]
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                unions = list(shapely.from_wkb(list(executor.map(_union_tile, tasks))))
+        parts, tile_index = shapely.get_parts(unions, return_index=True)
+        polygons = shapely.get_type_id(parts) == 3
+        parts, tile_index = parts[polygons], tile_index[polygons]
+        part_bounds = shapely.bounds(parts)
+        tile_bounds = areas[tile_index]
+        extent = (areas[:, 0].min(), areas[:, 1].min(), areas[:, 2].max(), areas[:, 3].max())
+        # parts reaching a tile border inside the extent may continue in the neighbouring tile
+        seam = (((part_bounds[:, 0] <= tile_bounds[:, 0]) & (tile_bounds[:, 0] > extent[0]))
+                | ((part_bounds[:, 1] <= tile_bounds[:, 1]) & (tile_bounds[:, 1] > extent[1]))
+                | ((part_bounds[:, 2] >= tile_bounds[:, 2]) & (tile_bounds[:, 2] < extent[2]))
+                | ((part_bounds[:, 3] >= tile_bounds[:, 3]) & (tile_bounds[:, 3] < extent[3])))
+        joined = shapely.get_parts(shapely.union_all(parts[seam]))
+        geometry = shapely.multipolygons(np.concatenate((parts[~seam], joined)))
+    if not geometry.is_valid:
+        geometry = geometry.buffer(0)
+    return geometry
+
+
+def benchmark(count: int, chunk_sizes: list[int], workers: int | None = None, seed: int = 0) -> None:
+    """
+    Times the union of overlapping random polygons resembling depth areas, with a single union
+    as in Shape.collect and with partitioned unions of the given chunk sizes.
+
+    :param count: number of polygons
+    :param chunk_sizes: chunk sizes to compare
+    :param workers: number of processes for the partitioned unions, in-process if None
+    :param seed: seed of the random polygons
+    :return: None
+    """
+    generator = np.random.default_rng(seed)
+    side = math.sqrt(count) * 100
+    centres = generator.uniform(0, side, (count, 2))
+    radii = generator.uniform(10, 50, count)
+    geometries = shapely.buffer(shapely.points(centres), radii, quad_segs=4)
+    print(f"Union of {count} polygons ({shapely.get_num_coordinates(geometries).sum()} vertices)")
+
+    start_time = time.perf_counter()
+    reference = shapely.union_all(repair(geometries))
+    print(f"  single union: {time.perf_counter() - start_time:.2f} s")
+    for chunk_size in chunk_sizes:
+        start_time = time.perf_counter()
+        geometry = partitioned_union(geometries, chunk_size, workers)
+        elapsed = time.perf_counter() - start_time
+        difference = abs(geometry.area - reference.area) / max(reference.area, 1e-9)
+        parts = f"{shapely.get_num_geometries(geometry)}/{shapely.get_num_geometries(reference)} polygons"
+        print(f"  chunks of {chunk_size}: {elapsed:.2f} s, {parts}, relative area difference {difference:.1e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arguments = argparse.ArgumentParser(description="Benchmark of the partitioned union against a single union")
+    arguments.add_argument("--count", type=int, default=100000, help="number of polygons")
+    arguments.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    arguments.add_argument("--workers", type=int, default=None, help="processes, 0 for one per CPU")
+    options = arguments.parse_args()
+    benchmark(options.count, options.chunk_sizes, options.workers)
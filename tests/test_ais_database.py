@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from shapely.geometry import box
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core.aisAreaQuery import AISAreaIndex, area_visits
+from seacharts.core.aisDatabase import AISDatabaseParser
+from seacharts.core.aisTrajectory import AISTracks
+
+FORMAT = "%d-%m-%Y %H:%M:%S"
+
+
+def _parser(reports: list[tuple], epoch: bool = True) -> AISDatabaseParser:
+    """
+    Parser of an in-memory history, without the start-up query of the displayed period.
+
+    :param reports: list of (mmsi, east, north, time), time as epoch seconds or as a string
+    :param epoch: True if the times are epoch seconds
+    """
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE AisHistory (mmsi INTEGER, longtitude REAL, latitude REAL, last_updated)")
+    connection.executemany("INSERT INTO AisHistory VALUES (?, ?, ?, ?)", reports)
+    parser = AISDatabaseParser.__new__(AISDatabaseParser)
+    parser.scope = SimpleNamespace(settings={"enc": {"ais": {"coords_type": "utm"}}})
+    parser._db = connection
+    parser.db_column_names = {"mmsi": "mmsi", "lon": "longtitude", "lat": "latitude", "last_updated": "last_updated"}
+    parser._epoch_timestamps = epoch
+    parser._track_index_ready = False
+    parser._area_index = None
+    return parser
+
+
+def test_get_tracks_of_more_vessels_than_a_query_chunk():
+    generator = np.random.default_rng(0)
+    mmsis = generator.permutation(np.arange(100000, 101203)).tolist()
+    reports = [(mmsi, float(mmsi), float(time), time) for mmsi in mmsis for time in (1000, 1010, 1020)]
+    parser = _parser([reports[index] for index in generator.permutation(len(reports))])
+    tracks = parser.get_tracks(mmsis, datetime.fromtimestamp(1005), datetime.fromtimestamp(1020))
+    assert tracks.mmsi.tolist() == sorted(mmsis)
+    assert np.diff(tracks.offsets).tolist() == [2] * len(mmsis)
+    for index, mmsi in enumerate(tracks.mmsi.tolist()):
+        times, points = tracks[index]
+        assert times.tolist() == [1010, 1020]
+        assert points.tolist() == [[mmsi, 1010], [mmsi, 1020]]
+
+
+def test_get_tracks_with_string_timestamps_across_months():
+    times = [datetime(2024, 1, 15, 12), datetime(2024, 1, 31, 12), datetime(2024, 2, 1, 6),
+             datetime(2024, 1, 30, 23), datetime(2024, 2, 10, 0)]
+    parser = _parser([(1, float(index), 0.0, time.strftime(FORMAT)) for index, time in enumerate(times)], epoch=False)
+    track_times, points = parser.get_track(1, datetime(2024, 1, 30), datetime(2024, 2, 2))
+    assert track_times.tolist() == [times[3].timestamp(), times[1].timestamp(), times[2].timestamp()]
+    assert points[:, 0].tolist() == [3.0, 1.0, 2.0]
+
+
+def test_get_track_without_reports():
+    parser = _parser([(1, 0.0, 0.0, 1000)])
+    times, points = parser.get_track(2, datetime.fromtimestamp(0), datetime.fromtimestamp(2000))
+    assert times.shape == (0,) and points.shape == (0, 2)
+
+
+def test_get_tracks_simplifies_trajectories():
+    reports = [(1, float(x), 0.0, 1000 + x) for x in range(10)] + [(2, 0.0, 0.0, 1000), (2, 5.0, 5.0, 1001)]
+    tracks = _parser(reports).get_tracks([2, 1], datetime.fromtimestamp(0), datetime.fromtimestamp(2000), 1.0)
+    assert tracks.mmsi.tolist() == [1, 2]
+    assert tracks.offsets.tolist() == [0, 2, 4]
+    assert tracks.points.tolist() == [[0, 0], [9, 0], [0, 0], [5, 5]]
+    assert [segment.tolist() for segment in tracks.segments()] == [[[0, 0], [9, 0]], [[0, 0], [5, 5]]]
+
+
+def test_tracks_from_sorted_points():
+    points = np.array([[0, 0], [1, 0], [2, 0], [0, 0], [1, 1]], dtype=float)
+    tracks = AISTracks.from_sorted(np.array([5, 5, 5, 7, 7]), np.arange(5.0), points)
+    assert len(tracks) == 2
+    assert tracks.offsets.tolist() == [0, 3, 5]
+    times, track = tracks[1]
+    assert times.tolist() == [3.0, 4.0]
+    assert track.tolist() == [[0, 0], [1, 1]]
+
+
+def test_area_visits_along_tracks():
+    inside = [False, True, True, False, True, True, True]
+    points = np.array([[15.0 if flag else 50.0, 5.0] for flag in inside] + [[15.0, 5.0], [50.0, 5.0]])
+    tracks = AISTracks(np.array([1, 2]), np.array([0, 7, 9]), np.arange(9.0), points)
+    assert area_visits(tracks, box(10, 0, 20, 10)) == [(1, 1.0, 2.0), (1, 4.0, 6.0), (2, 7.0, 7.0)]
+    assert area_visits(AISTracks.from_sorted(np.empty(0), np.empty(0), np.empty((0, 2))), box(0, 0, 1, 1)) == []
+
+
+def test_vessels_in_area_from_the_history():
+    area = box(1000, 1000, 3000, 3000)
+    reports = [(1, 500.0, 500.0, 1000), (1, 1500.0, 1500.0, 1100), (1, 2500.0, 2500.0, 1200),
+               (1, 3500.0, 3500.0, 1300), (1, 2000.0, 2000.0, 1400),
+               (2, 500.0, 500.0, 1000), (2, 500.0, 3500.0, 1100),
+               (3, 2000.0, 2000.0, 90000)]
+    # more candidates than a query chunk, inserted out of order
+    reports += [(mmsi, 2000.0, 2000.0, 1150) for mmsi in range(10999, 9999, -1)]
+    parser = _parser(reports)
+    visits = parser.get_vessels_in_area(area, datetime.fromtimestamp(0), datetime.fromtimestamp(5000))
+    assert visits[:2] == [(1, 1100.0, 1200.0), (1, 1400.0, 1400.0)]
+    assert visits[2:] == [(mmsi, 1150.0, 1150.0) for mmsi in range(10000, 11000)]
+
+    # rows appended to the history are indexed on the next query
+    parser._db.execute("INSERT INTO AisHistory VALUES (2, 2000.0, 2000.0, 1500)")
+    visits = parser.get_vessels_in_area(area, datetime.fromtimestamp(1300), datetime.fromtimestamp(5000))
+    assert visits == [(1, 1400.0, 1400.0), (2, 1500.0, 1500.0)]
+
+
+def test_vessels_in_area_with_string_timestamps_across_months():
+    times = [datetime(2024, 1, 31, 22), datetime(2024, 2, 1, 1), datetime(2024, 1, 2, 1), datetime(2024, 3, 1, 1)]
+    reports = [(mmsi, 2000.0, 2000.0, time.strftime(FORMAT)) for mmsi, time in enumerate(times, start=1)]
+    parser = _parser(reports, epoch=False)
+    visits = parser.get_vessels_in_area(box(1000, 1000, 3000, 3000), datetime(2024, 1, 31), datetime(2024, 2, 2))
+    assert visits == [(1, times[0].timestamp(), times[0].timestamp()), (2, times[1].timestamp(), times[1].timestamp())]
+
+
+def test_area_index_is_rebuilt_when_its_settings_change(capsys):
+    parser = _parser([(1, 2500.0, 2500.0, 1000)])
+    index = AISAreaIndex(parser._db, parser.db_column_names, parser._to_utm, parser._to_epoch, 1000.0, 3600)
+    assert index.candidates(box(2000, 2000, 2900, 2900), 0, 2000).tolist() == [1]
+    assert index.candidates(box(0, 0, 900, 900), 0, 2000).tolist() == []
+    assert index.candidates(box(2000, 2000, 2900, 2900), 4000, 8000).tolist() == []
+
+    index = AISAreaIndex(parser._db, parser.db_column_names, parser._to_utm, parser._to_epoch, 500.0, 3600)
+    assert "rebuilding the index" in capsys.readouterr().out
+    assert index.candidates(box(2000, 2000, 2400, 2400), 0, 2000).tolist() == []
+    assert index.candidates(box(2500, 2500, 2900, 2900), 0, 2000).tolist() == [1]
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import AISTrack, decode, encode_dict
+
+from seacharts.core.aisDeadReckoning import AISDeadReckoning, rate_of_turn
+from seacharts.core.aisFleet import AISFleet
+
+
+def _fleet(**fields) -> AISFleet:
+    track = AISTrack(mmsi=1, last_updated=1000.0, **fields)
+    return AISFleet.from_tracks([track], [0.0], [0.0])
+
+
+def test_rate_of_turn_keeps_decoded_degrees_per_minute():
+    turn = rate_of_turn(np.array([10.0, -10.0, 45.0, np.nan, -128.0], dtype=np.float32))
+    assert turn.tolist() == [10.0, -10.0, 45.0, 0.0, 0.0]
+
+
+def test_rate_of_turn_without_turn_indicator_is_nominal():
+    sentences = [encode_dict({"msg_type": 1, "mmsi": 1, "turn": turn})[0] for turn in (127, -127)]
+    decoded = [decode(sentence).turn for sentence in sentences]
+    assert [abs(turn) for turn in decoded] == [127.0, 127.0]
+    assert rate_of_turn(np.array(decoded)).tolist() == [10.0, -10.0]
+
+
+def test_rate_of_turn_clamps_implausible_rates():
+    decoded = [decode(encode_dict({"msg_type": 1, "mmsi": 1, "turn": turn})[0]).turn for turn in (708, -708)]
+    assert decoded[0] > 700
+    assert rate_of_turn(np.array(decoded)).tolist() == [60.0, -60.0]
+
+
+def test_rate_of_turn_of_decoded_message():
+    sentence = encode_dict({"msg_type": 1, "mmsi": 1, "turn": 10.0, "speed": 10.0, "course": 90.0})[0]
+    decoded = decode(sentence)
+    assert rate_of_turn(np.array([decoded.turn])).tolist() == [decoded.turn]
+    assert decoded.turn == pytest.approx(10.0, abs=1.0)
+
+
+def test_dead_reckoning_moves_along_course():
+    east, north, heading = AISDeadReckoning(60).project(_fleet(speed=10.0, course=90.0, heading=90.0, turn=0.0),
+                                                        1060.0)
+    assert east[0] == pytest.approx(10 * 1852 / 60, rel=1e-3)
+    assert north[0] == pytest.approx(0.0, abs=1e-3)
+    assert heading[0] == pytest.approx(90.0)
+
+
+def test_dead_reckoning_turns_at_reported_rate():
+    _, _, heading = AISDeadReckoning(60).project(_fleet(speed=10.0, course=90.0, heading=90.0, turn=10.0), 1060.0)
+    assert heading[0] == pytest.approx(100.0)
+
+
+def test_dead_reckoning_clamps_to_horizon_and_ignores_unavailable_turn():
+    fleet = _fleet(speed=10.0, course=0.0, heading=0.0, turn=-128.0)
+    east, north, heading = AISDeadReckoning(30).project(fleet, 1600.0)
+    assert north[0] == pytest.approx(10 * 1852 / 120, rel=1e-3)
+    assert east[0] == pytest.approx(0.0, abs=1e-3)
+    assert heading[0] == pytest.approx(0.0)
@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import encode_dict
+
+from seacharts.core.aisDecodePool import AISDecodePool
+from seacharts.core.aisStream import AISSentenceAssembler
+
+
+def _messages(count: int) -> list:
+    assembler = AISSentenceAssembler()
+    messages = []
+    for i in range(count):
+        for sentence in encode_dict({"msg_type": 1, "mmsi": 200000000 + i, "lon": 10.0, "lat": 60.0}):
+            message = assembler.push(sentence.encode(), 1000.0 + i)
+            if message is not None:
+                messages.append(message)
+    return messages
+
+
+def _decode(pool: AISDecodePool, messages: list) -> list:
+    merged = []
+    pool.start(merged.extend)
+    for message in messages:
+        pool.submit(message)
+    deadline = time.monotonic() + 30
+    while pool.decoded + pool.errors < len(messages) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.shutdown()
+    return merged
+
+
+def test_decode_pool_decodes_in_order():
+    messages = _messages(50)
+    pool = AISDecodePool(1, batch_size=10, flush_interval=0.05)
+    tracks = _decode(pool, messages)
+    assert [track.mmsi for track in tracks] == [200000000 + i for i in range(50)]
+    assert tracks[0].last_updated == 1000.0
+    assert pool.failures == 0
+
+
+def test_decode_pool_falls_back_to_inline_decoding_when_workers_die():
+    messages = _messages(50)
+    pool = AISDecodePool(1, batch_size=10, flush_interval=0.05)
+    pool.warm_up()
+    for process in list(pool._executor._processes.values()):
+        process.kill()
+        process.join()
+    tracks = _decode(pool, messages)
+    assert len(tracks) == 50
+    assert pool.failures >= 1
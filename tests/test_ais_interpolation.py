@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import AISTrack
+
+from seacharts.core.aisFleet import AISFleet
+from seacharts.core.aisInterpolation import interpolate_fleets, interpolate_headings
+
+
+def _fleet(vessels: list[tuple]) -> AISFleet:
+    """
+    :param vessels: list of (mmsi, east, north, heading, last_updated)
+    """
+    tracks = [AISTrack(mmsi=mmsi, heading=heading) for mmsi, _, _, heading, _ in vessels]
+    return AISFleet.from_tracks(tracks, [vessel[1] for vessel in vessels], [vessel[2] for vessel in vessels],
+                                [np.nan if vessel[4] is None else vessel[4] for vessel in vessels])
+
+
+def test_interpolate_headings_along_shortest_turn():
+    headings = interpolate_headings(np.array([350.0, 10.0, 90.0, 511.0, 511.0]),
+                                    np.array([10.0, 350.0, 511.0, 45.0, 511.0]), np.full(5, 0.5))
+    assert headings.tolist() == pytest.approx([0.0, 0.0, 90.0, 45.0, 511.0])
+
+
+def test_interpolate_fleets_moves_matched_vessels_between_reports():
+    previous = _fleet([(1, 0.0, 0.0, 90.0, 1000.0)])
+    following = _fleet([(1, 100.0, 200.0, 110.0, 1010.0)])
+    indices, east, north, heading = interpolate_fleets(previous, following, 1005.0, 1000.0, 1010.0)
+    assert indices.tolist() == [1]
+    assert east.tolist() == pytest.approx([50.0])
+    assert north.tolist() == pytest.approx([100.0])
+    assert heading.tolist() == pytest.approx([100.0])
+
+
+def test_interpolate_fleets_uses_snapshot_times_without_report_times():
+    previous = _fleet([(1, 0.0, 0.0, 90.0, None)])
+    following = _fleet([(1, 100.0, 0.0, 90.0, None)])
+    _, east, _, _ = interpolate_fleets(previous, following, 1002.5, 1000.0, 1010.0)
+    assert east.tolist() == pytest.approx([25.0])
+
+
+def test_interpolate_fleets_clamps_to_reports():
+    previous = _fleet([(1, 0.0, 0.0, 90.0, 1000.0)])
+    following = _fleet([(1, 100.0, 0.0, 90.0, 1004.0)])
+    _, east, _, _ = interpolate_fleets(previous, following, 1008.0, 1000.0, 1010.0)
+    assert east.tolist() == pytest.approx([100.0])
+
+
+def test_interpolate_fleets_keeps_disappearing_and_adds_appearing_vessels():
+    previous = _fleet([(1, 0.0, 0.0, 90.0, 1000.0), (2, 500.0, 500.0, 511.0, 999.0)])
+    following = _fleet([(1, 100.0, 0.0, 90.0, 1010.0), (3, 900.0, 900.0, 180.0, 1008.0)])
+    indices, east, _, heading = interpolate_fleets(previous, following, 1005.0, 1000.0, 1010.0)
+    assert indices.tolist() == [2, 1]
+    assert east.tolist() == pytest.approx([50.0, 500.0])
+    assert heading.tolist() == pytest.approx([90.0, 511.0])
+
+    indices, east, _, _ = interpolate_fleets(previous, following, 1009.0, 1000.0, 1010.0)
+    assert indices.tolist() == [2, 1, 3]
+    assert east.tolist() == pytest.approx([90.0, 500.0, 900.0])
+
+    indices, _, _, _ = interpolate_fleets(previous, following, 1010.0, 1000.0, 1010.0)
+    assert indices.tolist() == [2, 3]
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import encode_dict
+
+from seacharts.core.aisMetrics import AISHistogram, AISMetrics
+from seacharts.core.aisStream import AISSentenceAssembler
+
+
+def _report(mmsi: int, second: int, received_at: float):
+    line = encode_dict({"msg_type": 1, "mmsi": mmsi, "second": second})[0].encode()
+    return AISSentenceAssembler().push(line, received_at)
+
+
+def test_histogram_quantiles():
+    histogram = AISHistogram()
+    for value in (1e-6, 2e-6, 3e-6, 1e-3):
+        histogram.record(value)
+    histogram.record_many(np.full(96, 1e-6))
+    summary = histogram.as_dict()
+    assert summary["count"] == 100
+    assert summary["p50"] == pytest.approx(1e-6)
+    assert summary["p99"] == pytest.approx(4e-6)
+    assert summary["max"] == summary["p99"] * 250
+    assert AISHistogram().as_dict()["p50"] == 0.0
+
+
+def test_rates_over_sampling_window(tmp_path):
+    metrics = AISMetrics(interval=3600, dump_file=str(tmp_path / "metrics.jsonl"))
+    decoded = {"count": 0}
+    metrics.register_counter("received", lambda: decoded["count"])
+    metrics.register_gauge("tracked", lambda: 7)
+    metrics._sample = (time.perf_counter() - 2.0, metrics.counters())
+    metrics.increment("decoded", 20)
+    decoded["count"] = 40
+    metrics._sample_rates()
+    sample = json.loads((tmp_path / "metrics.jsonl").read_text().splitlines()[-1])
+    assert sample["counters"] == {"decoded": 20, "received": 40}
+    assert 9 < sample["rates"]["decoded"] <= 10
+    assert 18 < sample["rates"]["received"] <= 20
+    assert sample["gauges"] == {"tracked": 7}
+
+
+def test_lag_of_reports_first_included_in_a_snapshot():
+    metrics = AISMetrics()
+    metrics.observe_report(_report(1, 58, 1201.0))
+    metrics.observe_report(_report(2, 0, 1201.0))
+    metrics.observe_snapshot([], 1190.0)
+    tracks = [SimpleNamespace(mmsi=1, last_updated=1201.0), SimpleNamespace(mmsi=2, last_updated=1201.0),
+              SimpleNamespace(mmsi=3, last_updated=1195.0), SimpleNamespace(mmsi=4, last_updated=1180.0)]
+    metrics.observe_snapshot(tracks, 1205.0)
+    lag = metrics.lag.as_dict()
+    # reported at 1198 (second 58 of the previous minute), 1200 and at its update time
+    assert lag["count"] == 3
+    assert lag["mean"] == pytest.approx((7 + 5 + 10) / 3)
+
+
+def test_report_times_are_shared_between_threads():
+    metrics = AISMetrics()
+    tracks = [SimpleNamespace(mmsi=mmsi, last_updated=2000.0) for mmsi in range(200)]
+    metrics.observe_snapshot([], 1000.0)
+
+    def report():
+        for _ in range(50):
+            for mmsi in range(200):
+                metrics.observe_report(_report(mmsi, 10, 1210.0))
+                metrics.forget(mmsi)
+
+    threads = [threading.Thread(target=report) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for index in range(50):
+        metrics.observe_snapshot(tracks, 1999.0 + index)
+    for thread in threads:
+        thread.join()
+    assert metrics._report_times == {}
@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import AISTrack
+
+from seacharts.core.aisRecorder import AISRecorder
+
+
+def _track(mmsi: int, last_updated: float = 1000.5, **fields) -> AISTrack:
+    return AISTrack(mmsi=mmsi, lon=fields.pop("lon", 10.0), lat=fields.pop("lat", 63.0), last_updated=last_updated,
+                    **fields)
+
+
+def _rows(path, query: str = "SELECT mmsi, longtitude, latitude, last_updated FROM AisHistory ORDER BY rowid"):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(query).fetchall()
+    finally:
+        connection.close()
+
+
+def test_recorder_writes_buffered_reports_on_close(tmp_path):
+    path = str(tmp_path / "history.db")
+    recorder = AISRecorder(path, flush_interval=3600)
+    recorder.record(_track(1, speed=12.5, status=5, shipname="ALPHA"))
+    recorder.record(_track(2, lon=None))
+    recorder.record(_track(1, 1010.9, lon=10.1))
+    assert recorder.pending == 2
+    assert _rows(path) == []
+    recorder.close()
+    assert recorder.recorded == 2 and recorder.pending == 0
+    assert _rows(path) == [(1, 10.0, 63.0, 1000), (1, 10.1, 63.0, 1010)]
+    assert _rows(path, "SELECT speed, status, shipname FROM AisHistory")[0] == (12.5, 5, "ALPHA")
+
+
+def test_recorder_writes_full_batches_early(tmp_path):
+    path = str(tmp_path / "history.db")
+    recorder = AISRecorder(path, flush_interval=3600, batch_size=10)
+    for mmsi in range(25):
+        recorder.record(_track(mmsi))
+    deadline = time.monotonic() + 5
+    while recorder.recorded < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert recorder.recorded >= 10
+    recorder.close()
+    assert len(_rows(path)) == 25
+
+
+def test_recorder_drops_reports_beyond_max_pending(tmp_path):
+    recorder = AISRecorder(str(tmp_path / "history.db"), flush_interval=3600, max_pending=3)
+    for mmsi in range(5):
+        recorder.record(_track(mmsi))
+    assert (recorder.pending, recorder.dropped) == (3, 2)
+    recorder.close()
+    assert recorder.recorded == 3
+
+
+def test_recorder_uses_custom_columns_of_existing_table(tmp_path):
+    path = str(tmp_path / "history.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE AisHistory (id INTEGER, lon REAL, lat REAL, time INTEGER, speed REAL)")
+    connection.commit()
+    connection.close()
+    recorder = AISRecorder(path, {"mmsi": "id", "lon": "lon", "lat": "lat", "last_updated": "time"}, 3600)
+    recorder.record(_track(7, speed=3.0, heading=90))
+    recorder.close()
+    assert _rows(path, "SELECT * FROM AisHistory") == [(7, 10.0, 63.0, 1000, 3.0)]
@@ -0,0 +1,62 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import encode_dict
+
+from seacharts.core.aisReplay import AISReplayParser
+from seacharts.core.extent import Extent
+
+
+def _replay(tmp_path, lines: list[bytes], **settings) -> AISReplayParser:
+    path = tmp_path / "replay.nmea"
+    path.write_bytes(b"".join(line + b"\r\n" for line in lines))
+    extent = Extent({"enc": {"size": [9000, 5062], "center": [44300, 6956450], "crs": "UTM33N"}})
+    scope = SimpleNamespace(settings={"enc": {"ais": {"replay_file": str(path), "interval": 60, **settings}}},
+                            time=SimpleNamespace(period="hour", period_mult=1), extent=extent)
+    parser = AISReplayParser(scope)
+    assert parser.replay_finished.wait(30)
+    return parser
+
+
+def _position(mmsi: int, second: int, received_at: int | None = None) -> bytes:
+    line = encode_dict({"msg_type": 1, "mmsi": mmsi, "lon": 6.15, "lat": 62.46, "speed": 5.0, "second": second})[0]
+    if received_at is None:
+        return line.encode()
+    return f"\\c:{received_at}*00\\{line}".encode()
+
+
+def test_replay_follows_tag_block_times(tmp_path):
+    start = 1671620000
+    parser = _replay(tmp_path, [_position(1, 0, start), _position(2, 30, start + 30), _position(1, 10, start + 20),
+                                _position(2, 30, start + 90), _position(3, 30, (start + 150) * 1000)], replay_speed=100)
+    stats = parser.get_replay_stats()
+    assert stats["finished"]
+    assert (stats["lines"], stats["messages"]) == (5, 5)
+    # the clock stays monotonic and reads receive times written in milliseconds
+    assert stats["simulated_seconds"] == pytest.approx(150.0)
+    assert 1.4 < stats["wall_seconds"] < 5
+    # snapshots after 90 and 150 seconds of simulated time, then at the end of the log
+    assert stats["snapshots"] == 3
+    assert parser.simulated_time == start + 150
+    assert sorted(ship.mmsi for ship in parser.ships_info) == [1, 2, 3]
+
+
+def test_replay_without_tag_blocks_uses_replay_rate(tmp_path):
+    parser = _replay(tmp_path, [_position(mmsi, 10) for mmsi in range(1, 51)], replay_speed=10, replay_rate=100)
+    stats = parser.get_replay_stats()
+    assert stats["messages"] == 50
+    assert stats["simulated_seconds"] == pytest.approx(0.49)
+    assert 0.04 < stats["wall_seconds"] < 2
+    assert len(parser.ships_info) == 50
+
+
+def test_replay_drops_duplicates_and_filtered_types(tmp_path):
+    static = [line.encode() for line in encode_dict({"msg_type": 4, "mmsi": 2570000})]
+    parser = _replay(tmp_path, [_position(1, 0, 1000), _position(1, 0, 1001)] + static, replay_speed=1000)
+    stats = parser.source_stats["replay.nmea"]
+    assert (stats.received, stats.duplicates, stats.filtered) == (2, 1, 1)
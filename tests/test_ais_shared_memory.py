@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core.aisFleet import AISFleet
+from seacharts.core.aisSharedMemory import AISSharedFleetPublisher, AISSharedFleetReader
+
+
+def _name(suffix: str) -> str:
+    return f"seacharts_test_{os.getpid()}_{suffix}"
+
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_shared_fleet_round_trip():
+    publisher = AISSharedFleetPublisher(_name("round_trip"), capacity=16)
+    reader = AISSharedFleetReader(_name("round_trip"))
+    publisher.publish(AISFleet.empty(), 1000.0)
+    assert len(reader.read()) == 0
+    assert reader.timestamp == 1000.0
+    reader.close()
+    publisher.close()
+
+
+def test_publisher_refuses_block_of_running_publisher():
+    publisher = AISSharedFleetPublisher(_name("running"), capacity=16)
+    publisher.publish(AISFleet.empty(), 1000.0)
+    with pytest.raises(ValueError, match="already published"):
+        AISSharedFleetPublisher(_name("running"), capacity=16)
+    reader = AISSharedFleetReader(_name("running"))
+    assert reader.timestamp == 1000.0
+    reader.close()
+    publisher.close()
+
+
+def test_publisher_reuses_stale_block_without_unlinking_it():
+    stale = AISSharedFleetPublisher(_name("stale"), capacity=16)
+    stale._header["publisher"] = _exited_pid()
+    publisher = AISSharedFleetPublisher(_name("stale"), capacity=16)
+    publisher.publish(AISFleet.empty(), 2000.0)
+    publisher.close()
+    reader = AISSharedFleetReader(_name("stale"))
+    assert reader.timestamp == 2000.0
+    reader.close()
+    stale.close()
+
+
+def test_publisher_refuses_foreign_block():
+    block = shared_memory.SharedMemory(_name("foreign"), create=True, size=4096)
+    try:
+        with pytest.raises(ValueError, match="does not hold an AIS fleet"):
+            AISSharedFleetPublisher(_name("foreign"), capacity=16)
+        shared_memory.SharedMemory(_name("foreign")).close()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_reused_block_keeps_sequence_growing():
+    stale = AISSharedFleetPublisher(_name("sequence"), capacity=16)
+    for timestamp in (1000.0, 1001.0, 1002.0):
+        stale.publish(AISFleet.empty(), timestamp)
+    reader = AISSharedFleetReader(_name("sequence"))
+    _, sequence = reader.view()
+    assert sequence == 6
+    stale._header["publisher"] = _exited_pid()
+    stale._header["sequence"] += 1  # left in the middle of a write
+
+    publisher = AISSharedFleetPublisher(_name("sequence"), capacity=16)
+    assert reader.sequence % 2 == 0 and reader.sequence > sequence
+    assert not reader.is_valid(sequence)
+    _, sequence = reader.view()
+    publisher.publish(AISFleet.empty(), 2000.0)
+    assert reader.wait(sequence, timeout=1.0)
+    assert reader.timestamp == 2000.0
+    reader.close()
+    publisher.close()
+    stale.close()
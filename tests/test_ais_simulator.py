@@ -0,0 +1,81 @@
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import decode
+
+from seacharts.core.aisSimulator import AISSimulator, encode_position_reports
+from seacharts.core.aisStream import AISSentenceAssembler
+
+BBOX = (10.0, 63.0, 10.5, 63.5)
+
+
+def _messages(data: bytes) -> list:
+    assembler = AISSentenceAssembler()
+    messages = [assembler.push(line, 1000.0) for line in data.splitlines()]
+    return [message for message in messages if message is not None]
+
+
+def test_encoded_position_reports_decode_to_their_fields():
+    data = encode_position_reports(np.array([257000000, 3669708]), np.array([10.25, -73.9]),
+                                   np.array([63.4, -40.5]), np.array([12.3, 150.0]), np.array([359.96, 45.0]),
+                                   np.array([-1.0, 45.0]), np.array([75, 12]))
+    messages = _messages(data)
+    assert [message.mmsi for message in messages] == [257000000, 3669708]
+    assert [message.msg_type for message in messages] == [1, 1]
+    first, second = (decode(*message.lines, error_if_checksum_invalid=True) for message in messages)
+    assert (first.msg_type, first.mmsi) == (1, 257000000)
+    assert (first.lon, first.lat) == pytest.approx((10.25, 63.4), abs=1e-5)
+    assert first.speed == pytest.approx(12.3)
+    assert first.course == pytest.approx(0.0)
+    assert (first.heading, first.second) == (359, 15)
+    assert (second.lon, second.lat) == pytest.approx((-73.9, -40.5), abs=1e-5)
+    assert second.speed == pytest.approx(102.2)
+    assert (second.course, second.heading, second.second) == (45.0, 45, 12)
+
+
+def test_generate_sends_due_static_reports_and_positions_in_turn():
+    simulator = AISSimulator(BBOX, vessels=3, static_interval=10.0, seed=1)
+    try:
+        simulator._next_static[:] = [0.0, 50.0, 50.0]
+        data, count = simulator.generate(4, 5.0)
+        messages = [decode(*message.lines) for message in _messages(data)]
+        assert count == len(messages) == 5
+        assert (messages[0].msg_type, messages[0].mmsi, messages[0].shipname) == (5, 200000000, "SIM 0")
+        assert [message.mmsi for message in messages[1:]] == [200000000, 200000001, 200000002, 200000000]
+        assert messages[2].lon == pytest.approx(simulator.lon[1], abs=1e-5)
+        assert simulator.generate(0, 6.0) == (b"", 0)
+    finally:
+        simulator.stop()
+
+
+def test_vessels_stay_inside_the_area():
+    simulator = AISSimulator(BBOX, vessels=200, seed=2)
+    try:
+        for _ in range(100):
+            simulator.move(60.0)
+        assert ((simulator.lon >= BBOX[0]) & (simulator.lon <= BBOX[2])).all()
+        assert ((simulator.lat >= BBOX[1]) & (simulator.lat <= BBOX[3])).all()
+    finally:
+        simulator.stop()
+
+
+def test_server_streams_decodable_traffic():
+    with AISSimulator(BBOX, vessels=20, rate=200, seed=3) as simulator:
+        with socket.create_connection((simulator.host, simulator.port), timeout=5) as connection:
+            data = b""
+            deadline = time.monotonic() + 5
+            while data.count(b"\n") < 50 and time.monotonic() < deadline:
+                data += connection.recv(65536)
+        data = data[:data.rfind(b"\n") + 1]
+        messages = [decode(*message.lines) for message in _messages(data)]
+    assert len(messages) >= 50
+    assert {message.mmsi for message in messages} <= set(range(200000000, 200000020))
+    assert all(BBOX[0] <= message.lon <= BBOX[2] for message in messages if message.msg_type == 1)
+    assert simulator.stats()["sent"] > 0
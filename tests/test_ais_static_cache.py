@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import AISTrack
+
+from seacharts.core.aisStaticCache import AISStaticCache
+
+
+def _static_track(mmsi: int, shipname: str) -> AISTrack:
+    return AISTrack(mmsi=mmsi, shipname=shipname, ship_type=70, to_bow=50, to_stern=10, to_port=5, to_starboard=5)
+
+
+def _updated(path: str) -> dict[int, int]:
+    with sqlite3.connect(path) as connection:
+        return dict(connection.execute("SELECT mmsi, updated FROM StaticData").fetchall())
+
+
+def test_static_cache_round_trip(tmp_path):
+    path = str(tmp_path / "static.db")
+    cache = AISStaticCache(path, flush_interval=3600)
+    cache.observe(_static_track(1, "ALPHA"))
+    cache.close()
+
+    cache = AISStaticCache(path, flush_interval=3600)
+    track = AISTrack(mmsi=1, lon=10.0, lat=60.0)
+    cache.apply(track)
+    cache.close()
+    assert track.shipname == "ALPHA"
+    assert track.to_bow == 50
+    assert cache.hits == 1
+
+
+def test_static_cache_refreshes_vessels_reporting_unchanged_data(tmp_path):
+    path = str(tmp_path / "static.db")
+    cache = AISStaticCache(path, flush_interval=3600, max_age=30)
+    cache.observe(_static_track(1, "ALPHA"))
+    cache.observe(_static_track(2, "BRAVO"))
+    cache.close()
+    old = int(time.time() - 20 * 86400)
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE StaticData SET updated = ?", (old,))
+
+    cache = AISStaticCache(path, flush_interval=3600, max_age=30)
+    track = AISTrack(mmsi=1)
+    cache.apply(track)
+    cache.observe(track)
+    cache.close()
+    updated = _updated(path)
+    assert updated[1] >= time.time() - 60
+    assert updated[2] == old
+
+
+def test_static_cache_drops_entries_older_than_max_age(tmp_path):
+    path = str(tmp_path / "static.db")
+    cache = AISStaticCache(path, flush_interval=3600, max_age=30)
+    cache.observe(_static_track(1, "ALPHA"))
+    cache.close()
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE StaticData SET updated = ?", (int(time.time() - 40 * 86400),))
+
+    cache = AISStaticCache(path, flush_interval=3600, max_age=30)
+    cache.close()
+    assert len(cache) == 0
@@ -0,0 +1,98 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import encode_dict
+
+from seacharts.core.aisStream import AISDeduplicator, AISSentenceAssembler
+
+
+def _sentences(**fields) -> list[bytes]:
+    return [sentence.encode() for sentence in encode_dict(fields)]
+
+
+def _message(received_at: float = 1000.0, **fields):
+    assembler = AISSentenceAssembler()
+    messages = [assembler.push(line, received_at) for line in _sentences(**fields)]
+    return messages[-1]
+
+
+def test_assembler_assembles_single_and_multi_sentence_messages():
+    position = _message(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0)
+    assert position.mmsi == 257000000
+    assert position.msg_type == 1
+    static = _message(msg_type=5, mmsi=257000001, shipname="ALPHA", destination="OSLO")
+    assert len(static.lines) == 2
+    assert static.msg_type == 5
+    assert static.mmsi == 257000001
+
+
+def test_assembler_drops_orphaned_fragments():
+    assembler = AISSentenceAssembler()
+    first, second = _sentences(msg_type=5, mmsi=257000001, shipname="ALPHA")
+    assert assembler.push(second, 1000.0) is None
+    assert assembler.push(first, 1000.0) is None
+    assert assembler.push(second, 1000.0) is not None
+
+
+def test_assembler_reads_tag_blocks():
+    line = b"\\s:2573135,c:1671620143*0B\\" + _sentences(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0)[0]
+    assert AISSentenceAssembler().push(line, 1000.0).mmsi == 257000000
+
+
+def test_deduplicator_drops_messages_received_twice():
+    deduplicator = AISDeduplicator(window=30)
+    message = _message(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0, second=12)
+    other_source = _message(1001.0, msg_type=1, mmsi=257000000, lon=10.0, lat=60.0, second=12)
+    next_report = _message(1010.0, msg_type=1, mmsi=257000000, lon=10.1, lat=60.0, second=22)
+    assert not deduplicator.is_duplicate(message)
+    assert deduplicator.is_duplicate(other_source)
+    assert not deduplicator.is_duplicate(next_report)
+
+
+def test_deduplicator_forgets_messages_after_window():
+    deduplicator = AISDeduplicator(window=30)
+    assert not deduplicator.is_duplicate(_message(1000.0, msg_type=1, mmsi=257000000, lon=10.0, lat=60.0))
+    assert not deduplicator.is_duplicate(_message(1031.0, msg_type=1, mmsi=257000000, lon=10.0, lat=60.0))
+    assert len(deduplicator) == 1
+
+
+def test_deduplicator_is_bounded():
+    deduplicator = AISDeduplicator(window=30, max_entries=10)
+    for mmsi in range(257000000, 257000050):
+        deduplicator.is_duplicate(_message(msg_type=1, mmsi=mmsi, lon=10.0, lat=60.0))
+    assert len(deduplicator) <= 10
+
+
+def test_deduplicator_disabled():
+    deduplicator = AISDeduplicator(window=0)
+    message = _message(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0)
+    assert not deduplicator.is_duplicate(message)
+    assert not deduplicator.is_duplicate(message)
+
+
+def test_assembler_filters_message_types_before_assembly():
+    assembler = AISSentenceAssembler(message_types=(1, 2, 3))
+    kept = [assembler.push(line, 1000.0) for line in _sentences(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0)]
+    static = [assembler.push(line, 1000.0) for line in _sentences(msg_type=5, mmsi=257000001, shipname="ALPHA")]
+    base_station = [assembler.push(line, 1000.0) for line in _sentences(msg_type=4, mmsi=2570000)]
+    assert kept[-1] is not None
+    assert static == [None, None]
+    assert base_station == [None]
+    # filtered on the first fragment only, later fragments are dropped as orphans
+    assert assembler.filtered == 2
+
+
+def test_assembler_keeps_all_types_without_filter():
+    assembler = AISSentenceAssembler()
+    messages = [assembler.push(line, 1000.0) for line in _sentences(msg_type=4, mmsi=2570000)]
+    assert messages[-1].msg_type == 4
+    assert assembler.filtered == 0
+
+
+def test_assembler_filters_high_message_types():
+    assembler = AISSentenceAssembler(message_types=(24, 27))
+    lines = _sentences(msg_type=24, mmsi=257000001, partno=0, shipname="ALPHA")
+    assert assembler.push(lines[-1], 1000.0).msg_type == 24
+    assert assembler.push(_sentences(msg_type=1, mmsi=257000000, lon=10.0, lat=60.0)[0], 1000.0) is None
@@ -0,0 +1,85 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pyais import AISTrack
+from pyais.tracker import AISTrackEvent
+
+from seacharts.core.aisTracker import AISLiveTracker
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _insert(tracker: AISLiveTracker, mmsi: int, last_updated: float) -> None:
+    tracker.insert_or_update(mmsi, AISTrack(mmsi=mmsi, lon=10.0, lat=60.0, last_updated=last_updated))
+
+
+def test_tracker_evicts_expired_vessels():
+    clock = _Clock(1000.0)
+    tracker = AISLiveTracker(ttl_in_seconds=600, clock=clock)
+    _insert(tracker, 1, 1000.0)
+    _insert(tracker, 2, 1300.0)
+    clock.now = 1650.0
+    tracker.cleanup()
+    assert [track.mmsi for track in tracker.tracks] == [2]
+    assert tracker.evicted_ttl == 1
+
+
+def test_tracker_keeps_vessels_updated_since_their_expiry_was_queued():
+    clock = _Clock(1000.0)
+    tracker = AISLiveTracker(ttl_in_seconds=600, clock=clock)
+    _insert(tracker, 1, 1000.0)
+    _insert(tracker, 1, 1500.0)
+    clock.now = 1700.0
+    tracker.cleanup()
+    assert len(tracker) == 1
+    assert tracker.evicted_ttl == 0
+    clock.now = 2200.0
+    tracker.cleanup()
+    assert len(tracker) == 0
+    assert tracker.evicted_ttl == 1
+
+
+def test_tracker_without_ttl_keeps_vessels():
+    tracker = AISLiveTracker(ttl_in_seconds=None, clock=_Clock(10 ** 9))
+    _insert(tracker, 1, 0.0)
+    tracker.cleanup()
+    assert len(tracker) == 1
+
+
+def test_tracker_evicts_least_recently_seen_vessels_above_cap():
+    deleted = []
+    tracker = AISLiveTracker(ttl_in_seconds=None, max_vessels=3)
+    tracker.register_callback(AISTrackEvent.DELETED, lambda track: deleted.append(track.mmsi))
+    for mmsi, last_updated in ((1, 1000.0), (2, 1010.0), (3, 1020.0)):
+        _insert(tracker, mmsi, last_updated)
+    _insert(tracker, 1, 1030.0)
+    _insert(tracker, 4, 1040.0)
+    assert sorted(track.mmsi for track in tracker.tracks) == [1, 3, 4]
+    assert deleted == [2]
+    assert tracker.evicted_cap == 1
+
+
+def test_tracker_cap_may_evict_the_inserted_vessel():
+    tracker = AISLiveTracker(ttl_in_seconds=None, max_vessels=2)
+    _insert(tracker, 1, 1000.0)
+    _insert(tracker, 2, 1010.0)
+    _insert(tracker, 3, 900.0)
+    assert tracker.get_track(3) is None
+    assert len(tracker) == 2
+    assert tracker.evicted_cap == 1
+
+
+def test_tracker_expiry_heap_stays_bounded():
+    tracker = AISLiveTracker(ttl_in_seconds=600, clock=_Clock(0.0))
+    for update in range(5000):
+        _insert(tracker, update % 10, 1000.0 + update)
+    assert len(tracker) == 10
+    assert len(tracker._expiry) <= 2 * len(tracker) + 1024
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import fiona
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core import FGDBParser, paths
+from seacharts.core import parserFGDB
+from seacharts.core.bulkReader import _read_records, bulk_reader_available, read_arrays
+from seacharts.layers import Land, Seabed
+
+
+def _write_depths(path):
+    schema = {"geometry": "Polygon", "properties": {"DRVAL1": "float", "OBJNAM": "str"}}
+    with fiona.open(path, "w", driver="ESRI Shapefile", crs="EPSG:32633", schema=schema) as sink:
+        sink.write({"geometry": mapping(box(0, 0, 10, 10)), "properties": {"DRVAL1": 5.0, "OBJNAM": "a"}})
+        sink.write({"geometry": mapping(box(5, 5, 20, 20)), "properties": {"DRVAL1": 15.0, "OBJNAM": "b"}})
+        sink.write({"geometry": mapping(box(100, 100, 110, 110)), "properties": {"DRVAL1": 25.0, "OBJNAM": None}})
+
+
+def test_read_records(tmp_path):
+    path = tmp_path / "depths.shp"
+    _write_depths(path)
+    geometries, columns = _read_records(path, None, (0, 0, 50, 50))
+    assert shapely.area(geometries).tolist() == [100.0, 225.0]
+    assert columns["DRVAL1"].tolist() == [5.0, 15.0]
+
+
+def test_read_arrays(tmp_path):
+    pytest.importorskip("pyogrio")
+    path = tmp_path / "depths.shp"
+    _write_depths(path)
+    geometries, columns = read_arrays(path, bounding_box=(0, 0, 50, 50))
+    assert shapely.area(geometries).tolist() == [100.0, 225.0]
+    assert np.asarray(columns["DRVAL1"]).tolist() == [5.0, 15.0]
+    assert np.asarray(columns["OBJNAM"]).tolist() == ["a", "b"]
+    geometries, columns = read_arrays(path)
+    assert len(geometries) == 3
+    assert np.asarray(columns["OBJNAM"]).tolist()[2] is None
+
+
+def test_read_arrays_of_missing_layer(tmp_path):
+    pytest.importorskip("pyogrio")
+    path = tmp_path / "depths.shp"
+    _write_depths(path)
+    with pytest.raises(ValueError, match="Null layer: 'missing'"):
+        read_arrays(path, layer="missing")
+
+
+def test_bulk_reader_is_opt_in():
+    bounding_box = (0, 0, 50, 50)
+    assert not FGDBParser(bounding_box, [])._bulk_read
+    assert not FGDBParser(bounding_box, [], {"reader": "fiona"})._bulk_read
+    assert FGDBParser(bounding_box, [], {"reader": "pyogrio"})._bulk_read == bulk_reader_available()
+
+
+def test_bulk_load_matches_record_load(tmp_path, monkeypatch):
+    pytest.importorskip("pyogrio")
+    monkeypatch.setattr(paths, "shapefiles", tmp_path)
+    layer = Seabed(depth=0)
+    (tmp_path / layer.label).mkdir()
+    _write_depths(tmp_path / layer.label / f"{layer.label}.shp")
+    loaded = {}
+    for reader in ("fiona", "pyogrio"):
+        layer = Seabed(depth=0)
+        FGDBParser((0, 0, 50, 50), [], {"reader": reader}).load_shapefiles(layer)
+        loaded[reader] = layer
+    assert loaded["pyogrio"].records is None
+    assert loaded["pyogrio"].geometry.area == pytest.approx(loaded["fiona"].geometry.area)
+    assert loaded["pyogrio"].get_params_at_coord(2, 2) == dict(loaded["fiona"].get_params_at_coord(2, 2))
+
+
+class _InlineExecutor:
+    tasks = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, function, tasks):
+        _InlineExecutor.tasks = list(tasks)
+        return [function(task) for task in _InlineExecutor.tasks]
+
+
+def test_parallel_fgdb_build_passes_build_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "shapefiles", tmp_path)
+    monkeypatch.setattr(parserFGDB, "ProcessPoolExecutor", _InlineExecutor)
+    build = {"workers": 2, "reader": "pyogrio", "cache_format": "wkb", "union": {"chunk_size": 10, "workers": 2}}
+    FGDBParser((0, 0, 50, 50), [], build)._parse_parallel([Land()])
+    (_, _, _, task_build), = _InlineExecutor.tasks
+    assert task_build == {"reader": "pyogrio", "cache_format": "wkb", "union": {"chunk_size": 10}}
@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+
+import fiona
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core import FGDBParser, paths
+from seacharts.layers import Land, Seabed, Shore
+
+BOUNDING_BOX = (300000, 7000000, 305000, 7005000)
+
+
+def _layer(path, name, geometries, fields=None):
+    fields = fields or {}
+    schema = {"geometry": "Polygon", "properties": {field: "float" for field in fields}}
+    # written without CRS, which the parser does not read, as GDAL fails to write projected ones with fiona
+    with fiona.open(path, "w", driver="OpenFileGDB", layer=name, schema=schema) as sink:
+        for index, geometry in enumerate(geometries):
+            sink.write({"geometry": mapping(geometry),
+                        "properties": {field: float(values[index]) for field, values in fields.items()}})
+
+
+def _discs(generator, count, radius):
+    centres = shapely.points(generator.uniform(-500, 5500, (count, 2)) + BOUNDING_BOX[:2])
+    return shapely.buffer(centres, generator.uniform(radius / 2, radius, count), quad_segs=4).tolist()
+
+
+@pytest.fixture
+def gdb(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "shapefiles", tmp_path / "shapefiles")
+    generator = np.random.default_rng(0)
+    path = tmp_path / "test.gdb"
+    _layer(path, "landareal", _discs(generator, 300, 150))
+    _layer(path, "dybdeareal", _discs(generator, 300, 200), {"minimumsdybde": generator.choice([0, 5, 20], 300)})
+    _layer(path, "grunne", _discs(generator, 50, 50), {"dybde": generator.choice([0, 5, 20], 50)})
+    for name in ("ikkekartlagtsjomaltomr", "skjer", "torrfall"):
+        _layer(path, name, _discs(generator, 50, 50))
+    return path
+
+
+def _build(gdb, build) -> tuple[list, FGDBParser]:
+    shutil.rmtree(paths.shapefiles, ignore_errors=True)
+    regions = [Land(), Shore(), Seabed(depth=0), Seabed(depth=5), Seabed(depth=20)]
+    for region in regions:
+        (paths.shapefiles / region.label).mkdir(parents=True)
+    parser = FGDBParser(BOUNDING_BOX, [str(gdb)], build)
+    parser.parse_resources(regions, ["test.gdb"], 25e6)
+    return regions, parser
+
+
+def _shapefile_geometry(label):
+    with fiona.open(paths.shapefiles / label / f"{label}.shp") as source:
+        return shapely.union_all([shapely.geometry.shape(feature.geometry) for feature in source])
+
+
+@pytest.mark.parametrize("union", [{}, {"chunk_size": 50}])
+def test_parallel_build_matches_sequential_build(gdb, union):
+    sequential, _ = _build(gdb, {"union": union})
+    written = {region.label: _shapefile_geometry(region.label) for region in sequential}
+    parallel, parser = _build(gdb, {"union": union, "workers": 2})
+    assert [result["error"] for result in parser.build_report] == [None] * len(parallel)
+    assert [result["layer"] for result in parser.build_report] == [region.name for region in parallel]
+    for before, after in zip(sequential, parallel):
+        assert after.geometry.area > 0
+        assert after.geometry.area == pytest.approx(before.geometry.area, rel=1e-9)
+        assert shapely.symmetric_difference(after.geometry, before.geometry).area < 1e-6 * before.geometry.area
+        assert _shapefile_geometry(after.label).equals(written[after.label])
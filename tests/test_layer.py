@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Polygon, box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.layers import Land, Seabed
+
+
+def _records(geometries) -> list[dict]:
+    return [{"type": "Feature", "geometry": mapping(geometry), "properties": {"index": index}}
+            for index, geometry in enumerate(geometries)]
+
+
+def test_unify_clips_records_to_bounding_box():
+    records = _records([box(-1000, -1000, 50, 50), box(40, 40, 2000, 60), box(500, 500, 600, 600)])
+    clipped, whole = Land(), Land()
+    clipped.unify(records, bounding_box=(0, 0, 100, 100))
+    whole.unify(records)
+    assert shapely.bounds(clipped.geometry).tolist() == [0.0, 0.0, 100.0, 60.0]
+    expected = whole.geometry.intersection(box(0, 0, 100, 100))
+    assert clipped.geometry.symmetric_difference(expected).area == pytest.approx(0.0, abs=1e-9)
+
+
+def test_unify_drops_records_outside_bounding_box():
+    layer = Land()
+    layer.unify(_records([box(500, 500, 600, 600)]), bounding_box=(0, 0, 100, 100))
+    assert layer.geometry.is_empty
+
+
+def test_unify_repairs_invalid_records_before_clipping():
+    bowtie = Polygon([(0, 0), (100, 100), (100, 0), (0, 100)])
+    layer = Land()
+    layer.unify(_records([bowtie]), bounding_box=(0, 0, 100, 50))
+    assert layer.geometry.is_valid
+    assert layer.geometry.area == pytest.approx(shapely.clip_by_rect(bowtie.buffer(0), 0, 0, 100, 50).area)
+
+
+def test_unify_in_partitions_with_bounding_box():
+    generator = np.random.default_rng(0)
+    polygons = shapely.buffer(shapely.points(generator.uniform(0, 3000, (500, 2))), 60, quad_segs=4)
+    records = _records(polygons)
+    single, partitioned = Seabed(depth=10), Seabed(depth=10)
+    single.unify(records, bounding_box=(500, 500, 2500, 2500))
+    partitioned.unify(records, chunk_size=50, bounding_box=(500, 500, 2500, 2500))
+    assert partitioned.geometry.area == pytest.approx(single.geometry.area, rel=1e-9)
+    assert shapely.bounds(partitioned.geometry).tolist() == pytest.approx([500.0, 500.0, 2500.0, 2500.0], abs=60)
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import fiona
+import pytest
+from shapely.geometry import box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core import layerCache, paths
+from seacharts.core.layerCache import LayerCache
+from seacharts.core.parserFGDB import FGDBParser
+from seacharts.layers import Seabed
+
+BOUNDING_BOX = (0, 0, 1000, 1000)
+
+
+def _write(directory, label, areas):
+    schema = {"geometry": "Polygon", "properties": {"DRVAL1": "int", "OBJNAM": "str"}}
+    with fiona.open(directory / f"{label}.shp", "w", driver="ESRI Shapefile", schema=schema,
+                    crs="EPSG:32633") as sink:
+        for index, area in enumerate(areas):
+            sink.write({"geometry": mapping(area), "properties": {"DRVAL1": 10 + index, "OBJNAM": f"area {index}"}})
+
+
+@pytest.fixture
+def shapefile(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "shapefiles", tmp_path)
+    label = Seabed(depth=10).label
+    (tmp_path / label).mkdir()
+    _write(tmp_path / label, label, [box(0, 0, 100, 100), box(50, 50, 200, 200)])
+    return tmp_path / label / f"{label}.shp"
+
+
+def _load(cache_format="wkb") -> Seabed:
+    layer = Seabed(depth=10)
+    FGDBParser(BOUNDING_BOX, [], {"cache_format": cache_format}).load_shapefiles(layer)
+    return layer
+
+
+def test_cache_is_written_then_loaded(shapefile):
+    cold = _load()
+    assert cold.records is not None
+    assert (shapefile.parent / f"{cold.label}.attributes.json").exists()
+
+    warm = _load()
+    assert warm.records is None
+    assert len(warm.record_geometries) == 2
+    assert warm.record_properties["OBJNAM"] == ["area 0", "area 1"]
+    assert warm.geometry.equals(cold.geometry)
+    assert warm.geometry.area == pytest.approx(100 * 100 + 150 * 150 - 50 * 50)
+    assert warm.get_params_at_coord(150, 150)["OBJNAM"] == "area 1"
+    assert warm.get_params_at_coord(500, 500) is None
+
+
+def test_shapefile_format_writes_no_cache(shapefile):
+    layer = _load("shapefile")
+    assert layer.records is not None
+    assert not (shapefile.parent / f"{layer.label}.attributes.json").exists()
+
+
+def test_cache_is_ignored_after_the_shapefile_changes(shapefile):
+    _load()
+    signature = LayerCache.signature(shapefile)
+    _write(shapefile.parent, shapefile.stem, [box(300, 300, 400, 400)])
+    assert LayerCache.signature(shapefile) != signature
+
+    layer = _load()
+    assert layer.records is not None
+    assert layer.geometry.area == pytest.approx(100 * 100)
+    assert _load().record_properties["OBJNAM"] == ["area 0"]
+
+
+def test_unreadable_cache_falls_back_to_the_shapefile(shapefile):
+    cold = _load()
+    (shapefile.parent / f"{cold.label}.features.npy").write_bytes(b"")
+    layer = _load()
+    assert layer.records is not None
+    assert layer.geometry.equals(cold.geometry)
+
+
+def test_benchmark_runs(capsys):
+    layerCache.benchmark(200)
+    output = capsys.readouterr().out
+    assert "cold start" in output and "warm start" in output
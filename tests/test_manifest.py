@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import fiona
+import pytest
+from pyproj import Transformer
+from shapely.geometry import LineString, box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core import S57Parser, paths
+from seacharts.core.manifest import BuildManifest, file_hash
+from seacharts.environment.map import MapData
+
+
+def test_manifest_changes_and_round_trip(tmp_path):
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    inputs = {"bounding_box": (0, 0, 10, 10), "depth": 10, "next_depth": 20}
+    assert not manifest.is_current("seabed10m", inputs)
+    manifest.record("seabed10m", inputs)
+    manifest.save()
+
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    assert manifest.is_current("seabed10m", inputs)
+    assert manifest.changes("seabed10m", {**inputs, "next_depth": 30}) == ["next_depth"]
+    assert manifest.changes("seabed10m", {**inputs, "layer": "DEPARE"}) == ["layer"]
+    assert not manifest.is_current("land", inputs)
+
+
+def test_manifest_ignores_unreadable_file(tmp_path):
+    (tmp_path / "manifest.json").write_text("{")
+    with pytest.warns(UserWarning):
+        manifest = BuildManifest(tmp_path / "manifest.json")
+    assert manifest.layers == {}
+
+
+def test_source_digest_follows_content(tmp_path):
+    source = tmp_path / "cell.000"
+    source.write_bytes(b"a" * 100)
+    digest = BuildManifest(tmp_path / "manifest.json").source_digest([source])
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    assert manifest.source_digest([source]) == digest
+    assert manifest.sources[str(source)]["hash"] == file_hash(source)
+
+    # a touched file with the same content keeps its digest
+    time.sleep(0.01)
+    os.utime(source)
+    assert BuildManifest(tmp_path / "manifest.json").source_digest([source]) == digest
+    source.write_bytes(b"b" * 100)
+    assert BuildManifest(tmp_path / "manifest.json").source_digest([source]) != digest
+
+
+def _layer(path, name, geometry_type, fields, features):
+    with fiona.open(path, "w", driver="GPKG", layer=name, crs="EPSG:4326",
+                    schema={"geometry": geometry_type, "properties": fields}) as sink:
+        for geometry, values in features:
+            sink.write({"geometry": mapping(geometry), "properties": values})
+
+
+@pytest.fixture
+def cell(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "shapefiles", tmp_path / "shapefiles")
+    enc = tmp_path / "ENC"
+    enc.mkdir()
+    path = enc / "NO3W0001.000"
+    # GDAL reads any vector data set, the layers of a GeoPackage stand in for those of an S57 cell
+    _layer(path, "M_COVR", "Polygon", {"CATCOV": "int"}, [(box(10.0, 63.0, 10.5, 63.5), {"CATCOV": 1})])
+    _layer(path, "LNDARE", "Polygon", {"RCID": "int"}, [(box(10.3, 63.1, 10.5, 63.15), {"RCID": 0})])
+    _layer(path, "COALNE", "LineString", {"RCID": "int"}, [(LineString([(10.1, 63.4), (10.5, 63.4)]), {"RCID": 0})])
+    _layer(path, "DEPARE", "Polygon", {"DRVAL1": "float"},
+           [(box(10.0, 63.2, 10.5, 63.3), {"DRVAL1": 5.0}), (box(10.0, 63.3, 10.5, 63.35), {"DRVAL1": 35.0})])
+    return path
+
+
+def _build(cell, depths, size=0.4) -> tuple[MapData, list[str]]:
+    """
+    Loads the up to date shapefiles of a map and rebuilds the others, as on start-up.
+
+    :return: tuple of the map and the labels of the rebuilt layers
+    """
+    transformer = Transformer.from_crs("EPSG:4326", "EPSG:32632", always_xy=True)
+    x_min, y_min = transformer.transform(10.05, 63.05)
+    x_max, y_max = transformer.transform(10.05 + size, 63.45)
+    parser = S57Parser((int(x_min), int(y_min), int(x_max), int(y_max)), [str(cell.parent)], "epsg:32632", {},
+                       depths=depths)
+    features = ["land", "shore"] + [f"seabed{depth}m" for depth in depths]
+    scope = SimpleNamespace(depths=depths, features=features, resources=["ENC"], extent=SimpleNamespace(area=1e9))
+    data = MapData(scope, parser)
+    data.load_existing_shapefiles()
+    rebuilt = [region.label for region in data.not_loaded_regions]
+    if rebuilt:
+        data.parse_resources_into_shapefiles()
+    return data, rebuilt
+
+
+def test_only_layers_with_changed_inputs_are_rebuilt(cell):
+    data, rebuilt = _build(cell, [0, 10, 20])
+    assert rebuilt == ["land", "shore", "seabed0m", "seabed10m", "seabed20m"]
+    assert data.empty_labels == {"seabed10m"}
+
+    deep = data.bathymetry[20].geometry.area
+    assert deep > 0
+
+    data, rebuilt = _build(cell, [0, 10, 20])
+    assert rebuilt == []
+    assert data.empty_labels == {"seabed10m"}
+
+    # the new bin is built and the bin above it hands its deeper areas over
+    data, rebuilt = _build(cell, [0, 10, 20, 30])
+    assert rebuilt == ["seabed20m", "seabed30m"]
+    assert data.empty_labels == {"seabed10m", "seabed20m"}
+    assert data.bathymetry[30].geometry.area == pytest.approx(deep)
+
+    _, rebuilt = _build(cell, [0, 10, 20, 30], size=0.3)
+    assert rebuilt == ["land", "shore", "seabed0m", "seabed10m", "seabed20m", "seabed30m"]
+
+    layers = json.loads((paths.shapefiles / "manifest.json").read_text())["layers"]
+    assert layers["seabed20m"]["next_depth"] == 30
+    assert layers["land"]["layer"] == "LNDARE"
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import sys
+
+import fiona
+import pytest
+from pyproj import Transformer
+from shapely.geometry import LineString, box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core import S57Parser, paths
+from seacharts.layers import Land, Seabed, Shore
+
+
+def _layer(path, name, geometry_type, fields, features):
+    with fiona.open(path, "w", driver="GPKG", layer=name, crs="EPSG:4326",
+                    schema={"geometry": geometry_type, "properties": fields}) as sink:
+        for geometry, values in features:
+            sink.write({"geometry": mapping(geometry), "properties": values})
+
+
+def _cell(path, land):
+    # GDAL reads any vector data set, the layers of a GeoPackage stand in for those of an S57 cell
+    _layer(path, "M_COVR", "Polygon", {"CATCOV": "int"}, [(box(10.0, 63.0, 10.5, 63.5), {"CATCOV": 1})])
+    _layer(path, "LNDARE", "Polygon", {"RCID": "int"}, [(land, {"RCID": 0})])
+    _layer(path, "COALNE", "LineString", {"RCID": "int"}, [(LineString([(10.1, 63.4), (10.5, 63.4)]), {"RCID": 0})])
+    _layer(path, "DEPARE", "Polygon", {"DRVAL1": "float"},
+           [(box(10.0, 63.2, 10.5, 63.3), {"DRVAL1": 5.0}), (box(10.0, 63.3, 10.5, 63.35), {"DRVAL1": 25.0})])
+
+
+@pytest.fixture
+def cell(tmp_path, monkeypatch):
+    monkeypatch.setattr(paths, "shapefiles", tmp_path / "shapefiles")
+    enc = tmp_path / "ENC"
+    enc.mkdir()
+    path = enc / "NO3W0001.000"
+    _cell(path, box(10.3, 63.1, 10.5, 63.15))
+    return path
+
+
+def _parser(cell, build):
+    transformer = Transformer.from_crs("EPSG:4326", "EPSG:32632", always_xy=True)
+    x_min, y_min = transformer.transform(10.05, 63.05)
+    x_max, y_max = transformer.transform(10.45, 63.45)
+    return S57Parser((int(x_min), int(y_min), int(x_max), int(y_max)), [str(cell.parent)], "epsg:32632", build,
+                     depths=[0, 10, 20])
+
+
+def _regions():
+    return [Land(), Shore(), Seabed(depth=0), Seabed(depth=10), Seabed(depth=20)]
+
+
+def _fingerprints():
+    return json.loads((paths.shapefiles / "s57_updates.json").read_text())["fingerprints"]
+
+
+def test_parallel_build_records_the_fingerprints_of_the_sequential_build(cell):
+    regions = _regions()
+    _parser(cell, {}).parse_resources(regions, ["ENC"], 1e9)
+    sequential = _fingerprints()
+    areas = [region.geometry.area for region in regions]
+    shutil.rmtree(paths.shapefiles)
+
+    regions = _regions()
+    _parser(cell, {"workers": 1}).parse_resources(regions, ["ENC"], 1e9)
+    assert _fingerprints() == sequential
+    assert set(sequential) == {region.label for region in regions}
+    assert [region.geometry.area for region in regions] == pytest.approx(areas)
+
+
+def test_update_after_parallel_build_only_rewrites_changed_layers(cell):
+    regions = _regions()
+    parser = _parser(cell, {"workers": 1})
+    parser.parse_resources(regions, ["ENC"], 1e9)
+    assert parser.update_resources(regions) == []
+
+    # GDAL applies update files when reading their base cell, the updated content is written to the cell itself
+    cell.unlink()
+    _cell(cell, box(10.2, 63.1, 10.5, 63.15))
+    update = cell.with_suffix(".001")
+    _layer(update, "LNDARE", "Polygon", {"RCID": "int"}, [(box(10.2, 63.1, 10.3, 63.15), {"RCID": 0})])
+    # records of depth areas whose content does not change within the map
+    _layer(update, "DEPARE", "Polygon", {"DRVAL1": "float"}, [(box(10.0, 63.2, 10.5, 63.3), {"DRVAL1": 5.0})])
+    area = regions[0].geometry.area
+    changed = parser.update_resources(regions)
+    assert [region.name for region in changed] == ["Land"]
+    assert regions[0].geometry.area > area
+    assert parser.update_resources(regions) == []
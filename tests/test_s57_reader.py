@@ -0,0 +1,103 @@
+import os
+import sys
+
+import fiona
+import shapely
+from shapely.geometry import Polygon, box, mapping
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.core.s57Reader import S57CellReader, depth_bins, merge_cells, scan_cell, write_depth_bins, write_shapefile
+
+
+def test_write_shapefile(tmp_path):
+    path = tmp_path / "land" / "land.shp"
+    write_shapefile(str(path), "EPSG:32633", {"OBJNAM": "str", "NATSUR": "List[int]"},
+                    [box(0, 0, 1, 1), box(2, 2, 3, 3)], [{"OBJNAM": "a", "NATSUR": [1, 4]}, {"OBJNAM": "b", "NATSUR": None}])
+    with fiona.open(path) as source:
+        features = list(source)
+    assert len(features) == 2
+    assert features[0].properties["NATSUR"] == "1,4"
+
+
+def test_write_shapefile_without_features_writes_empty_shapefile(tmp_path):
+    path = tmp_path / "tsslpt" / "tsslpt.shp"
+    write_shapefile(str(path), "EPSG:32633", {"ORIENT": "float"}, [], [])
+    assert path.exists()
+    with fiona.open(path) as source:
+        assert len(source) == 0
+        assert "ORIENT" in source.schema["properties"]
+
+
+def test_depth_bins():
+    properties = [{"DRVAL1": 0.0}, {"DRVAL1": 5.0}, {"DRVAL1": 10.0}, {"DRVAL1": 250.0}, {"DRVAL1": -2.0}, {}]
+    assert depth_bins([0, 10, 50], properties).tolist() == [0, 0, 1, 2, -1, -1]
+
+
+def test_write_depth_bins(tmp_path):
+    paths = [str(tmp_path / f"seabed{depth}m" / f"seabed{depth}m.shp") for depth in (0, 10, 50)]
+    counts = write_depth_bins([0, 10, 50], paths, "EPSG:32633", {"DRVAL1": "float"},
+                              [box(0, 0, 1, 1), box(1, 1, 2, 2), box(2, 2, 3, 3)],
+                              [{"DRVAL1": 0.0}, {"DRVAL1": 12.0}, {"DRVAL1": 15.0}])
+    assert counts == [1, 2, 0]
+    with fiona.open(paths[2]) as source:
+        assert len(source) == 0
+
+
+def test_read_layer_repairs_invalid_features(tmp_path):
+    path = tmp_path / "NO3W0001.000"
+    bowtie = Polygon([(0, 0), (100, 100), (100, 0), (0, 100)])
+    with fiona.open(path, "w", driver="GPKG", layer="LNDARE", crs="EPSG:32633",
+                    schema={"geometry": "Polygon", "properties": {"RCID": "int"}}) as sink:
+        sink.write({"geometry": mapping(bowtie), "properties": {"RCID": 1}})
+        sink.write({"geometry": mapping(box(200, 200, 300, 300)), "properties": {"RCID": 2}})
+    schema, geometries, properties = S57CellReader(str(path), "epsg:32633", (0, 0, 250, 250)).read_layer("LNDARE")
+    assert [record["RCID"] for record in properties] == [1, 2]
+    assert all(geometry.is_valid for geometry in geometries)
+    assert geometries[0].area > 0
+    assert geometries[1].equals(box(200, 200, 250, 250))
+
+
+def _cell(band: int, coverage, features: list[tuple]) -> tuple:
+    """
+    :param features: list of (geometry, properties) of the LNDARE layer of the cell
+    """
+    layers = {"LNDARE": ({"RCID": "int", "OBJNAM": "str"}, [shapely.to_wkb(geometry) for geometry, _ in features],
+                         [values for _, values in features])}
+    return band, coverage, layers
+
+
+def test_scan_cell_reads_band_and_coverage(tmp_path):
+    path = tmp_path / "NO5H0001.000"
+    with fiona.open(path, "w", driver="GPKG", layer="M_COVR", crs="EPSG:32633",
+                    schema={"geometry": "Polygon", "properties": {"CATCOV": "int"}}) as sink:
+        sink.write({"geometry": mapping(box(0, 0, 100, 100)), "properties": {"CATCOV": 1}})
+        sink.write({"geometry": mapping(box(100, 0, 200, 100)), "properties": {"CATCOV": 2}})
+    band, coverage = scan_cell(str(path), "epsg:32633")
+    assert band == 5
+    assert shapely.from_wkb(coverage).equals(box(0, 0, 100, 100))
+
+
+def test_merge_cells_keeps_most_detailed_band_in_overlap():
+    overview = _cell(3, box(0, 0, 100, 100), [(box(0, 0, 100, 100), {"RCID": 1, "OBJNAM": "overview"})])
+    harbour = _cell(5, box(40, 40, 60, 60), [(box(45, 45, 55, 55), {"RCID": 2, "OBJNAM": "harbour"})])
+    _, geometries, properties = merge_cells([overview, harbour], "LNDARE")
+    merged = dict(zip([values["OBJNAM"] for values in properties], geometries))
+    assert len(geometries) == 2
+    assert merged["harbour"].equals(box(45, 45, 55, 55))
+    assert merged["overview"].area == 100 * 100 - 20 * 20
+    assert not merged["overview"].intersects(box(41, 41, 59, 59))
+
+
+def test_merge_cells_dissolves_features_split_at_seams_only():
+    west = _cell(3, box(0, 0, 50, 100), [(box(20, 20, 50, 40), {"RCID": 1, "OBJNAM": "isle"}),
+                                         (box(0, 60, 10, 70), {"RCID": 3, "OBJNAM": "rock"}),
+                                         (box(10, 60, 20, 70), {"RCID": 4, "OBJNAM": "rock"})])
+    east = _cell(3, box(50, 0, 100, 100), [(box(50, 20, 70, 40), {"RCID": 2, "OBJNAM": "isle"}),
+                                           (box(50, 50, 60, 55), {"RCID": 5, "OBJNAM": "islet"})])
+    _, geometries, properties = merge_cells([west, east], "LNDARE")
+    merged = sorted(zip([values["RCID"] for values in properties], geometries))
+    assert [rcid for rcid, _ in merged] == [1, 3, 4, 5]
+    assert merged[0][1].equals(box(20, 20, 70, 40))
+    assert merged[1][1].equals(box(0, 60, 10, 70))
+    assert merged[2][1].equals(box(10, 60, 20, 70))
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import LineString, MultiPolygon, Polygon
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from seacharts.layers import Land
+from seacharts.shapes import union
+from seacharts.shapes.union import partitioned_union, repair, tiles
+
+
+def _polygons(count: int, seed: int = 0) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    side = np.sqrt(count) * 100
+    return shapely.buffer(shapely.points(generator.uniform(0, side, (count, 2))),
+                          generator.uniform(10, 80, count), quad_segs=4)
+
+
+def _assert_same(geometry, reference):
+    assert geometry.is_valid
+    assert geometry.area == pytest.approx(reference.area, rel=1e-9)
+    assert geometry.symmetric_difference(reference).area < 1e-6 * reference.area
+
+
+def test_tiles_cover_extent_with_at_most_chunk_size_geometries():
+    geometries = _polygons(2000)
+    areas = tiles(geometries, 200)
+    assert len(areas) == 16
+    centres = shapely.centroid(shapely.envelope(geometries))
+    assert max(shapely.contains_xy(shapely.box(*tile), shapely.get_coordinates(centres)).sum()
+               for tile in areas) <= 200
+    x_min, y_min, x_max, y_max = shapely.total_bounds(geometries)
+    assert shapely.union_all(shapely.box(*areas.T)).area == pytest.approx((x_max - x_min) * (y_max - y_min))
+
+
+def test_partitioned_union_matches_single_union():
+    geometries = _polygons(2000)
+    reference = shapely.union_all(geometries)
+    for chunk_size in (100, 500, 1999):
+        _assert_same(partitioned_union(geometries, chunk_size), reference)
+
+
+def test_partitioned_union_on_worker_processes():
+    geometries = _polygons(600, seed=1)
+    _assert_same(partitioned_union(geometries, 100, workers=1), shapely.union_all(geometries))
+
+
+def test_partitioned_union_of_small_or_non_polygonal_sets():
+    geometries = _polygons(50)
+    _assert_same(partitioned_union(geometries, 100), shapely.union_all(geometries))
+    lines = [LineString([(0, 0), (10, 0)]), LineString([(5, 0), (20, 0)])]
+    assert partitioned_union(lines, 1).length == pytest.approx(20.0)
+
+
+def test_repair_fixes_invalid_polygons():
+    bowtie = Polygon([(0, 0), (10, 10), (10, 0), (0, 10)])
+    square = Polygon([(20, 0), (30, 0), (30, 10), (20, 10)])
+    repaired = repair(np.array([bowtie, square], dtype=object))
+    assert shapely.is_valid(repaired).all()
+    assert repaired[1] is square
+    assert partitioned_union([bowtie, square], 1).is_valid
+
+
+def test_layer_unions_records_in_partitions():
+    records = [{"type": "Feature", "geometry": shapely.geometry.mapping(polygon), "properties": {}}
+               for polygon in _polygons(1000)]
+    whole, partitioned = Land(), Land()
+    whole.records_as_geometry(records)
+    partitioned.records_as_geometry(records, chunk_size=100)
+    assert isinstance(partitioned.geometry, MultiPolygon)
+    _assert_same(partitioned.geometry, whole.geometry)
+
+
+def test_union_benchmark(capsys):
+    union.benchmark(500, [100])
+    output = capsys.readouterr().out
+    assert "single union" in output
+    assert "chunks of 100" in output